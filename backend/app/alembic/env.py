@@ -0,0 +1,80 @@
+from logging.config import fileConfig
+
+from alembic import context
+from dotenv import find_dotenv, load_dotenv
+
+_ = load_dotenv(find_dotenv())
+
+import models  # noqa: E402,F401  (registers every table on Base.metadata)
+from database import DATABASE_URL, Base, get_engine  # noqa: E402
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_name(name, type_, parent_names):
+    # The application only owns the public schema (Supabase keeps auth, storage, ... next to it)
+    if type_ == "schema":
+        return name == "public"
+    return True
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Objects limited to another dialect with ddl_if (the pg_trgm index on SQLite)
+    # are never created here, so autogenerate must not expect them either
+    ddl_if = getattr(obj, "_ddl_if", None)
+    if ddl_if is not None and ddl_if.dialect is not None:
+        return context.get_context().dialect.name in (
+            (ddl_if.dialect,) if isinstance(ddl_if.dialect, str) else ddl_if.dialect
+        )
+    return True
+
+
+def _configure(**kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        include_schemas=True,
+        include_name=include_name,
+        include_object=include_object,
+        compare_type=True,
+        **kwargs,
+    )
+
+
+def run_migrations_offline() -> None:
+    _configure(url=DATABASE_URL, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # Callers such as benchmarks/check_query_plans.py can pass their own connection
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    with get_engine().connect() as connection:
+        sqlite = connection.dialect.name == "sqlite"
+        if sqlite:
+            # Batch migrations copy and drop tables; with foreign keys on, dropping a
+            # parent table would cascade into its children (see database.enforce_sqlite_foreign_keys)
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            # End the implicit transaction, so the migrations run in (and commit) their own
+            connection.commit()
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        if sqlite:
+            connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
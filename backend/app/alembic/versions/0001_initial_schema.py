@@ -0,0 +1,76 @@
+"""Initial schema: patients, profiles and syphilis_case_histories
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Existing databases created with Base.metadata.create_all already have these
+tables: mark them with `alembic stamp 0001` before upgrading (see README.md).
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "patients",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("medical_record_number", sa.String(length=20), nullable=True),
+        sa.Column("diagnosis_date", sa.Date(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        schema="public",
+    )
+    op.create_index("ix_public_patients_id", "patients", ["id"], schema="public")
+    op.create_index(
+        "ix_public_patients_medical_record_number", "patients", ["medical_record_number"], unique=True, schema="public"
+    )
+
+    op.create_table(
+        "profiles",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("full_name", sa.String(length=100), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("email"),
+        schema="public",
+    )
+
+    op.create_table(
+        "syphilis_case_histories",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("patient_id", sa.Integer(), nullable=False),
+        sa.Column("titer_result", sa.String(length=100), nullable=True),
+        sa.Column("diagnosis_date", sa.Date(), nullable=True),
+        sa.Column("treatments", sa.JSON(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["patient_id"], ["public.patients.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        schema="public",
+    )
+    op.create_index("ix_public_syphilis_case_histories_id", "syphilis_case_histories", ["id"], schema="public")
+    op.create_index(
+        "ix_public_syphilis_case_histories_patient_id", "syphilis_case_histories", ["patient_id"], schema="public"
+    )
+    op.create_index(
+        "ix_public_syphilis_case_histories_titer_result", "syphilis_case_histories", ["titer_result"], schema="public"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("syphilis_case_histories", schema="public")
+    op.drop_table("profiles", schema="public")
+    op.drop_table("patients", schema="public")
@@ -0,0 +1,96 @@
+"""Add patient_summaries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+The summaries of the existing patients are filled in the same migration with
+one INSERT ... SELECT (their latest history by diagnosis_date, created_at, id,
+as in summaries.py); afterwards summaries.py keeps them current.
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from classification import titer_status_sql
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "patient_summaries",
+        sa.Column("patient_id", sa.Integer(), nullable=False),
+        sa.Column("first_exam_date", sa.Date(), nullable=True),
+        sa.Column("last_exam_date", sa.Date(), nullable=True),
+        sa.Column("latest_history_id", sa.Integer(), nullable=True),
+        sa.Column("latest_titer", sa.String(length=100), nullable=True),
+        sa.Column("status", sa.String(length=50), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["patient_id"], ["public.patients.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("patient_id"),
+        schema="public",
+    )
+    op.create_index(
+        "ix_patient_summaries_last_exam_date_patient_id",
+        "patient_summaries",
+        ["last_exam_date", "patient_id"],
+        schema="public",
+    )
+    fill_patient_summaries()
+
+
+def fill_patient_summaries() -> None:
+    patients = sa.table("patients", sa.column("id"), schema="public")
+    histories = sa.table(
+        "syphilis_case_histories",
+        sa.column("id"),
+        sa.column("patient_id"),
+        sa.column("titer_result"),
+        sa.column("diagnosis_date"),
+        sa.column("created_at"),
+        schema="public",
+    )
+    summaries = sa.table(
+        "patient_summaries",
+        sa.column("patient_id"),
+        sa.column("first_exam_date"),
+        sa.column("last_exam_date"),
+        sa.column("latest_history_id"),
+        sa.column("latest_titer"),
+        sa.column("status"),
+        schema="public",
+    )
+    ranked = sa.select(
+        histories.c.patient_id,
+        histories.c.id,
+        histories.c.titer_result,
+        sa.func.row_number().over(
+            partition_by=histories.c.patient_id,
+            order_by=[histories.c.diagnosis_date.desc(), histories.c.created_at.desc(), histories.c.id.desc()],
+        ).label("rn"),
+        sa.func.min(histories.c.diagnosis_date).over(partition_by=histories.c.patient_id).label("first_exam_date"),
+        sa.func.max(histories.c.diagnosis_date).over(partition_by=histories.c.patient_id).label("last_exam_date"),
+    ).subquery()
+    # Every patient gets a row; the ones without histories keep NULLs
+    rows = sa.select(
+        patients.c.id,
+        ranked.c.first_exam_date,
+        ranked.c.last_exam_date,
+        ranked.c.id,
+        ranked.c.titer_result,
+        titer_status_sql(ranked.c.titer_result),
+    ).outerjoin(ranked, sa.and_(patients.c.id == ranked.c.patient_id, ranked.c.rn == 1))
+    op.execute(
+        summaries.insert().from_select(
+            ["patient_id", "first_exam_date", "last_exam_date", "latest_history_id", "latest_titer", "status"], rows
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("patient_summaries", schema="public")
@@ -0,0 +1,35 @@
+"""Trigram index on patients.medical_record_number (PostgreSQL only)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_patients_medical_record_number_trgm",
+        "patients",
+        ["medical_record_number"],
+        schema="public",
+        postgresql_using="gin",
+        postgresql_ops={"medical_record_number": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index("ix_patients_medical_record_number_trgm", table_name="patients", schema="public")
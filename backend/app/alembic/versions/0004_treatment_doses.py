@@ -0,0 +1,100 @@
+"""Add treatment_doses
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+The doses of the existing case histories are filled in the same migration,
+BACKFILL_CHUNK_SIZE histories at a time in id order (with treatments.py's
+treatment_dose_values), so memory stays bounded on large registries.
+`python treatments.py backfill` rebuilds them later if ever needed.
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from treatments import treatment_dose_values
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.create_table(
+        "treatment_doses",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("case_history_id", sa.Integer(), nullable=False),
+        sa.Column("patient_id", sa.Integer(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("medication", sa.String(length=255), nullable=True),
+        sa.Column("medication_key", sa.String(length=255), nullable=True),
+        sa.Column("dose_number", sa.Integer(), nullable=True),
+        sa.Column("dose_date", sa.Date(), nullable=True),
+        sa.ForeignKeyConstraint(["case_history_id"], ["public.syphilis_case_histories.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["patient_id"], ["public.patients.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        schema="public",
+    )
+    op.create_index(
+        "ix_public_treatment_doses_case_history_id", "treatment_doses", ["case_history_id"], schema="public"
+    )
+    op.create_index(
+        "ix_treatment_doses_medication_key_dose_date",
+        "treatment_doses",
+        ["medication_key", "dose_date"],
+        schema="public",
+        postgresql_ops={"medication_key": "varchar_pattern_ops"},
+    )
+    op.create_index(
+        "ix_treatment_doses_patient_id_dose_date", "treatment_doses", ["patient_id", "dose_date"], schema="public"
+    )
+    fill_treatment_doses()
+
+
+def fill_treatment_doses() -> None:
+    histories = sa.table(
+        "syphilis_case_histories",
+        sa.column("id"),
+        sa.column("patient_id"),
+        sa.column("treatments", sa.JSON()),
+        schema="public",
+    )
+    doses = sa.table(
+        "treatment_doses",
+        sa.column("case_history_id"),
+        sa.column("patient_id"),
+        sa.column("position"),
+        sa.column("medication"),
+        sa.column("medication_key"),
+        sa.column("dose_number"),
+        sa.column("dose_date"),
+        schema="public",
+    )
+    bind = op.get_bind()
+    after_id = 0
+    while True:
+        chunk = bind.execute(
+            sa.select(histories.c.id, histories.c.patient_id, histories.c.treatments)
+            .where(histories.c.id > after_id)
+            .order_by(histories.c.id)
+            .limit(BACKFILL_CHUNK_SIZE)
+        ).all()
+        if not chunk:
+            return
+        values = [
+            {"case_history_id": history_id, "patient_id": patient_id, **dose}
+            for history_id, patient_id, treatments in chunk
+            for dose in treatment_dose_values(treatments)
+        ]
+        if values:
+            bind.execute(doses.insert(), values)
+        after_id = chunk[-1].id
+
+
+def downgrade() -> None:
+    op.drop_table("treatment_doses", schema="public")
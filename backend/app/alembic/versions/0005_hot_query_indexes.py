@@ -0,0 +1,103 @@
+"""Index the per-patient history reads and drop unused indexes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+- ix_syphilis_case_histories_patient_id_diagnosis_date (patient_id, diagnosis_date,
+  created_at, id) INCLUDE (titer_result) serves every per-patient history read in
+  route.py, summaries.py and analytics.py in index order, so none of them sorts.
+  It replaces the single-column patient_id index, which it covers as a prefix.
+- ix_syphilis_case_histories_titer_result: no query filters or sorts on the titer.
+- ix_public_patients_id, ix_public_syphilis_case_histories_id: duplicates of the
+  primary keys.
+- ix_patient_summaries_last_exam_date_patient_id is rebuilt on PostgreSQL in the
+  /patients/page order (last_exam_date DESC NULLS LAST, patient_id DESC).
+
+On PostgreSQL the indexes are built CONCURRENTLY, outside the migration
+transaction, so writes keep going while they build.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_syphilis_case_histories_patient_id_diagnosis_date",
+                "syphilis_case_histories",
+                ["patient_id", "diagnosis_date", "created_at", "id"],
+                schema="public",
+                postgresql_include=["titer_result"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.create_index(
+                "ix_patient_summaries_last_exam_date_patient_id_desc",
+                "patient_summaries",
+                ["last_exam_date", "patient_id"],
+                schema="public",
+                postgresql_ops={"last_exam_date": "DESC NULLS LAST", "patient_id": "DESC"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            for table, index in [
+                ("syphilis_case_histories", "ix_public_syphilis_case_histories_patient_id"),
+                ("syphilis_case_histories", "ix_public_syphilis_case_histories_titer_result"),
+                ("syphilis_case_histories", "ix_public_syphilis_case_histories_id"),
+                ("patients", "ix_public_patients_id"),
+                ("patient_summaries", "ix_patient_summaries_last_exam_date_patient_id"),
+            ]:
+                op.drop_index(
+                    index, table_name=table, schema="public", postgresql_concurrently=True, if_exists=True
+                )
+        op.execute(
+            "ALTER INDEX public.ix_patient_summaries_last_exam_date_patient_id_desc "
+            "RENAME TO ix_patient_summaries_last_exam_date_patient_id"
+        )
+        return
+
+    op.create_index(
+        "ix_syphilis_case_histories_patient_id_diagnosis_date",
+        "syphilis_case_histories",
+        ["patient_id", "diagnosis_date", "created_at", "id"],
+        schema="public",
+    )
+    op.drop_index("ix_public_syphilis_case_histories_patient_id", table_name="syphilis_case_histories", schema="public")
+    op.drop_index("ix_public_syphilis_case_histories_titer_result", table_name="syphilis_case_histories", schema="public")
+    op.drop_index("ix_public_syphilis_case_histories_id", table_name="syphilis_case_histories", schema="public")
+    op.drop_index("ix_public_patients_id", table_name="patients", schema="public")
+
+
+def downgrade() -> None:
+    op.create_index("ix_public_patients_id", "patients", ["id"], schema="public")
+    op.create_index("ix_public_syphilis_case_histories_id", "syphilis_case_histories", ["id"], schema="public")
+    op.create_index(
+        "ix_public_syphilis_case_histories_titer_result", "syphilis_case_histories", ["titer_result"], schema="public"
+    )
+    op.create_index(
+        "ix_public_syphilis_case_histories_patient_id", "syphilis_case_histories", ["patient_id"], schema="public"
+    )
+    op.drop_index(
+        "ix_syphilis_case_histories_patient_id_diagnosis_date", table_name="syphilis_case_histories", schema="public"
+    )
+    if _is_postgresql():
+        op.drop_index("ix_patient_summaries_last_exam_date_patient_id", table_name="patient_summaries", schema="public")
+        op.create_index(
+            "ix_patient_summaries_last_exam_date_patient_id",
+            "patient_summaries",
+            ["last_exam_date", "patient_id"],
+            schema="public",
+        )
@@ -0,0 +1,65 @@
+"""Add deleted_records and the updated_at indexes of delta sync
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+- deleted_records keeps a tombstone per deleted patient and case history, so
+  /sync clients learn about deletions.
+- ix_patients_updated_at_id and ix_syphilis_case_histories_updated_at_id serve
+  the (updated_at, id) keyset pages of /sync/patients and /sync/case-histories.
+
+On PostgreSQL the indexes are built CONCURRENTLY, like in 0005.
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UPDATED_AT_INDEXES = [
+    ("ix_patients_updated_at_id", "patients"),
+    ("ix_syphilis_case_histories_updated_at_id", "syphilis_case_histories"),
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "deleted_records",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("table_name", sa.String(length=64), nullable=False),
+        sa.Column("record_id", sa.Integer(), nullable=False),
+        sa.Column("patient_id", sa.Integer(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        schema="public",
+    )
+    op.create_index(
+        "ix_deleted_records_table_name_deleted_at_id",
+        "deleted_records",
+        ["table_name", "deleted_at", "id"],
+        schema="public",
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for index, table in UPDATED_AT_INDEXES:
+                op.create_index(
+                    index, table, ["updated_at", "id"], schema="public", postgresql_concurrently=True, if_not_exists=True
+                )
+        return
+
+    for index, table in UPDATED_AT_INDEXES:
+        op.create_index(index, table, ["updated_at", "id"], schema="public")
+
+
+def downgrade() -> None:
+    for index, table in UPDATED_AT_INDEXES:
+        op.drop_index(index, table_name=table, schema="public")
+    op.drop_index("ix_deleted_records_table_name_deleted_at_id", table_name="deleted_records", schema="public")
+    op.drop_table("deleted_records", schema="public")
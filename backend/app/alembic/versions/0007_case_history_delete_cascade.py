@@ -0,0 +1,58 @@
+"""Cascade patient deletes to their case histories in the database
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+syphilis_case_histories.patient_id gets ON DELETE CASCADE, so deleting a patient
+is a single DELETE (models.py marks the relationships passive_deletes) instead of
+the ORM loading and deleting every history. patient_summaries and
+treatment_doses already cascade.
+
+On PostgreSQL the new constraint is added NOT VALID and validated separately,
+which only takes a SHARE UPDATE EXCLUSIVE lock, so writes keep going meanwhile.
+SQLite cannot alter constraints, so the table is copied in batch mode.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Name of the (unnamed) constraint from 0001 on PostgreSQL
+PG_CONSTRAINT = "syphilis_case_histories_patient_id_fkey"
+# Names the unnamed constraint SQLite reflects, so batch mode can drop it
+SQLITE_NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+SQLITE_CONSTRAINT = "fk_syphilis_case_histories_patient_id_patients"
+
+
+def _set_on_delete(on_delete: str) -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            f"ALTER TABLE public.syphilis_case_histories DROP CONSTRAINT {PG_CONSTRAINT}, "
+            f"ADD CONSTRAINT {PG_CONSTRAINT} FOREIGN KEY (patient_id) REFERENCES public.patients (id) "
+            f"ON DELETE {on_delete} NOT VALID"
+        )
+        with op.get_context().autocommit_block():
+            op.execute(f"ALTER TABLE public.syphilis_case_histories VALIDATE CONSTRAINT {PG_CONSTRAINT}")
+        return
+
+    with op.batch_alter_table(
+        "syphilis_case_histories", schema="public", naming_convention=SQLITE_NAMING_CONVENTION
+    ) as batch_op:
+        batch_op.drop_constraint(SQLITE_CONSTRAINT, type_="foreignkey")
+        batch_op.create_foreign_key(
+            SQLITE_CONSTRAINT, "patients", ["patient_id"], ["id"], referent_schema="public", ondelete=on_delete
+        )
+
+
+def upgrade() -> None:
+    _set_on_delete("CASCADE")
+
+
+def downgrade() -> None:
+    _set_on_delete("NO ACTION")
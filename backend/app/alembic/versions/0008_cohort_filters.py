@@ -0,0 +1,74 @@
+"""Add patient_summaries.latest_titer_value and the cohort page indexes
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+
+- latest_titer_value holds the X of latest_titer ("1:X"), 0 when non-reactive,
+  so /patients/page can filter titer ranges and sort by titer in SQL. The
+  existing summaries are filled from latest_titer with
+  classification.titer_value_sql, which parses like titer_value and leaves
+  malformed values NULL; afterwards summaries.py keeps it current.
+- ix_patient_summaries_status_last_exam_date_patient_id serves a status filter
+  in the last_exam_date order, ix_patient_summaries_latest_titer_value_patient_id
+  the latest_titer order, both in the /patients/page order on PostgreSQL.
+
+On PostgreSQL the indexes are built CONCURRENTLY, like in 0005.
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from classification import titer_value_sql
+
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    (
+        "ix_patient_summaries_status_last_exam_date_patient_id",
+        ["status", "last_exam_date", "patient_id"],
+        {"last_exam_date": "DESC NULLS LAST", "patient_id": "DESC"},
+    ),
+    (
+        "ix_patient_summaries_latest_titer_value_patient_id",
+        ["latest_titer_value", "patient_id"],
+        {"latest_titer_value": "DESC NULLS LAST", "patient_id": "DESC"},
+    ),
+]
+
+
+def upgrade() -> None:
+    op.add_column("patient_summaries", sa.Column("latest_titer_value", sa.Float(), nullable=True), schema="public")
+    summaries = sa.table(
+        "patient_summaries", sa.column("latest_titer"), sa.column("latest_titer_value"), schema="public"
+    )
+    titer = summaries.c.latest_titer
+    # The guarded parser: a malformed legacy titer gets NULL instead of failing the cast
+    op.execute(summaries.update().where(titer.isnot(None)).values(latest_titer_value=titer_value_sql(titer)))
+
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for index, columns, ops in INDEXES:
+                op.create_index(
+                    index,
+                    "patient_summaries",
+                    columns,
+                    schema="public",
+                    postgresql_ops=ops,
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+        return
+
+    for index, columns, _ in INDEXES:
+        op.create_index(index, "patient_summaries", columns, schema="public")
+
+
+def downgrade() -> None:
+    for index, _, _ in INDEXES:
+        op.drop_index(index, table_name="patient_summaries", schema="public")
+    op.drop_column("patient_summaries", "latest_titer_value", schema="public")
@@ -0,0 +1,193 @@
+import logging
+from datetime import date
+from typing import Optional
+
+import schemas
+from cache import etag_response
+from classification import TreatmentStatus, classify_titers, titer_value_sql
+from database import get_read_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from models import SyphilisCaseHistory
+from registry_stats import registry_statistics_entry
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+analytics_router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+# A 4-fold (two dilution) change in titer is the clinically significant threshold
+SIGNIFICANT_FOLD_CHANGE = 4
+# Trend status of a 4-fold fall from baseline. A response to treatment is not a
+# cure: "Curado" (TreatmentStatus.CURED) also labels titers still at 1:1 to 1:4
+SEROLOGICAL_RESPONSE = "Resposta Sorológica"
+
+
+def titer_trend_statement(patient_ids):
+    """
+    One window-function pass over the histories of patient_ids (a list or subquery):
+    each history with its numeric titer, fold change against the previous and the
+    baseline (first) titer, and the trend status, REINFECTION for a 4-fold rise over
+    the previous titer (non-reactive counting as 1:1) or SEROLOGICAL_RESPONSE for a
+    4-fold fall from baseline, NULL otherwise.
+    """
+    value = titer_value_sql(SyphilisCaseHistory.titer_result)
+    window = {
+        "partition_by": SyphilisCaseHistory.patient_id,
+        "order_by": [
+            SyphilisCaseHistory.diagnosis_date,
+            SyphilisCaseHistory.created_at,
+            SyphilisCaseHistory.id,
+        ],
+    }
+    series = (
+        select(
+            SyphilisCaseHistory.patient_id,
+            SyphilisCaseHistory.id.label("history_id"),
+            SyphilisCaseHistory.diagnosis_date,
+            SyphilisCaseHistory.created_at,
+            SyphilisCaseHistory.titer_result,
+            value.label("titer_value"),
+            func.lag(value).over(**window).label("previous_value"),
+            func.first_value(value).over(**window).label("baseline_value"),
+        )
+        .where(SyphilisCaseHistory.patient_id.in_(patient_ids))
+        .subquery()
+    )
+
+    previous_floor = case((series.c.previous_value < 1, 1.0), else_=series.c.previous_value)
+    trend_status = case(
+        (
+            and_(
+                series.c.previous_value.is_not(None),
+                series.c.titer_value >= SIGNIFICANT_FOLD_CHANGE * previous_floor,
+            ),
+            TreatmentStatus.REINFECTION.value,
+        ),
+        (
+            and_(
+                series.c.baseline_value > 0,
+                series.c.titer_value * SIGNIFICANT_FOLD_CHANGE <= series.c.baseline_value,
+            ),
+            SEROLOGICAL_RESPONSE,
+        ),
+        else_=None,
+    )
+    return (
+        select(
+            series.c.patient_id,
+            series.c.history_id,
+            series.c.diagnosis_date,
+            series.c.titer_result,
+            series.c.titer_value,
+            (series.c.titer_value / func.nullif(series.c.previous_value, 0)).label("fold_change_previous"),
+            (series.c.titer_value / func.nullif(series.c.baseline_value, 0)).label("fold_change_baseline"),
+            trend_status.label("trend_status"),
+        )
+        .order_by(
+            series.c.patient_id,
+            series.c.diagnosis_date,
+            series.c.created_at,
+            series.c.history_id,
+        )
+    )
+
+
+@analytics_router.get("/titer-trends", response_model=schemas.TiterTrendPage)
+def read_titer_trends(
+    patient_id: Optional[int] = None,
+    after_patient_id: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Titer series per patient, oldest first, with fold changes and treatment response.
+
+    A point's status is its trend status (REINFECTION/SEROLOGICAL_RESPONSE) when the fold change
+    is significant, otherwise the status of its own titer; the patient's status is
+    that of their latest point. Pages through the registry by patient id: pass
+    next_after_patient_id as after_patient_id for the next page.
+    """
+    try:
+        if patient_id is not None:
+            patient_ids = [patient_id]
+        else:
+            patient_ids = (
+                select(SyphilisCaseHistory.patient_id)
+                .where(SyphilisCaseHistory.patient_id > after_patient_id)
+                .group_by(SyphilisCaseHistory.patient_id)
+                .order_by(SyphilisCaseHistory.patient_id)
+                .limit(limit)
+            )
+        rows = db.execute(titer_trend_statement(patient_ids)).all()
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when computing titer trends: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when computing titer trends.",
+        )
+
+    titer_statuses = classify_titers([row.titer_result for row in rows])
+    items = []
+    for row, titer_status in zip(rows, titer_statuses):
+        if not items or items[-1]["patient_id"] != row.patient_id:
+            items.append({"patient_id": row.patient_id, "status": None, "series": []})
+        point_status = row.trend_status or (titer_status.value if titer_status else None)
+        items[-1]["series"].append({
+            "history_id": row.history_id,
+            "diagnosis_date": row.diagnosis_date,
+            "titer_result": row.titer_result,
+            "titer_value": row.titer_value,
+            "fold_change_previous": row.fold_change_previous,
+            "fold_change_baseline": row.fold_change_baseline,
+            "status": point_status,
+        })
+        items[-1]["status"] = point_status
+
+    next_after_patient_id = None
+    if patient_id is None and len(items) == limit:
+        next_after_patient_id = items[-1]["patient_id"]
+    return {"items": items, "next_after_patient_id": next_after_patient_id}
+
+
+def _statistics_response(request: Request, db: Session, since: Optional[date], until: Optional[date], refresh: bool):
+    if since is not None and until is not None and since > until:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must not be after until")
+    try:
+        return etag_response(request, registry_statistics_entry(db, since, until, refresh=refresh))
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when computing registry statistics: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when computing registry statistics.",
+        )
+
+
+@analytics_router.get("/statistics", response_model=schemas.RegistryStatistics)
+def read_registry_statistics(
+    request: Request,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+):
+    """
+    Registry-wide numbers for dashboards: patient status distribution and cure rate,
+    monthly incidence (optionally between since and until) and the titer histogram.
+    Computed with GROUP BY queries and served from a snapshot that is recomputed at
+    most every STATISTICS_MAX_AGE_SECONDS (see generated_at), with an ETag.
+    """
+    return _statistics_response(request, db, since, until, refresh=False)
+
+
+@analytics_router.post("/statistics/refresh", response_model=schemas.RegistryStatistics)
+def refresh_registry_statistics(
+    request: Request,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+):
+    """
+    Recompute the statistics snapshot for the range now and return it.
+    """
+    return _statistics_response(request, db, since, until, refresh=True)
@@ -0,0 +1,407 @@
+import logging
+from typing import List, Optional
+
+import schemas
+from api.routers.route import (
+    CASE_HISTORY_COLUMNS,
+    PatientFilters,
+    PatientOrder,
+    _batch_case_histories_statement,
+    _batch_patient_details_json,
+    _batch_patient_details_statement,
+    _case_histories_statement,
+    _case_history_records,
+    _decode_patient_page_cursor,
+    _insert_case_history,
+    _insert_patient,
+    _patient_detail_json,
+    _patient_detail_statement,
+    _patient_list_item,
+    _patient_order,
+    _patient_page_cursor,
+    _patient_page_position,
+    _update_case_history,
+    _update_patient,
+)
+from cache import cached_response_async, invalidate_patients, patient_histories_key, patient_key
+from changes import publish_patient_changes
+from database import get_async_db, get_async_read_db, is_foreign_key_violation
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from models import Patient, PatientSummary, SyphilisCaseHistory
+from pydantic_core import to_json
+from purge import delete_patients
+from search import SearchMode, mrn_search_filter, mrn_search_rank
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Async counterparts of the routers in route.py, served when DATABASE_ASYNC is enabled.
+# Writes and summary maintenance reuse the sync helpers through AsyncSession.run_sync.
+async_patient_router = APIRouter(prefix="/patients", tags=["patients"])
+async_case_history_router = APIRouter(prefix="/syphilis-case-history", tags=["syphilis case history"])
+
+
+def _patient_list_statement():
+    return (
+        select(
+            Patient.id,
+            Patient.medical_record_number,
+            PatientSummary.first_exam_date,
+            PatientSummary.last_exam_date,
+            PatientSummary.latest_titer,
+            PatientSummary.latest_titer_value,
+            PatientSummary.status,
+        )
+        .outerjoin(PatientSummary, Patient.id == PatientSummary.patient_id)
+    )
+
+
+# Patient endpoints
+@async_patient_router.post(
+    "/", response_model=schemas.Patient, status_code=status.HTTP_201_CREATED
+)
+async def create_patient(patient: schemas.PatientCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        db_patient = await db.run_sync(lambda session: _insert_patient(session, patient))
+        await db.commit()
+        await db.run_sync(lambda session: publish_patient_changes(session, db_patient["id"]))
+        return db_patient
+    except IntegrityError as e:
+        await db.rollback()
+        logger.error(f"Integrity error when creating patient: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Patient with medical record number {patient.medical_record_number} already exists",
+        )
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Database error when creating patient: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error occurred when creating patient. Error: {str(e)}",
+        )
+
+
+@async_patient_router.get("/", response_model=List[schemas.PatientListResponse])
+async def read_patients(
+    skip: int = 0,
+    limit: int = 100,
+    search: Optional[str] = None,
+    order_by: PatientOrder = "id",
+    filters: PatientFilters = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Get all patients with the status of their latest titer result, see route.read_patients.
+    """
+    try:
+        stmt = _patient_list_statement().where(*filters.conditions())
+        if search:
+            stmt = stmt.where(await db.run_sync(lambda session: mrn_search_filter(session, search)))
+
+        results = (await db.execute(stmt.order_by(*_patient_order(order_by)).offset(skip).limit(limit))).all()
+        return [_patient_list_item(result) for result in results]
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when retrieving patients: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when retrieving patients. Please try again later.",
+        )
+
+
+@async_patient_router.get("/page", response_model=schemas.PatientPage)
+async def read_patients_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    order_by: PatientOrder = "id",
+    search: Optional[str] = None,
+    filters: PatientFilters = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Keyset-paginated patient list, see route.read_patients_page.
+    """
+    try:
+        position = _decode_patient_page_cursor(cursor, order_by, filters)
+
+        stmt = _patient_list_statement().where(*filters.conditions())
+        if search:
+            stmt = stmt.where(await db.run_sync(lambda session: mrn_search_filter(session, search)))
+
+        if position is not None:
+            stmt = stmt.where(*_patient_page_position(order_by, position))
+        stmt = stmt.order_by(*_patient_order(order_by))
+
+        results = (await db.execute(stmt.limit(limit + 1))).all()
+
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            last = results[-1]
+            next_cursor = _patient_page_cursor(order_by, filters, last)
+
+        return {
+            "items": [_patient_list_item(result) for result in results],
+            "next_cursor": next_cursor,
+        }
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {str(e)}",
+        )
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when retrieving patients page: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when retrieving patients. Please try again later.",
+        )
+
+
+@async_patient_router.get("/search", response_model=List[schemas.PatientListResponse])
+async def search_patients(
+    q: str = Query(..., min_length=1, max_length=20),
+    mode: SearchMode = "substring",
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Search patients by medical record number, see route.search_patients.
+    """
+    try:
+        search_filter = await db.run_sync(lambda session: mrn_search_filter(session, q, mode, limit))
+        stmt = _patient_list_statement().where(search_filter).order_by(*mrn_search_rank(q)).limit(limit)
+        results = (await db.execute(stmt)).all()
+        return [_patient_list_item(result) for result in results]
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when searching patients: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when searching patients. Please try again later.",
+        )
+
+
+async def _read_patient_body(patient_id: int, db: AsyncSession) -> bytes:
+    patient_row = (await db.execute(_patient_detail_statement(patient_id))).first()
+    if patient_row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
+        )
+    history_rows = (await db.execute(_case_histories_statement(patient_id))).all()
+    return _patient_detail_json(patient_row, history_rows)
+
+
+@async_patient_router.post("/batch", response_model=List[schemas.PatientDetailResponse])
+async def read_patients_batch(batch: schemas.PatientBatchRequest, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Details of many patients, by id and/or medical record number, in two queries.
+    """
+    if not batch.ids and not batch.medical_record_numbers:
+        return Response(content=b"[]", media_type="application/json")
+    try:
+        patient_rows = (await db.execute(_batch_patient_details_statement(batch))).all()
+        history_rows = []
+        if patient_rows:
+            history_rows = (await db.execute(
+                _batch_case_histories_statement([row.id for row in patient_rows])
+            )).all()
+        return Response(
+            content=_batch_patient_details_json(batch, patient_rows, history_rows),
+            media_type="application/json",
+        )
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when retrieving patients in batch: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when retrieving patients. Please try again later.",
+        )
+
+
+@async_patient_router.get("/{patient_id}", response_model=schemas.PatientDetailResponse)
+async def read_patient(patient_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await cached_response_async(request, patient_key(patient_id), lambda: _read_patient_body(patient_id, db))
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when retrieving patient {patient_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when retrieving patient. Please try again later.",
+        )
+
+
+@async_patient_router.put("/{patient_id}", response_model=schemas.Patient)
+async def update_patient(
+    patient_id: int, patient_update: schemas.PatientUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        db_patient = await db.run_sync(lambda session: _update_patient(session, patient_id, patient_update))
+        await db.commit()
+        invalidate_patients(patient_id)
+        await db.run_sync(lambda session: publish_patient_changes(session, patient_id))
+        return db_patient
+    except IntegrityError as e:
+        await db.rollback()
+        logger.error(f"Integrity error when updating patient {patient_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Patient with medical record number {patient_update.medical_record_number} already exists",
+        )
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Database error when updating patient {patient_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when updating patient. Please try again later.",
+        )
+
+
+@async_patient_router.delete("/{patient_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_patient(patient_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Delete a patient and all their related case histories.
+    """
+    try:
+        # One DELETE: the database cascades it to the case histories, doses and summary
+        if not await db.run_sync(lambda session: delete_patients(session, [patient_id])):
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Patient not found"
+            )
+        await db.commit()
+        invalidate_patients(patient_id)
+        await db.run_sync(lambda session: publish_patient_changes(session, patient_id))
+        return None
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Database error when deleting patient {patient_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when deleting patient. Please try again later."
+        )
+
+
+# SyphilisCaseHistory endpoints
+@async_case_history_router.get("/{history_id}", response_model=schemas.SyphilisCaseHistory)
+async def get_syphilis_case_history(history_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Get a specific syphilis case history by its ID, calculating status from its titer.
+    """
+    try:
+        row = (await db.execute(
+            select(*CASE_HISTORY_COLUMNS).where(SyphilisCaseHistory.id == history_id)
+        )).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Syphilis case history not found"
+            )
+        return Response(content=to_json(_case_history_records([row])[0]), media_type="application/json")
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when retrieving case history: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when retrieving case history.",
+        )
+
+
+async def _patient_case_histories_body(patient_id: int, db: AsyncSession) -> bytes:
+    rows = (await db.execute(_case_histories_statement(patient_id))).all()
+    if not rows and await db.scalar(select(Patient.id).where(Patient.id == patient_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
+        )
+    return to_json(_case_history_records(rows))
+
+
+@async_case_history_router.get("/patient/{patient_id}", response_model=List[schemas.SyphilisCaseHistory])
+async def get_patient_case_histories(patient_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get all syphilis case histories for a specific patient, calculating status for each.
+    """
+    try:
+        return await cached_response_async(
+            request, patient_histories_key(patient_id), lambda: _patient_case_histories_body(patient_id, db)
+        )
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when retrieving case histories: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when retrieving case histories.",
+        )
+
+
+@async_case_history_router.post(
+    "/", response_model=schemas.SyphilisCaseHistory, status_code=status.HTTP_201_CREATED
+)
+async def create_case_history(
+    history: schemas.SyphilisCaseHistoryCreate, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create a new syphilis case history for a patient.
+    """
+    try:
+        row = await db.run_sync(lambda session: _insert_case_history(session, history))
+        await db.commit()
+        invalidate_patients(history.patient_id)
+        await db.run_sync(lambda session: publish_patient_changes(session, history.patient_id))
+        return Response(
+            content=to_json(_case_history_records([row])[0]),
+            media_type="application/json",
+            status_code=status.HTTP_201_CREATED,
+        )
+    except IntegrityError as e:
+        await db.rollback()
+        logger.error(f"Integrity error when creating case history: {str(e)}")
+        # The only foreign keys written reference the patient
+        if is_foreign_key_violation(e):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Case history conflicts with existing data.",
+        )
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Database error when creating case history: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when creating case history.",
+        )
+
+
+@async_case_history_router.put("/{history_id}", response_model=schemas.SyphilisCaseHistory)
+async def update_case_history(
+    history_id: int, history_update: schemas.SyphilisCaseHistoryUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Update an existing syphilis case history.
+    Allows partial updates.
+    """
+    try:
+        row, previous_patient_id = await db.run_sync(
+            lambda session: _update_case_history(session, history_id, history_update)
+        )
+        await db.commit()
+        invalidate_patients(previous_patient_id, row.patient_id)
+        await db.run_sync(lambda session: publish_patient_changes(session, previous_patient_id, row.patient_id))
+        return Response(content=to_json(_case_history_records([row])[0]), media_type="application/json")
+    except IntegrityError as e:
+        await db.rollback()
+        logger.error(f"Integrity error when updating case history {history_id}: {str(e)}")
+        if is_foreign_key_violation(e):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail=f"Patient with ID {history_update.patient_id} not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Case history conflicts with existing data.",
+        )
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Database error when updating case history: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when updating case history.",
+        )
@@ -0,0 +1,36 @@
+from typing import List, Optional
+
+from changes import change_feed
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+
+changes_router = APIRouter(prefix="/changes", tags=["changes"])
+
+MAX_WATCHED_PATIENTS = 1000
+
+
+@changes_router.get("/stream")
+async def stream_changes(
+    patient_id: Optional[List[int]] = Query(None, max_length=MAX_WATCHED_PATIENTS),
+    last_event_id: Optional[str] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Server-sent events announcing patient changes, instead of polling the patient
+    list and details. Each "change" event carries {patient_id, deleted, status,
+    last_exam_date} after a patient or one of their case histories was written;
+    a "resync" event means changes were missed and the client should refetch.
+    Pass patient_id (repeatable) to only watch those patients. EventSource resumes
+    with the Last-Event-ID header by itself; last_event_id does the same for the
+    first connection.
+    """
+    stream = change_feed.stream(
+        patient_ids=set(patient_id) if patient_id else None,
+        last_event_id=last_event_id_header or last_event_id,
+    )
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        # No caching, and no buffering by nginx-style proxies
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
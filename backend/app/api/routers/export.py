@@ -0,0 +1,169 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator, List, Literal
+
+from api.routers.route import CASE_HISTORY_COLUMNS, _case_history_records
+from database import read_sessionmaker
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from models import Patient, PatientSummary, SyphilisCaseHistory
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+export_router = APIRouter(prefix="/export", tags=["export"])
+
+EXPORT_BATCH_SIZE = 1000
+
+PATIENT_EXPORT_COLUMNS = [
+    "id",
+    "medical_record_number",
+    "diagnosis_date",
+    "first_exam_date",
+    "last_exam_date",
+    "latest_titer",
+    "status",
+]
+CASE_HISTORY_EXPORT_COLUMNS = [
+    "id",
+    "patient_id",
+    "diagnosis_date",
+    "titer_result",
+    "status",
+    "treatments",
+    "notes",
+    "created_at",
+    "updated_at",
+]
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_json_default)
+    return value
+
+
+def _stream_rows(
+    session_factory: Callable[[], Session], stmt, to_records: Callable, columns: List[str], fmt: str
+) -> Iterator[bytes]:
+    """
+    Run stmt on a server-side cursor and yield the encoded records batch by batch;
+    to_records turns one batch of rows into dicts.
+    The session is owned by the generator because it outlives the request handler.
+    """
+    db = session_factory()
+    try:
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for rows in result.partitions():
+                for record in to_records(rows):
+                    writer.writerow([_csv_cell(record[column]) for column in columns])
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+        else:
+            for rows in result.partitions():
+                yield "".join(
+                    json.dumps(record, default=_json_default) + "\n" for record in to_records(rows)
+                ).encode()
+    finally:
+        db.close()
+
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _export_response(chunks: Iterator[bytes], name: str, fmt: str, gzip: bool) -> StreamingResponse:
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    filename = f"{name}.{fmt}"
+    if gzip:
+        chunks = _gzip(chunks)
+        media_type = "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _patient_records(rows) -> List[dict]:
+    return [
+        {
+            "id": row.id,
+            "medical_record_number": row.medical_record_number,
+            "diagnosis_date": row.diagnosis_date,
+            "first_exam_date": row.first_exam_date,
+            "last_exam_date": row.last_exam_date,
+            "latest_titer": row.latest_titer,
+            "status": row.status,
+        }
+        for row in rows
+    ]
+
+
+@export_router.get("/patients")
+def export_patients(
+    request: Request,
+    output_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    gzip: bool = False,
+):
+    """
+    Stream every patient with their latest titer and status as CSV or NDJSON.
+    Memory use does not depend on the number of patients.
+    """
+    stmt = (
+        select(
+            Patient.id,
+            Patient.medical_record_number,
+            Patient.diagnosis_date,
+            PatientSummary.first_exam_date,
+            PatientSummary.last_exam_date,
+            PatientSummary.latest_titer,
+            PatientSummary.status,
+        )
+        .outerjoin(PatientSummary, Patient.id == PatientSummary.patient_id)
+        .order_by(Patient.id)
+    )
+    chunks = _stream_rows(read_sessionmaker(request), stmt, _patient_records, PATIENT_EXPORT_COLUMNS, output_format)
+    return _export_response(chunks, "patients", output_format, gzip)
+
+
+@export_router.get("/case-histories")
+def export_case_histories(
+    request: Request,
+    output_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    gzip: bool = False,
+):
+    """
+    Stream every syphilis case history, with the status of its titer, as CSV or NDJSON.
+    Memory use does not depend on the number of histories.
+    """
+    stmt = select(*CASE_HISTORY_COLUMNS).order_by(SyphilisCaseHistory.patient_id, SyphilisCaseHistory.id)
+    chunks = _stream_rows(
+        read_sessionmaker(request), stmt, _case_history_records, CASE_HISTORY_EXPORT_COLUMNS, output_format
+    )
+    return _export_response(chunks, "case_histories", output_format, gzip)
@@ -0,0 +1,341 @@
+import csv
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+import schemas
+from cache import invalidate_patients
+from changes import publish_patient_changes
+from database import dialect_insert, get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from models import Patient, PatientSummary, SyphilisCaseHistory
+from pydantic import ValidationError
+from search import mrn_index
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from summaries import refresh_patient_summaries
+from treatments import insert_treatment_doses
+
+logger = logging.getLogger(__name__)
+
+ingest_router = APIRouter(prefix="/syphilis-case-history", tags=["syphilis case history"])
+patient_import_router = APIRouter(prefix="/patients", tags=["patients"])
+
+INGEST_CHUNK_SIZE = 1000
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def _resolve_patients(db: Session, rows: List[Tuple[int, Any]]) -> Tuple[set, Dict[str, int]]:
+    """
+    Look up every patient referenced by a chunk in one query.
+    Returns the existing ids and a medical_record_number -> id map.
+    """
+    ids = set()
+    mrns = set()
+    for _, row in rows:
+        if not isinstance(row, dict):
+            continue
+        if row.get("patient_id") is not None:
+            try:
+                ids.add(int(row["patient_id"]))
+            except (TypeError, ValueError):
+                pass
+        elif row.get("medical_record_number") is not None:
+            mrns.add(str(row["medical_record_number"]))
+
+    conditions = []
+    if ids:
+        conditions.append(Patient.id.in_(ids))
+    if mrns:
+        conditions.append(Patient.medical_record_number.in_(mrns))
+    if not conditions:
+        return set(), {}
+
+    found = db.execute(
+        select(Patient.id, Patient.medical_record_number).where(or_(*conditions))
+    ).all()
+    return {row.id for row in found}, {row.medical_record_number: row.id for row in found}
+
+
+def ingest_chunk(db: Session, rows: List[Tuple[int, Any]], result: schemas.BulkIngestResult) -> None:
+    """
+    Validate and insert one chunk of (row number, payload) pairs with a single
+    multi-row INSERT (plus one for their treatment doses), then refresh the affected
+    patient summaries and commit.
+    Invalid rows are reported in result.errors and skipped.
+    """
+    existing_ids, ids_by_mrn = _resolve_patients(db, rows)
+
+    values = []
+    row_numbers = []
+    for row_number, row in rows:
+        if not isinstance(row, dict):
+            result.errors.append(schemas.BulkRowError(row=row_number, error="Row must be a JSON object"))
+            continue
+
+        patient_id = row.get("patient_id")
+        if patient_id is None and row.get("medical_record_number") is not None:
+            patient_id = ids_by_mrn.get(str(row["medical_record_number"]))
+            if patient_id is None:
+                result.errors.append(schemas.BulkRowError(
+                    row=row_number,
+                    error=f"Patient with medical record number {row['medical_record_number']} not found",
+                ))
+                continue
+        elif patient_id is None:
+            result.errors.append(schemas.BulkRowError(
+                row=row_number, error="Either patient_id or medical_record_number is required"
+            ))
+            continue
+
+        try:
+            history = schemas.SyphilisCaseHistoryCreate(**{**row, "patient_id": patient_id})
+        except ValidationError as e:
+            result.errors.append(schemas.BulkRowError(row=row_number, error=_validation_message(e)))
+            continue
+
+        if history.patient_id not in existing_ids:
+            result.errors.append(schemas.BulkRowError(
+                row=row_number, error=f"Patient with ID {history.patient_id} not found"
+            ))
+            continue
+
+        values.append({
+            "patient_id": history.patient_id,
+            "diagnosis_date": history.diagnosis_date,
+            "titer_result": history.titer_result,
+            "treatments": history.treatments,
+            "notes": history.notes,
+        })
+        row_numbers.append(row_number)
+
+    if not values:
+        return
+
+    try:
+        history_ids = db.scalars(
+            insert(SyphilisCaseHistory).returning(SyphilisCaseHistory.id, sort_by_parameter_order=True),
+            values,
+        ).all()
+        insert_treatment_doses(
+            db,
+            ((history_id, value["patient_id"], value["treatments"]) for history_id, value in zip(history_ids, values)),
+        )
+        patient_ids = {value["patient_id"] for value in values}
+        refresh_patient_summaries(db, patient_ids)
+        db.commit()
+        invalidate_patients(*patient_ids)
+        publish_patient_changes(db, *patient_ids)
+        result.inserted += len(values)
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Database error when ingesting case histories: {str(e)}")
+        result.errors.extend(
+            schemas.BulkRowError(row=row_number, error="Database error when inserting row")
+            for row_number in row_numbers
+        )
+
+
+async def _iter_lines(request: Request):
+    """
+    Yield the lines of the request body as they arrive, without buffering the whole body.
+    """
+    buffer = b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+def _content_type(request: Request) -> str:
+    return request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+
+def _json_array_body(body: bytes) -> list:
+    try:
+        rows = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid JSON body: {str(e)}"
+        )
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array"
+        )
+    return rows
+
+
+@ingest_router.post("/bulk", response_model=schemas.BulkIngestResult)
+async def bulk_create_case_histories(request: Request, db: Session = Depends(get_db)):
+    """
+    Ingest many case histories at once, e.g. a lab result feed.
+
+    The body is either a JSON array or NDJSON (Content-Type application/x-ndjson, one
+    object per line, read as a stream). Each object has the fields of a case history,
+    with the patient given by patient_id or medical_record_number. Rows are processed
+    in chunks: one patient lookup and one multi-row INSERT per chunk. Invalid rows are
+    reported per row (0-based) instead of failing the batch.
+    """
+    result = schemas.BulkIngestResult()
+
+    if _content_type(request) in NDJSON_CONTENT_TYPES:
+        chunk = []
+        row_number = 0
+        async for line in _iter_lines(request):
+            if not line.strip():
+                continue
+            try:
+                chunk.append((row_number, json.loads(line)))
+            except ValueError as e:
+                result.errors.append(schemas.BulkRowError(row=row_number, error=f"Invalid JSON: {str(e)}"))
+            row_number += 1
+            if len(chunk) >= INGEST_CHUNK_SIZE:
+                await run_in_threadpool(ingest_chunk, db, chunk, result)
+                chunk = []
+        if chunk:
+            await run_in_threadpool(ingest_chunk, db, chunk, result)
+        result.received = row_number
+    else:
+        rows = _json_array_body(await request.body())
+        result.received = len(rows)
+        for start in range(0, len(rows), INGEST_CHUNK_SIZE):
+            chunk = list(enumerate(rows[start:start + INGEST_CHUNK_SIZE], start=start))
+            await run_in_threadpool(ingest_chunk, db, chunk, result)
+
+    result.errors.sort(key=lambda error: error.row)
+    return result
+
+
+def upsert_patients_chunk(db: Session, rows: List[Tuple[int, Any]], result: schemas.PatientImportResult) -> None:
+    """
+    Validate one chunk of (row number, payload) pairs and upsert it with a single
+    INSERT ... ON CONFLICT (medical_record_number) DO UPDATE, then commit.
+    A missing diagnosis_date keeps the stored one.
+    """
+    mrn_max_length = Patient.medical_record_number.type.length
+    valid = {}
+    for row_number, row in rows:
+        if not isinstance(row, dict):
+            result.errors.append(schemas.BulkRowError(row=row_number, error="Row must be a JSON object"))
+            continue
+        try:
+            patient = schemas.PatientCreate(**row)
+        except ValidationError as e:
+            result.errors.append(schemas.BulkRowError(row=row_number, error=_validation_message(e)))
+            continue
+
+        mrn = patient.medical_record_number
+        if not mrn or len(mrn) > mrn_max_length:
+            result.errors.append(schemas.BulkRowError(
+                row=row_number,
+                error=f"medical_record_number must have between 1 and {mrn_max_length} characters",
+            ))
+            continue
+        # A row cannot be upserted twice by one statement, so the last occurrence wins
+        if mrn in valid:
+            result.errors.append(schemas.BulkRowError(
+                row=valid[mrn][0], error=f"Superseded by row {row_number} with the same medical record number"
+            ))
+        valid[mrn] = (row_number, patient)
+
+    if not valid:
+        return
+
+    try:
+        existing = set(db.scalars(
+            select(Patient.medical_record_number).where(Patient.medical_record_number.in_(valid))
+        ))
+
+        stmt = dialect_insert(db, Patient.__table__).values([
+            {"medical_record_number": mrn, "diagnosis_date": patient.diagnosis_date}
+            for mrn, (_, patient) in valid.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Patient.medical_record_number],
+            set_={
+                "diagnosis_date": func.coalesce(stmt.excluded.diagnosis_date, Patient.diagnosis_date),
+                "updated_at": func.now(),
+            },
+        ).returning(Patient.id)
+        patient_ids = db.scalars(stmt).all()
+
+        # New patients get their (empty) summary row, existing ones keep theirs
+        db.execute(
+            dialect_insert(db, PatientSummary.__table__).on_conflict_do_nothing(
+                index_elements=[PatientSummary.patient_id]
+            ),
+            [{"patient_id": patient_id} for patient_id in patient_ids],
+        )
+        db.commit()
+        # Core upserts bypass the flush hooks that maintain the fallback index
+        mrn_index.invalidate()
+        invalidate_patients(*patient_ids)
+        publish_patient_changes(db, *patient_ids)
+        result.updated += len(existing)
+        result.inserted += len(valid) - len(existing)
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Database error when importing patients: {str(e)}")
+        result.errors.extend(
+            schemas.BulkRowError(row=row_number, error="Database error when upserting row")
+            for row_number, _ in valid.values()
+        )
+
+
+@patient_import_router.post("/import", response_model=schemas.PatientImportResult)
+async def import_patients(request: Request, db: Session = Depends(get_db)):
+    """
+    Create or update patients in bulk, keyed on medical_record_number.
+
+    The body is a JSON array of patients, or CSV (Content-Type text/csv) with a header
+    row naming the medical_record_number and diagnosis_date columns. CSV is read as a
+    stream and, like JSON, upserted in fixed-size chunks; quoted fields must not span
+    lines. Returns inserted, updated and rejected counts with per-row (0-based) errors.
+    """
+    result = schemas.PatientImportResult()
+
+    if _content_type(request) in CSV_CONTENT_TYPES:
+        header = None
+        chunk = []
+        row_number = 0
+        async for line in _iter_lines(request):
+            text_line = line.decode("utf-8-sig").rstrip("\r")
+            if not text_line.strip():
+                continue
+            cells = [cell.strip() for cell in next(csv.reader([text_line]))]
+            if header is None:
+                header = cells
+                continue
+            chunk.append((row_number, {
+                column: cell or None for column, cell in zip(header, cells)
+            }))
+            row_number += 1
+            if len(chunk) >= INGEST_CHUNK_SIZE:
+                await run_in_threadpool(upsert_patients_chunk, db, chunk, result)
+                chunk = []
+        if chunk:
+            await run_in_threadpool(upsert_patients_chunk, db, chunk, result)
+        result.received = row_number
+    else:
+        rows = _json_array_body(await request.body())
+        result.received = len(rows)
+        for start in range(0, len(rows), INGEST_CHUNK_SIZE):
+            chunk = list(enumerate(rows[start:start + INGEST_CHUNK_SIZE], start=start))
+            await run_in_threadpool(upsert_patients_chunk, db, chunk, result)
+
+    result.errors.sort(key=lambda error: error.row)
+    result.rejected = len(result.errors)
+    return result
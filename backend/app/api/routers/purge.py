@@ -0,0 +1,41 @@
+import logging
+
+import schemas
+from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status
+from purge import purge_patients
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+purge_router = APIRouter(prefix="/patients", tags=["patients"])
+
+
+@purge_router.post("/purge", response_model=schemas.PatientPurgeResult)
+def purge(request: schemas.PatientPurgeRequest, db: Session = Depends(get_db)):
+    """
+    Delete the patients with the given ids and/or matching retention criteria
+    (diagnosed or last examined before a date, summary status), with their case
+    histories. Runs in chunks of chunk_size patients, each its own transaction, so
+    locks stay short; on a database error the chunks already committed stay
+    deleted. dry_run only counts the patients that would go.
+    """
+    try:
+        return purge_patients(
+            db,
+            ids=request.ids,
+            diagnosed_before=request.diagnosed_before,
+            last_exam_before=request.last_exam_before,
+            status=request.status,
+            dry_run=request.dry_run,
+            chunk_size=request.chunk_size,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when purging patients: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when purging patients. Please try again later.",
+        )
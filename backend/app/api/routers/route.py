@@ -1,73 +1,150 @@
 import logging
-from datetime import date, datetime
-from typing import List, Optional
+from datetime import date
+from typing import List, Literal, Optional
 
 import schemas
-from database import get_db
-from fastapi import APIRouter, Depends, HTTPException, status
-from models import Patient, SyphilisCaseHistory
-from sqlalchemy import Null, and_, case, desc, func, text
-from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from cache import cached_response, invalidate_patients, patient_histories_key, patient_key
+from changes import publish_patient_changes
+from classification import TreatmentStatus, classify_titers
+from database import get_db, get_read_db, is_foreign_key_violation
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from models import Patient, PatientSummary, SyphilisCaseHistory, TreatmentDose
+from pagination import decode_cursor, encode_cursor
+from pydantic_core import to_json
+from purge import delete_patients
+from search import SearchMode, index_patient, mrn_search_filter, mrn_search_rank
+from sqlalchemy import and_, delete, insert, or_, select, update
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy.orm import Session
+from summaries import (
+    lock_patient_summaries,
+    summary_history_added,
+    summary_history_changed,
+    summary_history_removed,
+)
+from treatments import insert_treatment_doses
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-import enum
+# Routers
+patient_router = APIRouter(prefix="/patients", tags=["patients"])
+case_history_router = APIRouter(prefix="/syphilis-case-history", tags=["syphilis case history"])
+
 
+PATIENT_COLUMNS = (Patient.id, Patient.medical_record_number, Patient.diagnosis_date)
+
+
+# Writes shared with async_route.py (through run_sync). INSERT/UPDATE ... RETURNING
+# hands back the written row, so nothing is loaded first or refreshed afterwards, and
+# instead of checking up front they let the unique MRN index and the patient_id
+# foreign key reject bad rows; the endpoints map the IntegrityError to 400/404.
+def _insert_patient(db: Session, patient: schemas.PatientCreate) -> dict:
+    row = db.execute(
+        insert(Patient)
+        .values(medical_record_number=patient.medical_record_number, diagnosis_date=patient.diagnosis_date)
+        .returning(*PATIENT_COLUMNS)
+    ).one()
+    db.execute(insert(PatientSummary).values(patient_id=row.id))
+    index_patient(db, row.id, row.medical_record_number)
+    return row._asdict()
+
+
+def _update_patient(db: Session, patient_id: int, patient_update: schemas.PatientUpdate) -> dict:
+    values = {
+        field: getattr(patient_update, field)
+        for field in ("medical_record_number", "diagnosis_date")
+        if getattr(patient_update, field) is not None
+    }
+    if values:
+        row = db.execute(
+            update(Patient)
+            .where(Patient.id == patient_id)
+            .values(**values)
+            .returning(*PATIENT_COLUMNS)
+            .execution_options(synchronize_session=False)
+        ).first()
+    else:
+        row = db.execute(select(*PATIENT_COLUMNS).where(Patient.id == patient_id)).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
+        )
+    index_patient(db, row.id, row.medical_record_number)
+    return row._asdict()
 
-class TreatmentStatus(enum.Enum):
-    ACTIVE_INFECTION = "Infecção Ativa"
-    UNDER_TREATMENT = "Em Tratamento" 
-    MONITORING_CURE = "Curado"
-    CURED = "Curado"
-    REINFECTION = "Reinfecção"
-    UNKNOWN = "Desconhecido"
 
-def syphilis_status_from_titer(current_titer):
+def _insert_case_history(db: Session, history: schemas.SyphilisCaseHistoryCreate):
     """
-    Returns treatment status based on current titer and optional previous titer.
-    current_titer: float or string (e.g., '1:32', '1:4', etc.)
-    previous_titer: float or string (optional) - previous measurement
-    Returns: TreatmentStatus enum member
+    Insert a case history with its doses and fold it into the patient summary.
+    Returns the CASE_HISTORY_COLUMNS row.
     """
-    # Convert current titer to numeric
-    try:
-        if isinstance(current_titer, str):
-            if ':' in current_titer:
-                try:
-                    current_val = float(current_titer.split(':')[1])
-                except Exception:
-                    return None
-            else:
-                try:
-                    current_val = float(current_titer)
-                except Exception:
-                    return None
-        else:
-            current_val = float(current_titer)
-    except Exception:
-        return None
-    
- 
-    
-    # Interpret based on current titer
-    if current_val >= 32:
-        return TreatmentStatus.ACTIVE_INFECTION
-    elif 8 <= current_val < 32:
-        return TreatmentStatus.UNDER_TREATMENT
-    elif 1 <= current_val < 8:
-        return TreatmentStatus.MONITORING_CURE
-    elif current_val < 1:
-        return TreatmentStatus.CURED
+    row = db.execute(
+        insert(SyphilisCaseHistory)
+        .values(
+            patient_id=history.patient_id,
+            diagnosis_date=history.diagnosis_date,
+            treatments=history.treatments,
+            notes=history.notes,
+            titer_result=history.titer_result,
+        )
+        .returning(*CASE_HISTORY_COLUMNS)
+    ).one()
+    insert_treatment_doses(db, [(row.id, row.patient_id, row.treatments)])
+    summary_history_added(db, row)
+    return row
+
+
+def _update_case_history(db: Session, history_id: int, history_update: schemas.SyphilisCaseHistoryUpdate):
+    """
+    Apply a partial update to a case history, its doses and the summaries of the
+    patients involved. Returns the updated CASE_HISTORY_COLUMNS row and the
+    previous patient id.
+    """
+    values = {
+        field: getattr(history_update, field)
+        for field in ("patient_id", "diagnosis_date", "titer_result", "treatments", "notes")
+        if getattr(history_update, field) is not None
+    }
+    previous = None
+    if values.keys() & {"patient_id", "diagnosis_date", "titer_result"}:
+        # The summaries need the values being replaced; the lock keeps them current
+        previous = db.execute(
+            select(SyphilisCaseHistory.patient_id, SyphilisCaseHistory.diagnosis_date, SyphilisCaseHistory.titer_result)
+            .where(SyphilisCaseHistory.id == history_id)
+            .with_for_update()
+        ).first()
+    if values:
+        row = db.execute(
+            update(SyphilisCaseHistory)
+            .where(SyphilisCaseHistory.id == history_id)
+            .values(**values)
+            .returning(*CASE_HISTORY_COLUMNS)
+            .execution_options(synchronize_session=False)
+        ).first()
     else:
-        return TreatmentStatus.UNKNOWN
+        row = db.execute(select(*CASE_HISTORY_COLUMNS).where(SyphilisCaseHistory.id == history_id)).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Case history not found"
+        )
 
-# Routers
-patient_router = APIRouter(prefix="/patients", tags=["patients"])
-case_history_router = APIRouter(prefix="/syphilis-case-history", tags=["syphilis case history"])
+    previous_patient_id = previous.patient_id if previous is not None else row.patient_id
+    if "treatments" in values or previous_patient_id != row.patient_id:
+        db.execute(delete(TreatmentDose).where(TreatmentDose.case_history_id == row.id))
+        insert_treatment_doses(db, [(row.id, row.patient_id, row.treatments)])
+
+    # Keep the patient summaries current, moving the history between them if needed
+    if previous_patient_id != row.patient_id:
+        lock_patient_summaries(db, previous_patient_id, row.patient_id)
+        summary_history_removed(db, previous_patient_id, row.id, previous.diagnosis_date)
+        summary_history_added(db, row, is_new=False)
+    elif previous is not None and (
+        previous.diagnosis_date != row.diagnosis_date or previous.titer_result != row.titer_result
+    ):
+        summary_history_changed(db, row, previous.diagnosis_date)
+    return row, previous_patient_id
 
 
 # Patient endpoints
@@ -76,33 +153,16 @@ case_history_router = APIRouter(prefix="/syphilis-case-history", tags=["syphilis
 )
 def create_patient(patient: schemas.PatientCreate, db: Session = Depends(get_db)):
     try:
-        # Check if patient with same MRN already exists
-        db_patient = (
-            db.query(Patient)
-            .filter(Patient.medical_record_number == patient.medical_record_number)
-            .first()
-        )
-        if db_patient:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Patient with medical record number {patient.medical_record_number} already exists",
-            )
-
-        # Create new patient (status will use model default)
-        db_patient = Patient(
-            medical_record_number=patient.medical_record_number,
-            diagnosis_date=patient.diagnosis_date,
-        )
-        db.add(db_patient)
+        db_patient = _insert_patient(db, patient)
         db.commit()
-        db.refresh(db_patient)
+        publish_patient_changes(db, db_patient["id"])
         return db_patient
     except IntegrityError as e:
         db.rollback()
         logger.error(f"Integrity error when creating patient: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Database integrity error when creating patient: {str(e)}",
+            detail=f"Patient with medical record number {patient.medical_record_number} already exists",
         )
     except SQLAlchemyError as e:
         db.rollback()
@@ -113,135 +173,425 @@ def create_patient(patient: schemas.PatientCreate, db: Session = Depends(get_db)
         )
 
 
+def _patient_list_query(db: Session):
+    """
+    Patients joined with their precomputed summary, the base of every list read.
+    """
+    return (
+        db.query(
+            Patient.id,
+            Patient.medical_record_number,
+            PatientSummary.first_exam_date,
+            PatientSummary.last_exam_date,
+            PatientSummary.latest_titer,
+            PatientSummary.latest_titer_value,
+            PatientSummary.status,
+        )
+        .outerjoin(PatientSummary, Patient.id == PatientSummary.patient_id)
+    )
+
+
+def _patient_list_item(result):
+    # Determine last_case_date based on status
+    last_case_date = None
+    if result.status != TreatmentStatus.CURED.value:
+        last_case_date = result.last_exam_date
+
+    return {
+        "id": result.id,
+        "medical_record_number": result.medical_record_number,
+        "first_exam_date": result.first_exam_date,
+        "last_exam_date": result.last_exam_date,
+        "last_case_date": last_case_date,
+        "status": result.status,
+        "latest_titer": result.latest_titer,
+    }
+
+
+PatientOrder = Literal["id", "last_exam_date", "latest_titer"]
+
+# Summary column of each descending patient order: most recent or highest first,
+# patients without one last, ties by descending id
+DESCENDING_ORDERS = {
+    "last_exam_date": PatientSummary.last_exam_date,
+    "latest_titer": PatientSummary.latest_titer_value,
+}
+
+
+class PatientFilters:
+    """
+    Cohort filters of the patient lists (query parameters). They compare the
+    stored summary columns, so the database applies them, through the status and
+    titer indexes of patient_summaries where it can.
+    """
+
+    def __init__(
+        self,
+        statuses: Optional[List[str]] = Query(
+            None, alias="status", description="Status of the latest titer; repeat for several"
+        ),
+        titer_min: Optional[float] = Query(None, ge=0, description="Lowest latest titer X of 1:X (0 is non-reactive)"),
+        titer_max: Optional[float] = Query(None, ge=0),
+        last_exam_from: Optional[date] = None,
+        last_exam_to: Optional[date] = None,
+    ):
+        self.statuses = statuses
+        self.titer_min = titer_min
+        self.titer_max = titer_max
+        self.last_exam_from = last_exam_from
+        self.last_exam_to = last_exam_to
+
+    def conditions(self) -> list:
+        conditions = []
+        if self.statuses:
+            conditions.append(PatientSummary.status.in_(self.statuses))
+        if self.titer_min is not None:
+            conditions.append(PatientSummary.latest_titer_value >= self.titer_min)
+        if self.titer_max is not None:
+            conditions.append(PatientSummary.latest_titer_value <= self.titer_max)
+        if self.last_exam_from is not None:
+            conditions.append(PatientSummary.last_exam_date >= self.last_exam_from)
+        if self.last_exam_to is not None:
+            conditions.append(PatientSummary.last_exam_date <= self.last_exam_to)
+        return conditions
+
+    def cursor_key(self) -> list:
+        # Stored in page cursors, so a cursor is not reused under other filters
+        return [
+            sorted(self.statuses) if self.statuses else None,
+            self.titer_min,
+            self.titer_max,
+            self.last_exam_from.isoformat() if self.last_exam_from else None,
+            self.last_exam_to.isoformat() if self.last_exam_to else None,
+        ]
+
+
+def _patient_order(order_by: PatientOrder) -> tuple:
+    if order_by == "id":
+        return (Patient.id,)
+    return (DESCENDING_ORDERS[order_by].desc().nulls_last(), Patient.id.desc())
+
+
+def _patient_page_position(order_by: PatientOrder, position: dict) -> list:
+    """
+    WHERE conditions selecting the patients after a page cursor position, in the
+    order_by order.
+    """
+    last_id = int(position["id"])
+    if order_by == "id":
+        return [Patient.id > last_id]
+    column = DESCENDING_ORDERS[order_by]
+    if position.get("d") is None:
+        return [column.is_(None), Patient.id < last_id]
+    value = date.fromisoformat(position["d"]) if order_by == "last_exam_date" else float(position["d"])
+    return [
+        or_(
+            column < value,
+            and_(column == value, Patient.id < last_id),
+            column.is_(None),
+        )
+    ]
+
+
+def _patient_page_cursor(order_by: PatientOrder, filters: PatientFilters, last) -> str:
+    value = last.latest_titer_value if order_by == "latest_titer" else last.last_exam_date
+    return encode_cursor({"o": order_by, "f": filters.cursor_key(), "id": last.id, "d": value})
+
+
+def _decode_patient_page_cursor(cursor: Optional[str], order_by: PatientOrder, filters: PatientFilters):
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None and position.get("o") != order_by:
+        raise ValueError("Cursor was issued for a different order_by")
+    if position is not None and position.get("f") != filters.cursor_key():
+        raise ValueError("Cursor was issued for different filters")
+    return position
+
+
 @patient_router.get("/", response_model=List[schemas.PatientListResponse])
 def read_patients(
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    order_by: PatientOrder = "id",
+    filters: PatientFilters = Depends(),
+    db: Session = Depends(get_read_db),
 ):
     """
-    Get all patients, calculating status from the latest titer result.
+    Get all patients with the status of their latest titer result, optionally only
+    a cohort (see PatientFilters) and sorted like GET /patients/page.
+    Prefer GET /patients/page for deep pages: offsets still walk the skipped rows.
     """
     try:
-        # Subquery to get the latest titer for each patient based on diagnosis_date/created_at
-        latest_titer_subquery = (
-            db.query(
-                SyphilisCaseHistory.patient_id,
-                SyphilisCaseHistory.titer_result,
-                func.row_number().over(
-                    partition_by=SyphilisCaseHistory.patient_id,
-                    order_by=[SyphilisCaseHistory.diagnosis_date.desc(), SyphilisCaseHistory.created_at.desc()]
-                ).label("rn")
-            )
-            .subquery()
-        )
+        query = _patient_list_query(db).filter(*filters.conditions())
 
-        # Main query joining Patient with aggregated history data and latest titer
-        query = (
-            db.query(
-                Patient.id,
-                Patient.medical_record_number,
-                func.min(SyphilisCaseHistory.diagnosis_date).label("first_exam_date"),
-                func.max(SyphilisCaseHistory.diagnosis_date).label("last_exam_date"),
-                # Use latest titer from subquery
-                latest_titer_subquery.c.titer_result.label("latest_titer") 
-            )
-            .outerjoin(SyphilisCaseHistory, Patient.id == SyphilisCaseHistory.patient_id)
-            # Join with the subquery to get only the latest titer (rn=1)
-            .outerjoin(latest_titer_subquery, 
-                       and_(Patient.id == latest_titer_subquery.c.patient_id, 
-                            latest_titer_subquery.c.rn == 1)
-                      )
-            .group_by(Patient.id, Patient.medical_record_number, latest_titer_subquery.c.titer_result)
+        if search:
+            # Index-backed MRN substring search
+            query = query.filter(mrn_search_filter(db, search))
+
+        results = query.order_by(*_patient_order(order_by)).offset(skip).limit(limit).all()
+
+        return [_patient_list_item(result) for result in results]
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when retrieving patients: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when retrieving patients. Please try again later.",
         )
 
+
+@patient_router.get("/page", response_model=schemas.PatientPage)
+def read_patients_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    order_by: PatientOrder = "id",
+    search: Optional[str] = None,
+    filters: PatientFilters = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Keyset-paginated patient list. Pass the returned next_cursor to get the following page;
+    it is null on the last page. order_by=id pages by ascending patient id,
+    order_by=last_exam_date by most recent exam first and order_by=latest_titer by
+    highest latest titer first (patients without one last in both). The cohort
+    filters (status, titer_min/titer_max, last_exam_from/last_exam_to) are applied
+    in the query, so every page is full; a cursor only continues the same filters.
+    """
+    try:
+        position = _decode_patient_page_cursor(cursor, order_by, filters)
+
+        query = _patient_list_query(db).filter(*filters.conditions())
+
         if search:
-            # Apply search filter on the main query
-            query = query.filter(Patient.medical_record_number.ilike(f"%{search}%"))
-
-        results = query.offset(skip).limit(limit).all()
-
-        # Process results and calculate status and last_case_date
-        response_data = []
-        for result in results:
-            calculated_status = syphilis_status_from_titer(result.latest_titer)
-            last_exam_date = result.last_exam_date
-
-            # Determine last_case_date based on status
-            last_case_date = None
-            if calculated_status != TreatmentStatus.CURED:
-                last_case_date = last_exam_date
-
-            response_data.append({
-                "id": result.id,
-                "medical_record_number": result.medical_record_number,
-                "first_exam_date": result.first_exam_date,
-                "last_exam_date": last_exam_date,
-                "last_case_date": last_case_date, # Use determined value
-                "status": calculated_status,
-                "latest_titer": result.latest_titer,
-            })
-
-        return response_data
+            query = query.filter(mrn_search_filter(db, search))
+
+        if position is not None:
+            query = query.filter(*_patient_page_position(order_by, position))
+        query = query.order_by(*_patient_order(order_by))
+
+        # Fetch one extra row to know whether another page exists
+        results = query.limit(limit + 1).all()
+
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            last = results[-1]
+            next_cursor = _patient_page_cursor(order_by, filters, last)
+
+        return {
+            "items": [_patient_list_item(result) for result in results],
+            "next_cursor": next_cursor,
+        }
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {str(e)}",
+        )
     except SQLAlchemyError as e:
-        logger.error(f"Database error when retrieving patients: {str(e)}")
+        logger.error(f"Database error when retrieving patients page: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Database error occurred when retrieving patients. Please try again later.",
         )
 
 
-@patient_router.get("/{patient_id}", response_model=schemas.PatientDetailResponse)
-def read_patient(patient_id: int, db: Session = Depends(get_db)):
+@patient_router.get("/search", response_model=List[schemas.PatientListResponse])
+def search_patients(
+    q: str = Query(..., min_length=1, max_length=20),
+    mode: SearchMode = "substring",
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Search patients by medical record number (case-insensitive prefix or substring match).
+    Results are ranked: exact match, then prefix matches, then the shortest MRNs.
+    """
     try:
-        # Query patient and eagerly load case_histories relationship
-        db_patient = (
-            db.query(Patient)
-            .options(joinedload(Patient.case_histories))
-            .filter(Patient.id == patient_id)
-            .first()
+        results = (
+            _patient_list_query(db)
+            .filter(mrn_search_filter(db, q, mode, limit))
+            .order_by(*mrn_search_rank(q))
+            .limit(limit)
+            .all()
+        )
+        return [_patient_list_item(result) for result in results]
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when searching patients: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when searching patients. Please try again later.",
         )
 
-        if db_patient is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
-            )
 
-        # Find the latest history entry based on date
-        latest_history = None
-        if db_patient.case_histories:
-            latest_history = max(
-                db_patient.case_histories, 
-                key=lambda h: (h.diagnosis_date or date.min, h.created_at or datetime.min)
-            )
+CASE_HISTORY_COLUMNS = (
+    SyphilisCaseHistory.id,
+    SyphilisCaseHistory.patient_id,
+    SyphilisCaseHistory.diagnosis_date,
+    SyphilisCaseHistory.titer_result,
+    SyphilisCaseHistory.treatments,
+    SyphilisCaseHistory.notes,
+    SyphilisCaseHistory.created_at,
+    SyphilisCaseHistory.updated_at,
+)
+
+
+# Newest first; the reverse of ix_syphilis_case_histories_patient_id_diagnosis_date
+CASE_HISTORY_ORDER = (
+    SyphilisCaseHistory.diagnosis_date.desc(),
+    SyphilisCaseHistory.created_at.desc(),
+    SyphilisCaseHistory.id.desc(),
+)
+
+def _case_histories_statement(patient_id: int):
+    """
+    Case history rows of a patient, newest first.
+    """
+    return (
+        select(*CASE_HISTORY_COLUMNS)
+        .where(SyphilisCaseHistory.patient_id == patient_id)
+        .order_by(*CASE_HISTORY_ORDER)
+    )
+
+
+def _batch_case_histories_statement(patient_ids):
+    """
+    Case history rows of several patients in one IN query, grouped by patient and
+    newest first within each.
+    """
+    return (
+        select(*CASE_HISTORY_COLUMNS)
+        .where(SyphilisCaseHistory.patient_id.in_(patient_ids))
+        .order_by(SyphilisCaseHistory.patient_id, *CASE_HISTORY_ORDER)
+    )
 
-        # Calculate overall patient status from the latest titer
-        latest_titer = latest_history.titer_result if latest_history else None
-        patient_status = syphilis_status_from_titer(latest_titer)
-
-        # Manually construct the response including calculated statuses
-        response = {
-            "id": db_patient.id,
-            "medical_record_number": db_patient.medical_record_number,
-            "diagnosis_date": db_patient.diagnosis_date,
-            "status": patient_status, # Use calculated status for the patient
-            "syphilis_case_history": []
+
+def _patient_details_statement():
+    return (
+        select(Patient.id, Patient.medical_record_number, Patient.diagnosis_date, PatientSummary.status)
+        .outerjoin(PatientSummary, Patient.id == PatientSummary.patient_id)
+    )
+
+
+def _patient_detail_statement(patient_id: int):
+    return _patient_details_statement().where(Patient.id == patient_id)
+
+
+def _batch_patient_details_statement(batch: schemas.PatientBatchRequest):
+    conditions = []
+    if batch.ids:
+        conditions.append(Patient.id.in_(batch.ids))
+    if batch.medical_record_numbers:
+        conditions.append(Patient.medical_record_number.in_(batch.medical_record_numbers))
+    return _patient_details_statement().where(or_(*conditions))
+
+
+def _case_history_records(rows) -> List[dict]:
+    """
+    Case history rows as response records (schemas.SyphilisCaseHistory fields, in
+    order) with the status of their titers. Rows come straight from the table, so
+    they are serialized as they are instead of being validated into models again.
+    """
+    statuses = classify_titers([row.titer_result for row in rows])
+    return [
+        {
+            "patient_id": row.patient_id,
+            "diagnosis_date": row.diagnosis_date,
+            "titer_result": row.titer_result,
+            "treatments": row.treatments,
+            "notes": row.notes,
+            "id": row.id,
+            "status": calculated_status.value if calculated_status else None,
+            "created_at": row.created_at,
+            "updated_at": row.updated_at,
         }
+        for row, calculated_status in zip(rows, statuses)
+    ]
+
+
+def _patient_detail_record(patient_row, history_records: List[dict]) -> dict:
+    # Overall patient status comes from the maintained summary of the latest titer
+    return {
+        "medical_record_number": patient_row.medical_record_number,
+        "diagnosis_date": patient_row.diagnosis_date,
+        "id": patient_row.id,
+        "status": patient_row.status,
+        "case_histories": history_records,
+    }
 
-        # Process each history entry to add calculated status
-        for history in db_patient.case_histories:
-            history_status = syphilis_status_from_titer(history.titer_result)
-            # Convert history object to dict and add calculated status
-            # This assumes SyphilisCaseHistory schema matches the model attributes
-            history_dict = schemas.SyphilisCaseHistory.from_orm(history).dict()
-            history_dict['status'] = history_status
-            response["syphilis_case_history"].append(history_dict)
-            
-        # Sort histories by date descending for consistency
-        response["syphilis_case_history"].sort(key=lambda x: (x['diagnosis_date'] or date.min, x['created_at'] or datetime.min), reverse=True)
-
-        return response
+
+def _patient_detail_json(patient_row, history_rows) -> bytes:
+    return to_json(_patient_detail_record(patient_row, _case_history_records(history_rows)))
+
+
+def _batch_patient_details_json(batch: schemas.PatientBatchRequest, patient_rows, history_rows) -> bytes:
+    """
+    Details of the requested patients in request order (ids, then MRNs), each
+    patient once; ids and MRNs that match no patient are left out. The statuses
+    of all histories are computed in one pass.
+    """
+    histories_by_patient = {}
+    for record in _case_history_records(history_rows):
+        histories_by_patient.setdefault(record["patient_id"], []).append(record)
+
+    by_id = {row.id: row for row in patient_rows}
+    by_mrn = {row.medical_record_number: row for row in patient_rows}
+    ordered = [by_id.get(patient_id) for patient_id in batch.ids]
+    ordered += [by_mrn.get(mrn) for mrn in batch.medical_record_numbers]
+
+    seen = set()
+    details = []
+    for row in ordered:
+        if row is None or row.id in seen:
+            continue
+        seen.add(row.id)
+        details.append(_patient_detail_record(row, histories_by_patient.get(row.id, [])))
+    return to_json(details)
+
+
+def _read_patient_body(patient_id: int, db: Session) -> bytes:
+    patient_row = db.execute(_patient_detail_statement(patient_id)).first()
+    if patient_row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
+        )
+    return _patient_detail_json(patient_row, db.execute(_case_histories_statement(patient_id)).all())
+
+
+@patient_router.post("/batch", response_model=List[schemas.PatientDetailResponse])
+def read_patients_batch(batch: schemas.PatientBatchRequest, db: Session = Depends(get_read_db)):
+    """
+    Details of many patients, by id and/or medical record number, in the shape of
+    GET /patients/{patient_id}: two queries in total, whatever the number of patients.
+    """
+    if not batch.ids and not batch.medical_record_numbers:
+        return Response(content=b"[]", media_type="application/json")
+    try:
+        patient_rows = db.execute(_batch_patient_details_statement(batch)).all()
+        history_rows = []
+        if patient_rows:
+            history_rows = db.execute(
+                _batch_case_histories_statement([row.id for row in patient_rows])
+            ).all()
+        return Response(
+            content=_batch_patient_details_json(batch, patient_rows, history_rows),
+            media_type="application/json",
+        )
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when retrieving patients in batch: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when retrieving patients. Please try again later.",
+        )
+
+
+@patient_router.get("/{patient_id}", response_model=schemas.PatientDetailResponse)
+def read_patient(patient_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Patient with their case histories, newest first. Served from the response cache
+    with an ETag; the case history and patient writes below invalidate it. Misses
+    read the primary: a lagging replica would put pre-write data back in the cache.
+    """
+    try:
+        return cached_response(request, patient_key(patient_id), lambda: _read_patient_body(patient_id, db))
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -260,42 +610,17 @@ def update_patient(
     patient_id: int, patient_update: schemas.PatientUpdate, db: Session = Depends(get_db)
 ):
     try:
-        db_patient = db.query(Patient).filter(Patient.id == patient_id).first()
-        if db_patient is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
-            )
-
-        # Check if updating to a MRN that already exists for another patient
-        if patient_update.medical_record_number is not None and patient_update.medical_record_number != db_patient.medical_record_number:
-            existing_patient = (
-                db.query(Patient)
-                .filter(
-                    Patient.medical_record_number == patient_update.medical_record_number,
-                    Patient.id != patient_id,
-                )
-                .first()
-            )
-            if existing_patient:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Patient with medical record number {patient_update.medical_record_number} already exists",
-                )
-            db_patient.medical_record_number = patient_update.medical_record_number
-
-        # Update patient attributes only if they are provided
-        if patient_update.diagnosis_date is not None:
-            db_patient.diagnosis_date = patient_update.diagnosis_date
-
+        db_patient = _update_patient(db, patient_id, patient_update)
         db.commit()
-        db.refresh(db_patient)
+        invalidate_patients(patient_id)
+        publish_patient_changes(db, patient_id)
         return db_patient
     except IntegrityError as e:
         db.rollback()
         logger.error(f"Integrity error when updating patient {patient_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Database integrity error when updating patient",
+            detail=f"Patient with medical record number {patient_update.medical_record_number} already exists",
         )
     except SQLAlchemyError as e:
         db.rollback()
@@ -312,17 +637,16 @@ def delete_patient(patient_id: int, db: Session = Depends(get_db)):
     Delete a patient and all their related case histories.
     """
     try:
-        # First check if patient exists
-        db_patient = db.query(Patient).filter(Patient.id == patient_id).first()
-        if db_patient is None:
+        # One DELETE: the database cascades it to the case histories, doses and summary
+        if not delete_patients(db, [patient_id]):
+            db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Patient not found"
             )
-
-        # Delete the patient (cascade delete will handle related records)
-        db.delete(db_patient)
         db.commit()
+        invalidate_patients(patient_id)
+        publish_patient_changes(db, patient_id)
         
         return None  # 204 No Content response
         
@@ -337,31 +661,22 @@ def delete_patient(patient_id: int, db: Session = Depends(get_db)):
 
 # SyphilisCaseHistory endpoints
 @case_history_router.get("/{history_id}", response_model=schemas.SyphilisCaseHistory)
-def get_syphilis_case_history(history_id: int, db: Session = Depends(get_db)):
+def get_syphilis_case_history(history_id: int, db: Session = Depends(get_read_db)):
     """
     Get a specific syphilis case history by its ID, calculating status from its titer.
     """
     try:
-        # Get case history by ID
-        db_history = (
-            db.query(SyphilisCaseHistory)
-            .filter(SyphilisCaseHistory.id == history_id)
-            .first()
-        )
+        row = db.execute(
+            select(*CASE_HISTORY_COLUMNS).where(SyphilisCaseHistory.id == history_id)
+        ).first()
 
-        if db_history is None:
+        if row is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Syphilis case history not found"
             )
 
-        # Calculate status based on this history's titer
-        calculated_status = syphilis_status_from_titer(db_history.titer_result)
-
-        # Manually construct response
-        response = schemas.SyphilisCaseHistory.from_orm(db_history).dict()
-        response['status'] = calculated_status
-
-        return response
+        # Serialized once here; FastAPI passes a Response through untouched
+        return Response(content=to_json(_case_history_records([row])[0]), media_type="application/json")
 
     except SQLAlchemyError as e:
         logger.error(f"Database error when retrieving case history: {str(e)}")
@@ -371,38 +686,27 @@ def get_syphilis_case_history(history_id: int, db: Session = Depends(get_db)):
         )
 
 
+def _patient_case_histories_body(patient_id: int, db: Session) -> bytes:
+    rows = db.execute(_case_histories_statement(patient_id)).all()
+    # Only a patient without histories needs the extra existence check
+    if not rows and db.scalar(select(Patient.id).where(Patient.id == patient_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
+        )
+    return to_json(_case_history_records(rows))
+
+
 @case_history_router.get("/patient/{patient_id}", response_model=List[schemas.SyphilisCaseHistory])
-def get_patient_case_histories(patient_id: int, db: Session = Depends(get_db)):
+def get_patient_case_histories(patient_id: int, request: Request, db: Session = Depends(get_db)):
     """
     Get all syphilis case histories for a specific patient, calculating status for each.
+    Served from the response cache with an ETag, like read_patient.
     """
     try:
-        # Verify patient exists
-        db_patient = db.query(Patient).filter(Patient.id == patient_id).first()
-        if not db_patient:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
-            )
-
-        # Get all case histories for this patient
-        histories = (
-            db.query(SyphilisCaseHistory)
-            .filter(SyphilisCaseHistory.patient_id == patient_id)
-            # Order by date descending
-            .order_by(SyphilisCaseHistory.diagnosis_date.desc(), SyphilisCaseHistory.created_at.desc())
-            .all()
+        return cached_response(
+            request, patient_histories_key(patient_id), lambda: _patient_case_histories_body(patient_id, db)
         )
 
-        # Process results and calculate status for each
-        response_data = []
-        for history in histories:
-            calculated_status = syphilis_status_from_titer(history.titer_result)
-            history_dict = schemas.SyphilisCaseHistory.from_orm(history).dict()
-            history_dict['status'] = calculated_status
-            response_data.append(history_dict)
-
-        return response_data
-
     except SQLAlchemyError as e:
         logger.error(f"Database error when retrieving case histories: {str(e)}")
         raise HTTPException(
@@ -421,28 +725,27 @@ def create_case_history(
     Create a new syphilis case history for a patient.
     """
     try:
-        # Verify patient exists
-        db_patient = db.query(Patient).filter(Patient.id == history.patient_id).first()
-        if not db_patient:
+        row = _insert_case_history(db, history)
+        db.commit()
+        invalidate_patients(history.patient_id)
+        publish_patient_changes(db, history.patient_id)
+        return Response(
+            content=to_json(_case_history_records([row])[0]),
+            media_type="application/json",
+            status_code=status.HTTP_201_CREATED,
+        )
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Integrity error when creating case history: {str(e)}")
+        # The only foreign keys written reference the patient
+        if is_foreign_key_violation(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
             )
-            
-        # Create new history record (status will use model default)
-        db_history = SyphilisCaseHistory(
-            patient_id=history.patient_id,
-            diagnosis_date=history.diagnosis_date,
-            treatments=history.treatments,
-            notes=history.notes,
-            titer_result=history.titer_result,
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Case history conflicts with existing data.",
         )
-        
-        db.add(db_history)
-        db.commit()
-        db.refresh(db_history)
-        
-        return db_history
-        
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Database error when creating case history: {str(e)}")
@@ -461,36 +764,22 @@ def update_case_history(
     Allows partial updates.
     """
     try:
-        db_history = db.query(SyphilisCaseHistory).filter(SyphilisCaseHistory.id == history_id).first()
-        if not db_history:
+        row, previous_patient_id = _update_case_history(db, history_id, history_update)
+        db.commit()
+        invalidate_patients(previous_patient_id, row.patient_id)
+        publish_patient_changes(db, previous_patient_id, row.patient_id)
+        return Response(content=to_json(_case_history_records([row])[0]), media_type="application/json")
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Integrity error when updating case history {history_id}: {str(e)}")
+        if is_foreign_key_violation(e):
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Case history not found"
+                status_code=status.HTTP_404_NOT_FOUND, detail=f"Patient with ID {history_update.patient_id} not found"
             )
-            
-        # Update fields only if they are provided in the request
-        if history_update.patient_id is not None:
-            # Verify the new patient_id exists if it's being changed
-            if history_update.patient_id != db_history.patient_id:
-                 db_patient = db.query(Patient).filter(Patient.id == history_update.patient_id).first()
-                 if not db_patient:
-                     raise HTTPException(
-                         status_code=status.HTTP_404_NOT_FOUND, detail=f"Patient with ID {history_update.patient_id} not found"
-                     )
-            db_history.patient_id = history_update.patient_id
-        if history_update.diagnosis_date is not None:
-            db_history.diagnosis_date = history_update.diagnosis_date
-        if history_update.titer_result is not None:
-            db_history.titer_result = history_update.titer_result
-        if history_update.treatments is not None:
-            db_history.treatments = history_update.treatments
-        if history_update.notes is not None:
-            db_history.notes = history_update.notes
-        
-        db.commit()
-        db.refresh(db_history)
-        
-        return db_history
-        
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Case history conflicts with existing data.",
+        )
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Database error when updating case history: {str(e)}")
@@ -0,0 +1,95 @@
+import logging
+from datetime import datetime
+from typing import Optional
+
+import schemas
+from api.routers.route import CASE_HISTORY_COLUMNS, _case_history_records
+from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from models import Patient, SyphilisCaseHistory
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sync import SYNC_TOMBSTONE_RETENTION_DAYS, SyncTokenExpired, sync_page
+
+logger = logging.getLogger(__name__)
+
+# Delta sync reads the primary: a lagging replica could still miss rows older
+# than the window a sync closes, and those would never be sent
+sync_router = APIRouter(prefix="/sync", tags=["sync"])
+
+PATIENT_SYNC_COLUMNS = (
+    Patient.id,
+    Patient.medical_record_number,
+    Patient.diagnosis_date,
+    Patient.created_at,
+    Patient.updated_at,
+)
+
+
+def _sync_page(db: Session, model, statement, token, updated_since, limit) -> dict:
+    if token and updated_since:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Pass either token or updated_since, not both"
+        )
+    try:
+        return sync_page(db, model, statement, token=token, updated_since=updated_since, limit=limit)
+    except SyncTokenExpired:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Sync token is older than {SYNC_TOMBSTONE_RETENTION_DAYS} days; start a full sync without one",
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sync token: {str(e)}",
+        )
+
+
+@sync_router.get("/patients", response_model=schemas.PatientSyncPage)
+def sync_patients(
+    token: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    """
+    Patients created or updated since the sync token (or updated_since), and the
+    ids of the patients deleted since then. Without either it is a full sync.
+    Keep requesting with next_token while has_more is true; the last next_token
+    starts the following sync.
+    """
+    try:
+        page = _sync_page(db, Patient, select(*PATIENT_SYNC_COLUMNS), token, updated_since, limit)
+        page["items"] = [row._asdict() for row in page["items"]]
+        return Response(content=to_json(page), media_type="application/json")
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when syncing patients: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when syncing patients.",
+        )
+
+
+@sync_router.get("/case-histories", response_model=schemas.CaseHistorySyncPage)
+def sync_case_histories(
+    token: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    """
+    Case histories created or updated since the sync token (or updated_since),
+    with their status, and the ids of those deleted since then, like /sync/patients.
+    """
+    try:
+        page = _sync_page(db, SyphilisCaseHistory, select(*CASE_HISTORY_COLUMNS), token, updated_since, limit)
+        page["items"] = _case_history_records(page["items"])
+        return Response(content=to_json(page), media_type="application/json")
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when syncing case histories: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when syncing case histories.",
+        )
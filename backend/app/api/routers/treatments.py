@@ -0,0 +1,120 @@
+import logging
+from datetime import date, timedelta
+from typing import List, Optional
+
+import schemas
+from database import get_read_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from models import Patient, TreatmentDose
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from treatments import MedicationMatch, dose_filters
+
+logger = logging.getLogger(__name__)
+
+treatments_router = APIRouter(prefix="/treatments", tags=["treatments"])
+
+
+def _since(since: Optional[date], within_days: Optional[int]) -> Optional[date]:
+    if within_days is None:
+        return since
+    window_start = date.today() - timedelta(days=within_days)
+    return max(since, window_start) if since is not None else window_start
+
+
+@treatments_router.get("/doses", response_model=schemas.TreatmentDosePage)
+def read_treatment_doses(
+    medication: Optional[str] = None,
+    match: MedicationMatch = "exact",
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    within_days: Optional[int] = Query(None, ge=0),
+    patient_id: Optional[int] = None,
+    after_id: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Treatment doses matching a medication (case-insensitive, exact or prefix) and a
+    dose date range; within_days=90 means "in the last 90 days". Pages by dose id:
+    pass next_after_id as after_id for the next page.
+    """
+    try:
+        conditions = dose_filters(medication, match, _since(since, within_days), until, patient_id)
+        rows = db.execute(
+            select(
+                TreatmentDose.id,
+                TreatmentDose.case_history_id,
+                TreatmentDose.patient_id,
+                TreatmentDose.medication,
+                TreatmentDose.dose_number,
+                TreatmentDose.dose_date,
+            )
+            .where(TreatmentDose.id > after_id, *conditions)
+            .order_by(TreatmentDose.id)
+            .limit(limit)
+        ).all()
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when querying treatment doses: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when querying treatments.",
+        )
+
+    return {
+        "items": [row._mapping for row in rows],
+        "next_after_id": rows[-1].id if len(rows) == limit else None,
+    }
+
+
+@treatments_router.get("/patients", response_model=List[schemas.TreatedPatient])
+def read_treated_patients(
+    medication: Optional[str] = None,
+    match: MedicationMatch = "exact",
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    within_days: Optional[int] = Query(None, ge=0),
+    after_patient_id: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Patients who received a medication in a date range, e.g.
+    ?medication=benzathine penicillin&within_days=90, with their matching dose
+    count and first/last dose dates. Pages by patient id through after_patient_id.
+    """
+    try:
+        conditions = dose_filters(medication, match, _since(since, within_days), until)
+        doses = (
+            select(
+                TreatmentDose.patient_id,
+                func.count().label("doses"),
+                func.min(TreatmentDose.dose_date).label("first_dose_date"),
+                func.max(TreatmentDose.dose_date).label("last_dose_date"),
+            )
+            .where(TreatmentDose.patient_id > after_patient_id, *conditions)
+            .group_by(TreatmentDose.patient_id)
+            .order_by(TreatmentDose.patient_id)
+            .limit(limit)
+            .subquery()
+        )
+        rows = db.execute(
+            select(
+                doses.c.patient_id,
+                Patient.medical_record_number,
+                doses.c.doses,
+                doses.c.first_dose_date,
+                doses.c.last_dose_date,
+            )
+            .join(Patient, Patient.id == doses.c.patient_id)
+            .order_by(doses.c.patient_id)
+        ).all()
+    except SQLAlchemyError as e:
+        logger.error(f"Database error when querying treated patients: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred when querying treatments.",
+        )
+
+    return [row._mapping for row in rows]
@@ -0,0 +1,85 @@
+"""
+Cold-start profile of the application module.
+
+Imports main in fresh interpreters under -X importtime, reports the median
+cumulative import time and the slowest modules, and exits non-zero when the
+median exceeds the cold-start budget (use it as a regression gate in CI).
+
+    python -m benchmarks.bench_import --runs 5 --budget-ms 1200
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous enough for slow CI machines; the lazy startup path measures about 800ms locally
+DEFAULT_BUDGET_MS = 1200
+
+
+def profile_import(module: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Import module in a fresh interpreter. Returns its cumulative import time and
+    the self time of every module imported along the way, in milliseconds.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{completed.stderr}")
+
+    total = None
+    self_times: Dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        name = name.strip()
+        self_times[name] = self_times.get(name, 0) + int(self_us) / 1000
+        if name == module:
+            total = int(cumulative_us) / 1000
+    if total is None:
+        raise SystemExit(f"no import time reported for {module}")
+    return total, self_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("COLD_START_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    args = parser.parse_args()
+
+    totals: List[float] = []
+    self_times: Dict[str, List[float]] = {}
+    for _ in range(args.runs):
+        total, run_self_times = profile_import(args.module)
+        totals.append(total)
+        for name, elapsed in run_self_times.items():
+            self_times.setdefault(name, []).append(elapsed)
+
+    median = statistics.median(totals)
+    print(f"import {args.module}: median {median:.1f}ms, min {min(totals):.1f}ms, max {max(totals):.1f}ms over {args.runs} runs")
+    print("\nslowest modules (median self time):")
+    slowest = sorted(((statistics.median(times), name) for name, times in self_times.items()), reverse=True)
+    for elapsed, name in slowest[:args.top]:
+        print(f"{elapsed:10.1f}ms  {name}")
+
+    if median > args.budget_ms:
+        print(f"\nFAIL: cold start {median:.1f}ms exceeds the {args.budget_ms:.0f}ms budget")
+        sys.exit(1)
+    print(f"\nOK: cold start within the {args.budget_ms:.0f}ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Micro benchmark suite of the status and serialization hot paths.
+
+Each case is calibrated to run enough iterations per round to be measurable,
+then timed over several rounds; the table reports min/max/mean/stddev/median
+per call and calls per second, like pytest-benchmark. Inputs come from the
+synthetic registry generator, so runs with the same --seed are comparable.
+Save a run and compare a later one against it to catch regressions:
+
+    python -m benchmarks.bench_micro --save baseline.json
+    python -m benchmarks.bench_micro --compare baseline.json --max-regression 10
+    python -m benchmarks.bench_micro -k serialization
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.synthetic import synthetic_patients
+
+# Each round runs for at least this long, so timer resolution does not matter
+MIN_ROUND_TIME = 0.005
+
+
+def bench(fn: Callable[[], object], rounds: int) -> Dict[str, float]:
+    """
+    Seconds per call of fn over rounds calibrated rounds.
+    """
+    fn()  # warm up
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        if time.perf_counter() - started >= MIN_ROUND_TIME:
+            break
+        iterations *= 2
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        timings.append((time.perf_counter() - started) / iterations)
+    return {
+        "min": min(timings),
+        "max": max(timings),
+        "mean": statistics.mean(timings),
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "median": statistics.median(timings),
+        "iterations": iterations,
+    }
+
+
+def registry_sample(patients: int, seed: int):
+    """
+    Synthetic case-history rows (shaped like route.CASE_HISTORY_COLUMNS rows) and
+    the patient rows they belong to.
+    """
+    from api.routers.route import CASE_HISTORY_COLUMNS
+
+    HistoryRow = namedtuple("HistoryRow", [column.key for column in CASE_HISTORY_COLUMNS])
+    PatientRow = namedtuple("PatientRow", ["id", "medical_record_number", "diagnosis_date", "status"])
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    patient_rows, history_rows = [], []
+    for patient_id, (patient, histories) in enumerate(synthetic_patients(patients, seed=seed), start=1):
+        patient_rows.append(PatientRow(patient_id, patient["medical_record_number"], patient["diagnosis_date"], None))
+        for history in reversed(histories):  # newest first, as the routers read them
+            history_rows.append(HistoryRow(
+                id=len(history_rows) + 1,
+                patient_id=patient_id,
+                created_at=created_at,
+                updated_at=created_at,
+                **history,
+            ))
+    return patient_rows, history_rows
+
+
+def cases(patients: int, seed: int) -> Dict[str, Callable[[], object]]:
+    import schemas
+    from api.routers.route import _batch_patient_details_json, _case_history_records, _patient_detail_json
+    from classification import classify_titers, syphilis_status_from_titer, titer_value
+    from pagination import decode_cursor, encode_cursor
+    from summaries import status_value
+
+    patient_rows, history_rows = registry_sample(patients, seed)
+    titers = [row.titer_result for row in history_rows]
+    # The patient with the longest follow-up, i.e. the most expensive detail read
+    busiest = max(patient_rows, key=lambda row: sum(1 for history in history_rows if history.patient_id == row.id))
+    busiest_histories = [row for row in history_rows if row.patient_id == busiest.id]
+    batch = schemas.PatientBatchRequest(ids=[row.id for row in patient_rows[:100]])
+    batch_histories = [row for row in history_rows if row.patient_id <= 100]
+    cursor = encode_cursor({"o": "last_exam_date", "id": 123456, "d": history_rows[0].diagnosis_date})
+
+    return {
+        f"status: syphilis_status_from_titer x{len(titers)}": lambda: [syphilis_status_from_titer(titer) for titer in titers],
+        f"status: classify_titers x{len(titers)}": lambda: classify_titers(titers),
+        f"status: titer_value x{len(titers)}": lambda: [titer_value(titer) for titer in titers],
+        f"status: status_value x{len(titers)}": lambda: [status_value(titer) for titer in titers],
+        f"serialization: _case_history_records x{len(busiest_histories)}": lambda: _case_history_records(busiest_histories),
+        f"serialization: _patient_detail_json x{len(busiest_histories)}": lambda: _patient_detail_json(busiest, busiest_histories),
+        f"serialization: _batch_patient_details_json x{len(batch.ids)}": lambda: _batch_patient_details_json(
+            batch, patient_rows[:100], batch_histories
+        ),
+        "serialization: encode_cursor": lambda: encode_cursor({"o": "id", "id": 123456, "d": None}),
+        "serialization: decode_cursor": lambda: decode_cursor(cursor),
+    }
+
+
+def _format(seconds: float) -> str:
+    return f"{seconds * 1e6:12.2f}"
+
+
+def print_table(results: Dict[str, Dict[str, float]]) -> None:
+    width = max(len(name) for name in results)
+    print(f"{'name':<{width}}  {'min (us)':>12}  {'max (us)':>12}  {'mean (us)':>12}  {'stddev (us)':>12}  {'median (us)':>12}  {'ops/s':>12}")
+    for name, stats in results.items():
+        print(
+            f"{name:<{width}}  {_format(stats['min'])}  {_format(stats['max'])}  {_format(stats['mean'])}  "
+            f"{_format(stats['stddev'])}  {_format(stats['median'])}  {1 / stats['mean']:12.1f}"
+        )
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], max_regression: float) -> List[Tuple[str, float]]:
+    """
+    Cases whose median got slower than the baseline by more than max_regression percent.
+    """
+    regressions = []
+    print("\nchange of the median against the baseline:")
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        change = (stats["median"] / baseline[name]["median"] - 1) * 100
+        print(f"{change:+8.1f}%  {name}")
+        if change > max_regression:
+            regressions.append((name, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--patients", type=int, default=2000, help="size of the synthetic sample")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("-k", dest="keyword", help="only run cases whose name contains this")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="percent; exit 1 above it with --compare")
+    args = parser.parse_args()
+
+    results = {}
+    for name, fn in cases(args.patients, args.seed).items():
+        if args.keyword and args.keyword not in name:
+            continue
+        results[name] = bench(fn, args.rounds)
+    print_table(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            for name, change in regressions:
+                print(f"FAIL: {name} is {change:.1f}% slower")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
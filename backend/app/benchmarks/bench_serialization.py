@@ -0,0 +1,143 @@
+"""
+Per-request CPU of the patient detail and case-history reads.
+
+Compares the original handlers (kept here verbatim: from_orm().dict() per row,
+a Python re-sort, then FastAPI validating and serializing the response_model
+again) with the routers in api.routers.route, which build the response models
+once from row tuples. The response cache is disabled so every request renders.
+Seeds its own SQLite database with patients that have hundreds of histories:
+
+    python -m benchmarks.bench_serialization --histories 500 --requests 200
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import List
+
+_directory = tempfile.mkdtemp(prefix="bench_serialization_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_directory}/bench.sqlite3")
+
+import schemas  # noqa: E402
+from benchmarks.bench_async import attach_sqlite_public_schema, build_app  # noqa: E402
+from cache import LRUResponseCache, set_response_cache  # noqa: E402
+from classification import syphilis_status_from_titer  # noqa: E402
+from database import get_db  # noqa: E402
+from fastapi import APIRouter, Depends, FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from models import Patient, SyphilisCaseHistory  # noqa: E402
+from sqlalchemy.orm import Session, joinedload  # noqa: E402
+
+legacy_router = APIRouter()
+
+
+@legacy_router.get("/patients/{patient_id}", response_model=schemas.PatientDetailResponse)
+def legacy_read_patient(patient_id: int, db: Session = Depends(get_db)):
+    db_patient = (
+        db.query(Patient)
+        .options(joinedload(Patient.case_histories), joinedload(Patient.summary))
+        .filter(Patient.id == patient_id)
+        .first()
+    )
+    response = {
+        "id": db_patient.id,
+        "medical_record_number": db_patient.medical_record_number,
+        "diagnosis_date": db_patient.diagnosis_date,
+        "status": db_patient.summary.status if db_patient.summary else None,
+        "syphilis_case_history": [],
+    }
+    for history in db_patient.case_histories:
+        history_dict = schemas.SyphilisCaseHistory.from_orm(history).dict()
+        history_dict['status'] = syphilis_status_from_titer(history.titer_result)
+        response["syphilis_case_history"].append(history_dict)
+    response["syphilis_case_history"].sort(
+        key=lambda x: (x['diagnosis_date'] or date.min, x['created_at'] or datetime.min), reverse=True
+    )
+    return response
+
+
+@legacy_router.get("/syphilis-case-history/patient/{patient_id}", response_model=List[schemas.SyphilisCaseHistory])
+def legacy_get_patient_case_histories(patient_id: int, db: Session = Depends(get_db)):
+    db.query(Patient).filter(Patient.id == patient_id).first()
+    histories = (
+        db.query(SyphilisCaseHistory)
+        .filter(SyphilisCaseHistory.patient_id == patient_id)
+        .order_by(SyphilisCaseHistory.diagnosis_date.desc(), SyphilisCaseHistory.created_at.desc())
+        .all()
+    )
+    response_data = []
+    for history in histories:
+        history_dict = schemas.SyphilisCaseHistory.from_orm(history).dict()
+        history_dict['status'] = syphilis_status_from_titer(history.titer_result)
+        response_data.append(history_dict)
+    return response_data
+
+
+def seed(patients: int, histories: int):
+    import database
+    from summaries import rebuild_patient_summaries
+
+    attach_sqlite_public_schema()
+    database.Base.metadata.create_all(database.engine)
+    titers = [f"1:{2 ** exponent}" for exponent in range(1, 13)] + ["Reactive", "Non-reactive"]
+    rng = random.Random(42)
+    db = database.SessionLocal()
+    try:
+        for number in range(patients):
+            patient = Patient(medical_record_number=f"BENCH{number:06d}")
+            patient.case_histories = [
+                SyphilisCaseHistory(
+                    diagnosis_date=date(2020, 1, 1) + timedelta(days=rng.randrange(1500)),
+                    titer_result=rng.choice(titers),
+                    treatments=[{"drug": "benzathine penicillin", "dose": "2.4 MU"}],
+                    notes="follow-up",
+                )
+                for _ in range(histories)
+            ]
+            db.add(patient)
+        db.commit()
+        rebuild_patient_summaries(db)
+    finally:
+        db.close()
+
+
+def cpu_per_request(app: FastAPI, paths: List[str], requests: int) -> float:
+    client = TestClient(app)
+    for path in paths:  # warm up
+        client.get(path).raise_for_status()
+    started = time.process_time()
+    for i in range(requests):
+        client.get(paths[i % len(paths)]).raise_for_status()
+    return (time.process_time() - started) / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--patients", type=int, default=5)
+    parser.add_argument("--histories", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    seed(args.patients, args.histories)
+    set_response_cache(LRUResponseCache(maxsize=0))
+
+    legacy_app = FastAPI()
+    legacy_app.include_router(legacy_router)
+    current_app = build_app(use_async=False)
+
+    patient_ids = range(1, args.patients + 1)
+    print(f"{args.patients} patients x {args.histories} histories, {args.requests} requests each")
+    for label, template in [
+        ("GET /patients/{id}", "/patients/{}"),
+        ("GET /syphilis-case-history/patient/{id}", "/syphilis-case-history/patient/{}"),
+    ]:
+        paths = [template.format(patient_id) for patient_id in patient_ids]
+        legacy = cpu_per_request(legacy_app, paths, args.requests)
+        current = cpu_per_request(current_app, paths, args.requests)
+        print(f"{label:42s} legacy {legacy:8.2f} ms CPU  current {current:8.2f} ms CPU  ({legacy / current:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Microbenchmarks of titer classification.
+
+Compares the original per-row parser (kept here verbatim as legacy_status_from_titer)
+with classification.syphilis_status_from_titer and the batched classify_titers,
+over a column drawn from the allowed titer vocabulary.
+
+    python -m benchmarks.bench_titers --rows 100000
+"""
+import argparse
+import random
+import timeit
+
+from classification import TreatmentStatus, classify_titers, syphilis_status_from_titer
+
+VOCABULARY = [f"1:{2 ** exponent}" for exponent in range(1, 13)] + ["Reactive", "Non-reactive", None]
+
+
+def legacy_status_from_titer(current_titer):
+    try:
+        if isinstance(current_titer, str):
+            if ':' in current_titer:
+                try:
+                    current_val = float(current_titer.split(':')[1])
+                except Exception:
+                    return None
+            else:
+                try:
+                    current_val = float(current_titer)
+                except Exception:
+                    return None
+        else:
+            current_val = float(current_titer)
+    except Exception:
+        return None
+
+    if current_val >= 32:
+        return TreatmentStatus.ACTIVE_INFECTION
+    elif 8 <= current_val < 32:
+        return TreatmentStatus.UNDER_TREATMENT
+    elif 1 <= current_val < 8:
+        return TreatmentStatus.MONITORING_CURE
+    elif current_val < 1:
+        return TreatmentStatus.CURED
+    else:
+        return TreatmentStatus.UNKNOWN
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    column = [rng.choice(VOCABULARY) for _ in range(args.rows)]
+
+    cases = {
+        "legacy per row": lambda: [legacy_status_from_titer(titer) for titer in column],
+        "memoized per row": lambda: [syphilis_status_from_titer(titer) for titer in column],
+        "classify_titers(list)": lambda: classify_titers(column),
+    }
+    try:
+        import numpy as np
+
+        objects = np.array(column, dtype=object)
+        strings = np.array(["" if titer is None else titer for titer in column])
+        cases["classify_titers(object array)"] = lambda: classify_titers(objects)
+        cases["classify_titers(str array)"] = lambda: classify_titers(strings)
+    except ImportError:
+        pass
+
+    for label, fn in cases.items():
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{label:>32}: {best * 1000:8.2f} ms  ({best / args.rows * 1e9:6.1f} ns/row)")
+
+
+if __name__ == "__main__":
+    main()
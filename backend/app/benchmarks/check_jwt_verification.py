@@ -0,0 +1,132 @@
+"""
+Token verification check for JWTVerifier.
+
+Generates an HS256 secret and RS256/ES256 key pairs, serves the public keys as a
+local JWKS, signs tokens with them and verifies each one in-process. Fails (exit
+code 1) when a valid token is rejected or when an expired, wrong-audience,
+wrongly signed or different-algorithm token is accepted.
+
+    python -m benchmarks.check_jwt_verification
+
+Nothing is fetched from Supabase: the JWKS is served from memory and there is
+no remote fallback, so a token no local key verifies must be rejected.
+"""
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# dependencies.py reads the Supabase settings at import time; no request is made with them
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "check-jwt-verification")
+
+import jwt  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec, rsa  # noqa: E402
+from dependencies import JWTVerifier, TokenCache  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+from jwt.algorithms import ECAlgorithm, RSAAlgorithm  # noqa: E402
+
+AUDIENCE = "authenticated"
+SECRET = "check-jwt-verification-secret-of-32-bytes"
+
+
+class StaticJWKSClient(jwt.PyJWKClient):
+    """
+    PyJWKClient serving a fixed JWKS instead of fetching it.
+    """
+
+    def __init__(self, jwks: Dict[str, Any]):
+        super().__init__("http://localhost/jwks.json", cache_keys=False, cache_jwk_set=False)
+        self.jwks = jwks
+
+    def fetch_data(self) -> Any:
+        return self.jwks
+
+
+@dataclass
+class Check:
+    name: str
+    token: str
+    accepted: bool
+
+
+def _claims(audience: Optional[str] = AUDIENCE, expires_in: int = 300) -> Dict[str, Any]:
+    claims = {"sub": "check-user", "exp": int(time.time()) + expires_in}
+    if audience is not None:
+        claims["aud"] = audience
+    return claims
+
+
+def _public_jwk(algorithm: str, private_key, kid: str) -> Dict[str, Any]:
+    jwk_algorithm = RSAAlgorithm if algorithm == "RS256" else ECAlgorithm
+    jwk = jwk_algorithm.to_jwk(private_key.public_key(), as_dict=True)
+    return {**jwk, "kid": kid, "alg": algorithm, "use": "sig"}
+
+
+def token_checks() -> Tuple[List[Check], Dict[str, Any]]:
+    rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    ec_key = ec.generate_private_key(ec.SECP256R1())
+    other_rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwks = {"keys": [_public_jwk("RS256", rsa_key, "rsa"), _public_jwk("ES256", ec_key, "ec")]}
+
+    def rs256(claims, key=rsa_key, kid="rsa"):
+        return jwt.encode(claims, key, algorithm="RS256", headers={"kid": kid})
+
+    def es256(claims, key=ec_key, kid="ec"):
+        return jwt.encode(claims, key, algorithm="ES256", headers={"kid": kid})
+
+    def hs256(claims, secret=SECRET):
+        return jwt.encode(claims, secret, algorithm="HS256")
+
+    checks = [
+        Check("HS256", hs256(_claims()), True),
+        Check("RS256", rs256(_claims()), True),
+        Check("ES256", es256(_claims()), True),
+        Check("expired HS256", hs256(_claims(expires_in=-60)), False),
+        Check("expired RS256", rs256(_claims(expires_in=-60)), False),
+        Check("expired ES256", es256(_claims(expires_in=-60)), False),
+        Check("wrong audience HS256", hs256(_claims(audience="anon")), False),
+        Check("wrong audience RS256", rs256(_claims(audience="anon")), False),
+        Check("wrong audience ES256", es256(_claims(audience="anon")), False),
+        Check("missing audience", rs256(_claims(audience=None)), False),
+        Check("HS256 with another secret", hs256(_claims(), secret="another-secret-of-at-least-32-bytes"), False),
+        Check("RS256 with another key", rs256(_claims(), key=other_rsa_key), False),
+        # A token whose alg differs from the algorithm of the key its kid names
+        Check("ES256 token naming the RS256 key", es256(_claims(), kid="rsa"), False),
+        Check("RS256 token naming the ES256 key", rs256(_claims(), kid="ec"), False),
+        Check("unknown kid", rs256(_claims(), kid="rotated-away"), False),
+        Check("unsigned", jwt.encode(_claims(), None, algorithm="none"), False),
+    ]
+    return checks, jwks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.parse_args()
+
+    checks, jwks = token_checks()
+    failed = False
+    for check in checks:
+        # A fresh cache per token, so every check runs the whole verification
+        verifier = JWTVerifier(
+            secret=SECRET, jwks_client=StaticJWKSClient(jwks), audience=AUDIENCE, cache=TokenCache()
+        )
+        try:
+            verifier.verify(check.token)
+            accepted, detail = True, "accepted"
+        except HTTPException as e:
+            accepted, detail = False, f"rejected ({e.detail})"
+        if accepted != check.accepted:
+            failed = True
+            print(f"FAIL: {check.name}: {detail}")
+        else:
+            print(f"ok: {check.name}: {detail}")
+    if failed:
+        sys.exit(1)
+    print(f"OK: {len(checks)} tokens verified as expected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Query-plan regression check for the hot read paths.
+
+Migrates a scratch database to head with Alembic, seeds it, calls each hot
+endpoint and EXPLAINs every SELECT it issued. Fails (exit code 1) when a query
+full-scans a table it should reach through an index, or sorts rows its index
+should already return in order. Also fails when the migrations and models.py
+disagree, so a model index without a migration is caught too.
+
+    python -m benchmarks.check_query_plans                      # temporary SQLite database
+    DATABASE_URL=postgresql://.../scratch python -m benchmarks.check_query_plans
+
+On PostgreSQL sequential scans are disabled while explaining, so any Seq Scan
+left in a plan means no usable index exists. Use a scratch database: the check
+writes to it.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='check_query_plans_')}/plans.sqlite3"
+
+import database  # noqa: E402
+from benchmarks.bench_async import attach_sqlite_public_schema  # noqa: E402
+from cache import LRUResponseCache, set_response_cache  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+
+# Tables that hot reads must only ever reach through an index
+INDEXED_TABLES = ("syphilis_case_histories", "treatment_doses", "patient_summaries", "deleted_records")
+
+
+@dataclass
+class Check:
+    method: str
+    path: str
+    json: Optional[dict] = None
+    # Whether the endpoint may sort (e.g. GROUP BY over a whole page of rows)
+    may_sort: bool = False
+    # Tables this endpoint legitimately scans in full (paged list reads)
+    may_scan: Tuple[str, ...] = ()
+
+
+@dataclass
+class Problem:
+    check: Check
+    statement: str
+    plan: List[str] = field(default_factory=list)
+    reason: str = ""
+
+
+def hot_checks(patient_id: int, history_id: int) -> List[Check]:
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return [
+        Check("GET", f"/patients/{patient_id}"),
+        Check("GET", f"/syphilis-case-history/patient/{patient_id}"),
+        Check("GET", f"/syphilis-case-history/{history_id}"),
+        Check("POST", "/patients/batch", json={"ids": [patient_id, patient_id + 1, patient_id + 2]}),
+        Check("GET", "/patients/page?limit=50", may_scan=("patients",)),
+        # Cohort pages walk the status and titer indexes of patient_summaries
+        Check("GET", "/patients/page?status=Infec%C3%A7%C3%A3o%20Ativa&order_by=last_exam_date&limit=50"),
+        Check("GET", "/patients/page?titer_min=8&titer_max=64&order_by=latest_titer&limit=50"),
+        Check(
+            "PUT",
+            f"/syphilis-case-history/{history_id}",
+            json={"patient_id": patient_id, "titer_result": "1:8", "diagnosis_date": "2024-05-01", "treatments": []},
+        ),
+        # The windows read the index in order; SQLite then re-sorts the materialized
+        # window output for the outer ORDER BY
+        Check("GET", f"/analytics/titer-trends?patient_id={patient_id}", may_sort=True),
+        Check("GET", "/analytics/titer-trends?limit=20", may_sort=True),
+        Check("GET", "/treatments/doses?medication=benzathine&match=prefix&limit=50"),
+        # Sorts one patient's doses by id, a handful of rows
+        Check("GET", f"/treatments/doses?patient_id={patient_id}", may_sort=True),
+        Check("GET", "/sync/patients?limit=50"),
+        Check("GET", f"/sync/case-histories?updated_since={yesterday}&limit=50"),
+    ]
+
+
+def migrate() -> Optional[str]:
+    """
+    Upgrade the database to head. Returns the differences Alembic autogenerate
+    finds between the migrated schema and the models, if any.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from alembic.util import AutogenerateDiffsDetected
+
+    config = Config(os.path.join(APP_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(APP_DIR, "alembic"))
+    with database.engine.connect() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+        connection.commit()
+        try:
+            command.check(config)
+        except AutogenerateDiffsDetected as e:
+            return str(e)
+    return None
+
+
+def seed(patients: int, histories: int) -> None:
+    from benchmarks.synthetic import generate_registry
+    from models import Patient
+
+    db = database.SessionLocal()
+    try:
+        if db.query(Patient.id).first() is not None:
+            return
+        generate_registry(db, patients, seed=7, max_histories=histories)
+    finally:
+        db.close()
+
+    with database.engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+        connection.commit()
+
+
+def capture(app, check: Check) -> List[Tuple[str, object]]:
+    from fastapi.testclient import TestClient
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if re.match(r"\s*(SELECT|WITH)\b", statement, re.IGNORECASE):
+            statements.append((statement, parameters))
+
+    event.listen(database.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = TestClient(app).request(check.method, check.path, json=check.json)
+    finally:
+        event.remove(database.engine, "before_cursor_execute", before_cursor_execute)
+    if response.status_code >= 400:
+        raise SystemExit(f"{check.method} {check.path} answered {response.status_code}: {response.text}")
+    return statements
+
+
+def explain(statement: str, parameters) -> List[str]:
+    with database.engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql("SET enable_seqscan = off")
+            rows = connection.exec_driver_sql("EXPLAIN " + statement, parameters).all()
+            return [row[0] for row in rows]
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        return [row[-1] for row in rows]
+
+
+def plan_problem(check: Check, plan: List[str]) -> Optional[str]:
+    tables = "|".join(table for table in INDEXED_TABLES + ("patients",) if table not in check.may_scan)
+    for line in plan:
+        if re.search(rf"Seq Scan on (public\.)?({tables})\b", line):
+            return "sequential scan"
+        # SQLite: "SCAN t" without "USING ... INDEX" reads the whole table
+        scan = re.search(rf"\bSCAN (public\.)?({tables})\b(.*)", line)
+        if scan and "INDEX" not in scan.group(3):
+            return f"full scan of {scan.group(2)}"
+        if not check.may_sort and ("TEMP B-TREE FOR ORDER BY" in line or re.match(r"\s*(->\s*)?Sort\b", line)):
+            return "sort not served by an index"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--patients", type=int, default=500)
+    parser.add_argument("--histories", type=int, default=12, help="max histories per patient")
+    args = parser.parse_args()
+
+    attach_sqlite_public_schema()
+    set_response_cache(LRUResponseCache(maxsize=0))
+
+    drift = migrate()
+    seed(args.patients, args.histories)
+
+    from main import app
+    from models import SyphilisCaseHistory
+
+    with database.SessionLocal() as db:
+        history = db.query(SyphilisCaseHistory).order_by(SyphilisCaseHistory.id).first()
+        patient_id, history_id = history.patient_id, history.id
+
+    problems: List[Problem] = []
+    explained = 0
+    for check in hot_checks(patient_id, history_id):
+        for statement, parameters in capture(app, check):
+            plan = explain(statement, parameters)
+            explained += 1
+            reason = plan_problem(check, plan)
+            if reason:
+                problems.append(Problem(check, statement, plan, reason))
+
+    if drift:
+        print(f"FAIL: migrations and models.py differ: {drift}")
+    for problem in problems:
+        print(f"FAIL: {problem.check.method} {problem.check.path}: {problem.reason}")
+        print("  " + " ".join(problem.statement.split()))
+        print("\n".join(f"    {line}" for line in problem.plan))
+    if drift or problems:
+        sys.exit(1)
+    print(f"OK: {explained} statements from {len(hot_checks(patient_id, history_id))} endpoints use indexes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Read-your-writes check through the CORS path, as the browser frontend calls the API.
+
+Builds a primary and a lagging "replica" SQLite database, then sends every
+request with a cross-origin Origin header: a write, the preflight of a read
+carrying X-Read-Primary-Until, and reads with and without the header. Fails
+(exit code 1) when the header is not exposed to the page, the preflight does
+not allow it, or the reads are not routed as the header says.
+
+    python -m benchmarks.check_read_your_writes
+
+Runs on temporary SQLite files; DATABASE_URL and DATABASE_READ_URL are ignored.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+_directory = tempfile.mkdtemp(prefix="check_read_your_writes_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_directory}/primary.sqlite3"
+os.environ["DATABASE_READ_URL"] = f"sqlite:///{_directory}/replica.sqlite3"
+os.environ.pop("CORS_ALLOW_ORIGINS", None)
+
+import database  # noqa: E402
+import models  # noqa: E402,F401  (registers every table on Base.metadata)
+from benchmarks.bench_async import attach_sqlite_public_schema  # noqa: E402
+from replica import READ_YOUR_WRITES_HEADER, READ_YOUR_WRITES_SECONDS  # noqa: E402
+
+ORIGIN = "http://localhost:3000"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.parse_args()
+
+    from fastapi.testclient import TestClient
+
+    attach_sqlite_public_schema()
+    database.Base.metadata.create_all(database.engine)
+    database.Base.metadata.create_all(database.get_read_engine())
+    # The replica lags behind: it never receives the patient written below
+    with database.get_read_engine().begin() as conn:
+        conn.exec_driver_sql("INSERT INTO public.patients (id, medical_record_number) VALUES (1, 'REPLICA')")
+
+    from main import app
+
+    client = TestClient(app, headers={"Origin": ORIGIN})
+    failures = []
+
+    def check(name, condition, detail=""):
+        print(f"{'ok' if condition else 'FAIL'}: {name}{f' ({detail})' if detail and not condition else ''}")
+        if not condition:
+            failures.append(name)
+
+    def listed(response):
+        return [patient["medical_record_number"] for patient in response.json()]
+
+    write = client.post("/patients/", json={"medical_record_number": "PRIMARY"})
+    until = write.headers.get(READ_YOUR_WRITES_HEADER)
+    check("write succeeds", write.status_code == 201, write.text)
+    check("write answers with the window", until is not None, dict(write.headers))
+    exposed = write.headers.get("access-control-expose-headers", "").lower()
+    check("the page may read the header", READ_YOUR_WRITES_HEADER.lower() in exposed, exposed)
+    check(
+        "no credentialed wildcard",
+        not (
+            write.headers.get("access-control-allow-origin") == "*"
+            and write.headers.get("access-control-allow-credentials") == "true"
+        ),
+        dict(write.headers),
+    )
+    check("no cookie is needed", "set-cookie" not in write.headers, write.headers.get("set-cookie"))
+
+    preflight = client.options(
+        "/patients/",
+        headers={
+            "Access-Control-Request-Method": "GET",
+            "Access-Control-Request-Headers": READ_YOUR_WRITES_HEADER.lower(),
+        },
+    )
+    allowed = preflight.headers.get("access-control-allow-headers", "").lower()
+    check(
+        "preflight allows the header",
+        preflight.status_code == 200 and READ_YOUR_WRITES_HEADER.lower() in allowed,
+        allowed,
+    )
+
+    echoed = client.get("/patients/", headers={READ_YOUR_WRITES_HEADER: until or ""})
+    check("reads with the header see the write", listed(echoed) == ["PRIMARY"], echoed.text)
+    plain = client.get("/patients/")
+    check("reads without it use the replica", listed(plain) == ["REPLICA"], plain.text)
+    too_long = f"{time.time() + READ_YOUR_WRITES_SECONDS + 60:.3f}"
+    pinned = client.get("/patients/", headers={READ_YOUR_WRITES_HEADER: too_long})
+    check("longer windows are ignored", listed(pinned) == ["REPLICA"], pinned.text)
+    expired = client.get("/patients/", headers={READ_YOUR_WRITES_HEADER: f"{time.time() - 1:.3f}"})
+    check("expired windows are ignored", listed(expired) == ["REPLICA"], expired.text)
+
+    failed_write = client.post("/patients/", json={"medical_record_number": "PRIMARY"})
+    check("failed writes open no window", READ_YOUR_WRITES_HEADER not in failed_write.headers, dict(failed_write.headers))
+
+    if failures:
+        sys.exit(1)
+    print("OK: read-your-writes works through CORS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Registry statistics check for GET /analytics/statistics.
+
+Migrates a scratch database to head and writes, through the API, one patient per
+latest titer: 1:64, 1:16, 1:4, 1:2, Non-reactive, and one without any history.
+Fails (exit code 1) when the status distribution or the cure rate differ from
+the expected ones; in particular the 1:4 and 1:2 patients share the "Curado"
+status label with the non-reactive one but are not cured.
+
+    python -m benchmarks.check_registry_statistics                      # temporary SQLite database
+    DATABASE_URL=postgresql://.../scratch python -m benchmarks.check_registry_statistics
+
+Use a scratch database: the check writes to it.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='check_registry_statistics_')}/stats.sqlite3"
+
+from benchmarks.bench_async import attach_sqlite_public_schema  # noqa: E402
+from benchmarks.check_query_plans import migrate  # noqa: E402
+
+LATEST_TITERS = ["1:64", "1:16", "1:4", "1:2", "Non-reactive", None]
+EXPECTED_STATUS_DISTRIBUTION = {"Curado": 3, "Infecção Ativa": 1, "Em Tratamento": 1, None: 1}
+# Only the non-reactive patient is cured, out of the 5 with a status
+EXPECTED_CURE_RATE = 1 / 5
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.parse_args()
+
+    attach_sqlite_public_schema()
+    migrate()
+
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+    for number, titer in enumerate(LATEST_TITERS):
+        patient = client.post("/patients/", json={"medical_record_number": f"STATS{number}"})
+        if patient.status_code != 201:
+            raise SystemExit(f"creating a patient answered {patient.status_code}: {patient.text}")
+        if titer is None:
+            continue
+        # An earlier, higher titer, so every patient has a history to improve on
+        for diagnosis_date, titer_result in (("2024-01-10", "1:128"), ("2024-06-10", titer)):
+            history = client.post(
+                "/syphilis-case-history/",
+                json={
+                    "patient_id": patient.json()["id"],
+                    "diagnosis_date": diagnosis_date,
+                    "titer_result": titer_result,
+                },
+            )
+            if history.status_code != 201:
+                raise SystemExit(f"creating a case history answered {history.status_code}: {history.text}")
+
+    statistics = client.get("/analytics/statistics", params={"refresh": True}).json()
+    failed = False
+    distribution = {bucket["status"]: bucket["patients"] for bucket in statistics["status_distribution"]}
+    if distribution != EXPECTED_STATUS_DISTRIBUTION:
+        failed = True
+        print(f"FAIL: status distribution {distribution}, expected {EXPECTED_STATUS_DISTRIBUTION}")
+    else:
+        print(f"ok: status distribution {distribution}")
+    if statistics["cure_rate"] is None or abs(statistics["cure_rate"] - EXPECTED_CURE_RATE) > 1e-9:
+        failed = True
+        print(f"FAIL: cure rate {statistics['cure_rate']}, expected {EXPECTED_CURE_RATE}")
+    else:
+        print(f"ok: cure rate {statistics['cure_rate']}")
+    if failed:
+        sys.exit(1)
+    print("OK: registry statistics count only non-reactive patients as cured")
+
+
+if __name__ == "__main__":
+    main()
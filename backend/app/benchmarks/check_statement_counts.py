@@ -0,0 +1,145 @@
+"""
+Statement-count regression check for the write endpoints.
+
+Migrates a scratch database to head, calls each write endpoint (and its error
+cases) once and counts the SQL statements it sends, COMMITs included. Fails
+(exit code 1) when an endpoint sends more than its budget, e.g. because a write
+went back to checking for conflicts with a SELECT first or to refreshing the
+row it wrote.
+
+    python -m benchmarks.check_statement_counts                      # temporary SQLite database
+    DATABASE_ASYNC=true python -m benchmarks.check_statement_counts  # the async routes
+    DATABASE_URL=postgresql://.../scratch python -m benchmarks.check_statement_counts
+
+No change feed subscriber is connected, so publishing changes sends nothing.
+Use a scratch database: the check writes to it.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Union
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='check_statement_counts_')}/writes.sqlite3"
+
+import database  # noqa: E402
+from benchmarks.bench_async import attach_sqlite_public_schema  # noqa: E402
+from benchmarks.check_query_plans import migrate  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+TREATMENTS = [{"name": "Penicilina benzatina", "date1": "2024-01-10", "date2": "2024-01-17"}]
+
+
+@dataclass
+class Check:
+    name: str
+    method: str
+    # Formatted with the ids saved by the checks before
+    path: str
+    json: Union[dict, Callable[[Dict[str, int]], dict], None]
+    status_code: int
+    budget: int
+    # Saves the id in the response under this name
+    save_as: Optional[str] = None
+
+
+def write_checks() -> List[Check]:
+    return [
+        # INSERT patient, INSERT summary, COMMIT
+        Check("create patient", "POST", "/patients/", {"medical_record_number": "W1"}, 201, 3, "patient"),
+        # INSERT rejected by the unique MRN index
+        Check("duplicate MRN", "POST", "/patients/", {"medical_record_number": "W1"}, 400, 1),
+        # UPDATE, COMMIT
+        Check("update patient", "PUT", "/patients/{patient}", {"diagnosis_date": "2024-01-01"}, 200, 2),
+        Check("update missing patient", "PUT", "/patients/0", {"diagnosis_date": "2024-01-01"}, 404, 1),
+        # INSERT history, INSERT doses, SELECT + UPDATE summary, COMMIT
+        Check(
+            "create case history",
+            "POST",
+            "/syphilis-case-history/",
+            lambda ids: {
+                "patient_id": ids["patient"], "diagnosis_date": "2024-01-10", "titer_result": "1:32", "treatments": TREATMENTS
+            },
+            201,
+            5,
+            "history",
+        ),
+        # INSERT rejected by the patient_id foreign key
+        Check(
+            "case history of missing patient",
+            "POST",
+            "/syphilis-case-history/",
+            {"patient_id": 0, "diagnosis_date": "2024-02-01", "titer_result": "1:8"},
+            404,
+            1,
+        ),
+        # UPDATE, COMMIT
+        Check("update notes", "PUT", "/syphilis-case-history/{history}", {"notes": "Tolerated"}, 200, 2),
+        # SELECT replaced values, UPDATE, SELECT + UPDATE summary, COMMIT
+        Check("update titer", "PUT", "/syphilis-case-history/{history}", {"titer_result": "1:4"}, 200, 5),
+        # UPDATE, DELETE + INSERT doses, COMMIT
+        Check("update treatments", "PUT", "/syphilis-case-history/{history}", {"treatments": TREATMENTS}, 200, 4),
+        # SELECT replaced values, UPDATE rejected by the patient_id foreign key
+        Check("move to missing patient", "PUT", "/syphilis-case-history/{history}", {"patient_id": 0}, 404, 2),
+        # INSERT tombstones of the histories and the patient, DELETE, COMMIT
+        Check("delete patient", "DELETE", "/patients/{patient}", None, 204, 4),
+        Check("delete missing patient", "DELETE", "/patients/0", None, 404, 3),
+    ]
+
+
+def count_statements(app, check: Check, ids: Dict[str, int]) -> int:
+    from fastapi.testclient import TestClient
+
+    engines = [database.engine, database.get_async_engine().sync_engine]
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def commit(conn):
+        statements.append("COMMIT")
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "commit", commit)
+    try:
+        body = check.json(ids) if callable(check.json) else check.json
+        response = TestClient(app).request(check.method, check.path.format(**ids), json=body)
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+            event.remove(engine, "commit", commit)
+    if response.status_code != check.status_code:
+        raise SystemExit(f"{check.name}: {check.method} {check.path} answered {response.status_code}: {response.text}")
+    if check.save_as:
+        ids[check.save_as] = response.json()["id"]
+    return len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.parse_args()
+
+    attach_sqlite_public_schema()
+    migrate()
+
+    from main import app
+
+    failed = False
+    ids: Dict[str, int] = {}
+    for check in write_checks():
+        count = count_statements(app, check, ids)
+        if count > check.budget:
+            failed = True
+            print(f"FAIL: {check.name} ({check.method} {check.path}): {count} statements, budget {check.budget}")
+        else:
+            print(f"ok: {check.name}: {count} statements")
+    if failed:
+        sys.exit(1)
+    print(f"OK: {len(write_checks())} writes within their statement budgets")
+
+
+if __name__ == "__main__":
+    main()
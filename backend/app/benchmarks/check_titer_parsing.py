@@ -0,0 +1,67 @@
+"""
+Titer parsing check: titer_value_sql and titer_status_sql against Python.
+
+Evaluates classification.titer_value_sql and titer_status_sql in the database
+for a fixture of stored titer strings (well-formed, differently cased or padded,
+qualitative and malformed legacy values) and compares each result with the
+Python titer_value and summaries.status_value.
+Fails (exit code 1) when they disagree or when the database rejects a value.
+
+    python -m benchmarks.check_titer_parsing                      # temporary SQLite database
+    DATABASE_URL=postgresql://.../scratch python -m benchmarks.check_titer_parsing
+
+Nothing is written to the database.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='check_titer_parsing_')}/titers.sqlite3"
+
+import database  # noqa: E402
+from classification import titer_status_sql, titer_value, titer_value_sql  # noqa: E402
+from sqlalchemy import String, literal, select  # noqa: E402
+from summaries import status_value  # noqa: E402
+
+TITERS = [
+    "1:1", "1:2", "1:4", "1:16", "1:32", "1:128", "1:1024", "1:16.0",
+    " 1:16", "1:8 ", "  1:64  ",
+    "Non-reactive", "non-reactive", "NON-REACTIVE", " Non-reactive ",
+    "Reactive", "reactive",
+    "16", " 8 ", "0", "0.5",
+    "1:", ":16", "1:16 (rep)", "1:16x", "1/16", "1:1:16", "1:-4", "2:8", "1:1e3", "inf",
+    "", "   ", "pending", "Not done",
+    None,
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.parse_args()
+
+    failed = False
+    with database.engine.connect() as conn:
+        for titer in TITERS:
+            column = literal(titer, String)
+            try:
+                sql_value, sql_status = conn.execute(select(titer_value_sql(column), titer_status_sql(column))).one()
+            except Exception as e:
+                conn.rollback()
+                failed = True
+                print(f"FAIL: {titer!r}: the database rejected it: {e}")
+                continue
+            python_value, python_status = titer_value(titer), status_value(titer)
+            if (sql_value, sql_status) != (python_value, python_status):
+                failed = True
+                print(f"FAIL: {titer!r}: SQL {sql_value!r} {sql_status!r}, Python {python_value!r} {python_status!r}")
+            else:
+                print(f"ok: {titer!r}: {sql_value!r} {sql_status!r}")
+    if failed:
+        sys.exit(1)
+    print(f"OK: {len(TITERS)} titers parse the same in SQL and Python")
+
+
+if __name__ == "__main__":
+    main()
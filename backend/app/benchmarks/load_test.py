@@ -0,0 +1,289 @@
+"""
+HTTP load test covering every endpoint of api.routers.route.
+
+Sends a weighted mix of patient and case-history reads and writes from
+--concurrency clients for --duration seconds and reports throughput and
+p50/p95/p99 latency per endpoint. Requests go in-process over ASGI to main.app
+on DATABASE_URL, or to a running server with --base-url. Ids are sampled from
+the database first; writes only touch patients the run creates itself, and
+those are deleted again, so a seeded registry stays as it was:
+
+    DATABASE_URL=sqlite:///bench.sqlite3 python -m benchmarks.synthetic --patients 10000 --create-tables
+    DATABASE_URL=sqlite:///bench.sqlite3 python -m benchmarks.load_test --duration 30 --concurrency 50
+    python -m benchmarks.load_test --base-url http://localhost:8000 --read-only
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+# (method, path, JSON body) of one request
+RequestSpec = Tuple[str, str, Optional[dict]]
+
+
+@dataclass
+class Registry:
+    """
+    Ids the scenarios draw from: sampled from the database, plus the patients and
+    histories this run created.
+    """
+    patient_ids: List[int] = field(default_factory=list)
+    mrns: List[str] = field(default_factory=list)
+    history_ids: List[int] = field(default_factory=list)
+    created_patients: List[int] = field(default_factory=list)
+    # Created patients set aside for the delete scenario, which no other scenario touches
+    disposable_patients: List[int] = field(default_factory=list)
+    created_histories: Dict[int, int] = field(default_factory=dict)  # history id -> patient id
+
+
+@dataclass
+class Scenario:
+    label: str
+    weight: int
+    request: Callable[[Registry, random.Random], Optional[RequestSpec]]
+    writes: bool = False
+    # Called with the response of a successful request to track created ids
+    record: Optional[Callable[[Registry, RequestSpec, httpx.Response], None]] = None
+
+
+def _exam_date(rng: random.Random) -> str:
+    return (date(2024, 1, 1) + timedelta(days=rng.randrange(600))).isoformat()
+
+
+def _titer(rng: random.Random) -> str:
+    return rng.choice([f"1:{2 ** exponent}" for exponent in range(1, 10)] + ["Reactive", "Non-reactive"])
+
+
+def _created_patient(registry: Registry, rng: random.Random) -> Optional[int]:
+    return rng.choice(registry.created_patients) if registry.created_patients else None
+
+
+def _record_patient(registry: Registry, spec: RequestSpec, response: httpx.Response) -> None:
+    # Alternate so concurrent writes never target a patient that is being deleted
+    if len(registry.created_patients) <= len(registry.disposable_patients):
+        registry.created_patients.append(response.json()["id"])
+    else:
+        registry.disposable_patients.append(response.json()["id"])
+
+
+def _record_history(registry: Registry, spec: RequestSpec, response: httpx.Response) -> None:
+    body = response.json()
+    registry.created_histories[body["id"]] = body["patient_id"]
+
+
+def _delete_patient(registry: Registry, rng: random.Random) -> Optional[RequestSpec]:
+    if not registry.disposable_patients:
+        return None
+    return "DELETE", f"/patients/{registry.disposable_patients.pop()}", None
+
+
+def _create_history(registry: Registry, rng: random.Random) -> Optional[RequestSpec]:
+    patient_id = _created_patient(registry, rng)
+    if patient_id is None:
+        return None
+    exam_date = _exam_date(rng)
+    return "POST", "/syphilis-case-history/", {
+        "patient_id": patient_id,
+        "diagnosis_date": exam_date,
+        "titer_result": _titer(rng),
+        "treatments": [{"name": "Benzathine penicillin", "date1": exam_date}],
+    }
+
+
+def _update_history(registry: Registry, rng: random.Random) -> Optional[RequestSpec]:
+    if not registry.created_histories:
+        return None
+    history_id = rng.choice(list(registry.created_histories))
+    return "PUT", f"/syphilis-case-history/{history_id}", {"titer_result": _titer(rng)}
+
+
+SCENARIOS = [
+    Scenario("GET /patients/", 10, lambda r, rng: ("GET", f"/patients/?skip={rng.randrange(0, 500)}&limit=50", None)),
+    Scenario("GET /patients/page", 10, lambda r, rng: (
+        "GET", f"/patients/page?limit=50&order_by={rng.choice(['id', 'last_exam_date'])}", None
+    )),
+    Scenario("GET /patients/search", 8, lambda r, rng: (
+        "GET", f"/patients/search?q={rng.choice(r.mrns)[rng.randrange(2, 6):][:4]}&limit=20", None
+    )),
+    Scenario("GET /patients/{patient_id}", 30, lambda r, rng: ("GET", f"/patients/{rng.choice(r.patient_ids)}", None)),
+    Scenario("POST /patients/batch", 5, lambda r, rng: (
+        "POST", "/patients/batch", {"ids": rng.sample(r.patient_ids, min(50, len(r.patient_ids)))}
+    )),
+    Scenario("GET /syphilis-case-history/{history_id}", 10, lambda r, rng: (
+        "GET", f"/syphilis-case-history/{rng.choice(r.history_ids)}", None
+    )),
+    Scenario("GET /syphilis-case-history/patient/{patient_id}", 15, lambda r, rng: (
+        "GET", f"/syphilis-case-history/patient/{rng.choice(r.patient_ids)}", None
+    )),
+    Scenario("POST /patients/", 3, lambda r, rng: (
+        "POST", "/patients/", {"medical_record_number": f"LT{uuid.uuid4().hex[:12].upper()}", "diagnosis_date": _exam_date(rng)}
+    ), writes=True, record=_record_patient),
+    Scenario("PUT /patients/{patient_id}", 2, lambda r, rng: (
+        ("PUT", f"/patients/{_created_patient(r, rng)}", {"diagnosis_date": _exam_date(rng)})
+        if r.created_patients else None
+    ), writes=True),
+    Scenario("DELETE /patients/{patient_id}", 1, _delete_patient, writes=True),
+    Scenario("POST /syphilis-case-history/", 4, _create_history, writes=True, record=_record_history),
+    Scenario("PUT /syphilis-case-history/{history_id}", 2, _update_history, writes=True),
+]
+
+
+async def sample_registry(client: httpx.AsyncClient, patients: int) -> Registry:
+    """
+    Patient ids and MRNs from /patients/page, and history ids of some of them.
+    """
+    registry = Registry()
+    cursor = None
+    while len(registry.patient_ids) < patients:
+        params = {"limit": min(1000, patients - len(registry.patient_ids))}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/patients/page", params=params)
+        response.raise_for_status()
+        page = response.json()
+        registry.patient_ids += [item["id"] for item in page["items"]]
+        registry.mrns += [item["medical_record_number"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    if not registry.patient_ids:
+        raise SystemExit("No patients to test against; seed the database with python -m benchmarks.synthetic")
+
+    for patient_id in registry.patient_ids[:200]:
+        response = await client.get(f"/syphilis-case-history/patient/{patient_id}")
+        response.raise_for_status()
+        registry.history_ids += [history["id"] for history in response.json()]
+    return registry
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    # Nearest rank
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run(client: httpx.AsyncClient, registry: Registry, scenarios: List[Scenario], args) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    latencies: Dict[str, List[float]] = {scenario.label: [] for scenario in scenarios}
+    errors: Dict[str, int] = {scenario.label: 0 for scenario in scenarios}
+    weights = [scenario.weight for scenario in scenarios]
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(number: int):
+        rng = random.Random(args.seed * 1000 + number)
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(scenarios, weights=weights)[0]
+            spec = scenario.request(registry, rng)
+            if spec is None:
+                continue
+            method, path, body = spec
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+            except httpx.HTTPError:
+                errors[scenario.label] += 1
+                continue
+            latencies[scenario.label].append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[scenario.label] += 1
+            elif scenario.record is not None:
+                scenario.record(registry, spec, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(args.concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def cleanup(client: httpx.AsyncClient, registry: Registry) -> None:
+    for patient_id in registry.created_patients + registry.disposable_patients:
+        response = await client.delete(f"/patients/{patient_id}")
+        if response.status_code >= 400:
+            print(f"Could not delete test patient {patient_id}: {response.status_code} {response.text}")
+
+
+def report(latencies: Dict[str, List[float]], errors: Dict[str, int], elapsed: float) -> dict:
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total} requests in {elapsed:.1f}s: {total / elapsed:.1f} req/s, {sum(errors.values())} errors\n")
+    width = max(len(label) for label in latencies)
+    print(f"{'endpoint':<{width}}  {'count':>7}  {'errors':>6}  {'req/s':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'max ms':>8}")
+
+    results = {"requests": total, "elapsed_s": elapsed, "throughput_rps": total / elapsed, "endpoints": {}}
+    for label, values in latencies.items():
+        if not values:
+            continue
+        values.sort()
+        stats = {
+            "count": len(values),
+            "errors": errors[label],
+            "throughput_rps": len(values) / elapsed,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": values[-1] * 1000,
+        }
+        results["endpoints"][label] = stats
+        print(
+            f"{label:<{width}}  {stats['count']:7d}  {stats['errors']:6d}  {stats['throughput_rps']:8.1f}  "
+            f"{stats['p50_ms']:8.2f}  {stats['p95_ms']:8.2f}  {stats['p99_ms']:8.2f}  {stats['max_ms']:8.2f}"
+        )
+    return results
+
+
+async def main_async(args) -> None:
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        from benchmarks.bench_async import attach_sqlite_public_schema
+
+        attach_sqlite_public_schema()
+        if args.no_cache:
+            from cache import LRUResponseCache, set_response_cache
+
+            set_response_cache(LRUResponseCache(maxsize=0))
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://load-test"
+
+    scenarios = [scenario for scenario in SCENARIOS if not (args.read_only and scenario.writes)]
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=30) as client:
+        registry = await sample_registry(client, args.sample)
+        try:
+            latencies, errors, elapsed = await run(client, registry, scenarios, args)
+        finally:
+            await cleanup(client, registry)
+
+    results = report(latencies, errors, elapsed)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", help="test a running server instead of main.app in-process")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--sample", type=int, default=5000, help="patients to draw ids from")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--read-only", action="store_true", help="skip the write endpoints")
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache (in-process only)")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    # One INFO line per request would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Synthetic syphilis registry generator.
+
+Creates N patients with a realistic spread of case-history counts (most patients
+have one to three exams, a long tail is followed for years) and titer sequences
+that follow a course: a high titer at diagnosis, a decline after treatment that
+usually reaches a fourfold drop, serofast plateaus, occasional reinfections and
+treponemal results ("Reactive"/"Non-reactive"). Rows are written with multi-row
+INSERTs in chunks, then treatment_doses and patient_summaries are filled the
+same way the bulk endpoints do. The same --seed always produces the same registry.
+
+    python -m benchmarks.synthetic --patients 100000 --seed 42
+    DATABASE_URL=sqlite:///bench.sqlite3 python -m benchmarks.synthetic --create-tables
+"""
+import argparse
+import random
+import string
+import time
+from datetime import date, timedelta
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+# The titers schemas accept: 1:2 .. 1:4096
+DILUTIONS = [2 ** exponent for exponent in range(1, 13)]
+MEDICATIONS = ["Benzathine penicillin", "Doxycycline", "Ceftriaxone"]
+FIRST_DIAGNOSIS = date(2018, 1, 1)
+LAST_DIAGNOSIS = date(2025, 6, 30)
+LAST_EXAM = date(2025, 12, 31)
+
+# A patient with their case histories, as insert values (without ids)
+SyntheticPatient = Tuple[dict, List[dict]]
+
+
+def history_count(rng: random.Random, max_histories: int) -> int:
+    """
+    Exams per patient: geometric around 3, so most patients have a few and a
+    long tail is followed for years.
+    """
+    count = 1
+    while count < max_histories and rng.random() < 0.62:
+        count += 1
+    return count
+
+
+def _treatment(rng: random.Random, started: date) -> dict:
+    medication = rng.choices(MEDICATIONS, weights=[85, 10, 5])[0]
+    doses = rng.choice([1, 3, 3]) if medication == MEDICATIONS[0] else 1
+    treatment = {"name": medication}
+    for dose_number in range(1, doses + 1):
+        treatment[f"date{dose_number}"] = (started + timedelta(weeks=dose_number - 1)).isoformat()
+    return treatment
+
+
+def titer_course(rng: random.Random, count: int, diagnosed: date) -> List[dict]:
+    """
+    Up to count case histories of one patient, oldest first and none after
+    LAST_EXAM: non-treponemal titers following treatment response, with
+    treatments recorded at diagnosis and reinfection.
+    """
+    histories = []
+    exponent = rng.choices(range(2, 9), weights=[8, 14, 18, 20, 16, 10, 6])[0]  # 1:8 .. 1:512
+    floor = rng.choice([0, 0, 0, 0, 1])  # index into DILUTIONS; serofast patients plateau at 1:4
+    exam_date = diagnosed
+    for position in range(count):
+        treated = position == 0
+        if position > 0:
+            exam_date += timedelta(days=rng.randint(60, 200))
+            if exam_date > LAST_EXAM:
+                break
+            if rng.random() < 0.06:
+                # Reinfection: at least a fourfold rise
+                exponent = min(exponent + rng.randint(2, 4), len(DILUTIONS) - 1)
+                treated = True
+            else:
+                exponent = max(exponent - rng.choice([0, 1, 1, 2, 2, 3]), floor)
+
+        if rng.random() < 0.08:
+            titer = rng.choice(["Reactive", "Reactive", "Non-reactive"])
+        elif exponent == 0 and rng.random() < 0.5:  # seroreversion
+            titer = "Non-reactive"
+        else:
+            titer = f"1:{DILUTIONS[exponent]}"
+
+        histories.append({
+            "diagnosis_date": exam_date,
+            "titer_result": titer,
+            "treatments": [_treatment(rng, exam_date)] if treated else [],
+            "notes": rng.choice([None, None, "follow-up", "pregnant", "partner treated"]),
+        })
+    return histories
+
+
+def synthetic_patients(count: int, seed: int = 42, max_histories: int = 40, start: int = 0) -> Iterator[SyntheticPatient]:
+    """
+    Deterministic stream of synthetic patients numbered start..start + count - 1.
+    """
+    rng = random.Random(seed)
+    span = (LAST_DIAGNOSIS - FIRST_DIAGNOSIS).days
+    for number in range(start, start + count):
+        # The number keeps MRNs unique; the letters vary the prefixes search sees
+        mrn = "".join(rng.choices(string.ascii_uppercase, k=2)) + f"{number:08d}"
+        diagnosed = FIRST_DIAGNOSIS + timedelta(days=rng.randrange(span))
+        patient = {"medical_record_number": mrn, "diagnosis_date": diagnosed}
+        yield patient, titer_course(rng, history_count(rng, max_histories), diagnosed)
+
+
+def generate_registry(
+    db: Session,
+    patients: int,
+    seed: int = 42,
+    max_histories: int = 40,
+    chunk_size: int = 1000,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[int, int]:
+    """
+    Insert a synthetic registry, chunk_size patients per transaction, and rebuild
+    patient_summaries. MRNs are numbered after the patients already in the
+    database, so runs can be repeated. Returns (patients, case histories) written;
+    progress(patients, histories) is called after each chunk.
+    """
+    from models import Patient, SyphilisCaseHistory
+    from search import mrn_index
+    from summaries import rebuild_patient_summaries
+    from treatments import insert_treatment_doses
+
+    start = db.query(Patient.id).count()
+    written_patients = written_histories = 0
+    stream = synthetic_patients(patients, seed=seed, max_histories=max_histories, start=start)
+    while written_patients < patients:
+        chunk = [entry for _, entry in zip(range(chunk_size), stream)]
+        patient_ids = db.execute(
+            insert(Patient).returning(Patient.id, sort_by_parameter_order=True),
+            [patient for patient, _ in chunk],
+        ).scalars().all()
+
+        history_values = [
+            {"patient_id": patient_id, **history}
+            for patient_id, (_, histories) in zip(patient_ids, chunk)
+            for history in histories
+        ]
+        history_ids = db.execute(
+            insert(SyphilisCaseHistory).returning(SyphilisCaseHistory.id, sort_by_parameter_order=True),
+            history_values,
+        ).scalars().all()
+        insert_treatment_doses(
+            db,
+            ((history_id, values["patient_id"], values["treatments"]) for history_id, values in zip(history_ids, history_values)),
+        )
+        db.commit()
+
+        written_patients += len(chunk)
+        written_histories += len(history_values)
+        if progress is not None:
+            progress(written_patients, written_histories)
+
+    rebuild_patient_summaries(db)
+    db.commit()
+    # Core inserts bypass the mapper events that keep the in-process MRN index current
+    mrn_index.invalidate()
+    return written_patients, written_histories
+
+
+def main():
+    import database
+    from benchmarks.bench_async import attach_sqlite_public_schema
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-histories", type=int, default=40)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--create-tables", action="store_true", help="create missing tables first (scratch databases)")
+    args = parser.parse_args()
+
+    attach_sqlite_public_schema()
+    if args.create_tables:
+        import models  # noqa: F401
+
+        database.Base.metadata.create_all(database.engine)
+
+    started = time.perf_counter()
+    db = database.SessionLocal()
+    try:
+        patients, histories = generate_registry(
+            db,
+            args.patients,
+            seed=args.seed,
+            max_histories=args.max_histories,
+            chunk_size=args.chunk_size,
+            progress=lambda patients, histories: print(f"{patients} patients, {histories} case histories"),
+        )
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+    print(f"Generated {patients} patients and {histories} case histories in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+# A cached response: its strong ETag and the encoded JSON body
+CachedResponse = Tuple[str, bytes]
+
+
+class ResponseCache(ABC):
+    """
+    Storage interface of the response cache; subclass it to plug in another
+    backend (e.g. one shared by several workers) and install it with
+    set_response_cache.
+    """
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    def set(self, key: Hashable, value: CachedResponse) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class LRUResponseCache(ResponseCache):
+    """
+    In-process cache bounded by the total size of the cached bodies; the least
+    recently used responses are evicted first. A maxsize of 0 disables it.
+    Entries expire max_age seconds after they are stored: invalidation only
+    reaches the cache of the worker that wrote, so this bounds how long other
+    workers serve a stale body. A max_age of 0 keeps entries until invalidated,
+    which is only safe with a single worker.
+    """
+
+    def __init__(self, maxsize: int = 64 * 1024 * 1024, max_age: float = 10):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.size = 0
+        # key -> (entry, expiry time on the monotonic clock)
+        self._entries: "OrderedDict[Hashable, Tuple[CachedResponse, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at = item
+            if self.max_age and time.monotonic() >= expires_at:
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value):
+        if len(value[1]) > self.maxsize:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (value, time.monotonic() + self.max_age)
+            self.size += len(value[1])
+            while self.size > self.maxsize:
+                _, ((_, body), _) = self._entries.popitem(last=False)
+                self.size -= len(body)
+
+    def delete(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _discard(self, key):
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self.size -= len(item[0][1])
+
+
+response_cache: ResponseCache = LRUResponseCache(
+    maxsize=int(os.getenv("RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024))),
+    max_age=float(os.getenv("RESPONSE_CACHE_MAX_AGE", "10")),
+)
+
+# Bumped by every invalidation. A response is only stored if no invalidation
+# happened while it was being computed, so a read racing a write can never
+# put a pre-write response back into the cache.
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def set_response_cache(cache: ResponseCache) -> None:
+    global response_cache
+    response_cache = cache
+
+
+def patient_key(patient_id: int):
+    return ("patient", patient_id)
+
+
+def patient_histories_key(patient_id: int):
+    return ("patient_histories", patient_id)
+
+
+def invalidate_patients(*patient_ids: Optional[int]) -> None:
+    """
+    Drop the cached reads of the given patients. Call it after the write commits.
+    """
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        for patient_id in patient_ids:
+            if patient_id is None:
+                continue
+            response_cache.delete(patient_key(patient_id))
+            response_cache.delete(patient_histories_key(patient_id))
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 prescribes for If-None-Match
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return etag in candidates
+
+
+def cache_entry(body: bytes) -> CachedResponse:
+    return _etag(body), body
+
+
+def _store(key: Hashable, body: bytes, generation: int) -> CachedResponse:
+    entry = cache_entry(body)
+    with _generation_lock:
+        if generation == _generation:
+            response_cache.set(key, entry)
+    return entry
+
+
+def etag_response(request: Request, entry: CachedResponse) -> Response:
+    """
+    JSON response for a cached entry, or 304 Not Modified when If-None-Match
+    carries its ETag.
+    """
+    etag, body = entry
+    # no-cache: clients may keep the response but must revalidate it with the ETag
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached_response(request: Request, key: Hashable, render: Callable[[], bytes]) -> Response:
+    """
+    JSON response for key, served from the cache when possible. render builds the
+    encoded body on a miss. Answers 304 Not Modified when If-None-Match carries
+    the current ETag.
+    """
+    entry = response_cache.get(key)
+    if entry is None:
+        generation = _generation
+        entry = _store(key, render(), generation)
+    return etag_response(request, entry)
+
+
+async def cached_response_async(
+    request: Request, key: Hashable, render: Callable[[], Awaitable[bytes]]
+) -> Response:
+    """
+    cached_response for a coroutine render.
+    """
+    entry = response_cache.get(key)
+    if entry is None:
+        generation = _generation
+        entry = _store(key, await render(), generation)
+    return etag_response(request, entry)
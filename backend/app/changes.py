@@ -0,0 +1,315 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Set
+
+from models import Patient, PatientSummary
+from pydantic_core import to_json
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# "memory" fans changes out to the subscribers of this process only; "postgres"
+# sends them through NOTIFY so the subscribers of every worker see them
+CHANGE_FEED_BACKEND = os.getenv("CHANGE_FEED_BACKEND", "memory").lower()
+CHANGE_FEED_CHANNEL = os.getenv("CHANGE_FEED_CHANNEL", "patient_changes")
+# Idle streams get a comment this often, so proxies keep them open and closed
+# connections are noticed
+CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "15"))
+# Recent changes kept for clients resuming with Last-Event-ID
+CHANGE_FEED_BUFFER = int(os.getenv("CHANGE_FEED_BUFFER", "1000"))
+# Changes queued for a subscriber that does not read them; past this it is told to resync
+SUBSCRIBER_QUEUE_SIZE = 256
+# Events per NOTIFY, keeping payloads well under PostgreSQL's 8000 byte limit
+NOTIFY_BATCH = 50
+
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+HEARTBEAT_FRAME = b": keepalive\n\n"
+
+
+class _Change:
+    __slots__ = ("seq", "patient_id", "frame")
+
+    def __init__(self, seq: int, patient_id: int, frame: bytes):
+        self.seq = seq
+        self.patient_id = patient_id
+        self.frame = frame
+
+
+class _Subscriber:
+    """
+    A connected stream: the changes not yet sent to it and the event its
+    generator sleeps on. Costs no thread, only these few objects.
+    """
+    __slots__ = ("patient_ids", "pending", "wakeup", "overflowed")
+
+    def __init__(self, patient_ids: Optional[Set[int]]):
+        self.patient_ids = patient_ids
+        self.pending: Deque[_Change] = deque()
+        self.wakeup = asyncio.Event()
+        self.overflowed = False
+
+
+class ChangeFeed:
+    """
+    In-process fan-out of patient changes to server-sent-event streams.
+
+    publish may be called from any thread (the sync endpoints run in the
+    threadpool); delivery happens on the event loop of each subscriber. Every
+    change gets a sequence number, and the last CHANGE_FEED_BUFFER changes are
+    kept so reconnecting clients only miss what fell out of the buffer. Event ids
+    carry a token of this process, so ids from another worker or from before a
+    restart are recognised and answered with a resync.
+    """
+
+    def __init__(self, buffer_size: int = CHANGE_FEED_BUFFER, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq = 0
+        # Changes up to this sequence number were not published (see skip)
+        self._skipped_through = 0
+        self._buffer: Deque[_Change] = deque(maxlen=buffer_size)
+        self._subscribers: Dict[asyncio.AbstractEventLoop, Set[_Subscriber]] = {}
+        self._lock = threading.Lock()
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, events: Iterable[dict]) -> None:
+        """
+        Number, buffer and deliver change events (dicts with a patient_id).
+        """
+        with self._lock:
+            changes = []
+            for event in events:
+                self._seq += 1
+                event_id = f"{self.epoch}-{self._seq}"
+                frame = b"id: " + event_id.encode() + b"\nevent: change\ndata: " + to_json(event) + b"\n\n"
+                changes.append(_Change(self._seq, event["patient_id"], frame))
+            self._buffer.extend(changes)
+            loops = list(self._subscribers)
+        if not changes:
+            return
+
+        for loop in loops:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if loop is running:
+                self._deliver(loop, changes)
+            else:
+                try:
+                    # One wakeup per loop, however many subscribers it serves
+                    loop.call_soon_threadsafe(self._deliver, loop, changes)
+                except RuntimeError:  # loop closed
+                    with self._lock:
+                        self._subscribers.pop(loop, None)
+
+    def skip(self) -> None:
+        """
+        Record that changes were left unpublished because nothing listened, so
+        clients resuming from before them resync instead of missing them.
+        """
+        with self._lock:
+            self._seq += 1
+            self._skipped_through = self._seq
+
+    def _deliver(self, loop: asyncio.AbstractEventLoop, changes: List[_Change]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(loop, ()))
+        for subscriber in subscribers:
+            self._offer(subscriber, changes)
+
+    def _offer(self, subscriber: _Subscriber, changes: List[_Change]) -> None:
+        for change in changes:
+            if subscriber.patient_ids is not None and change.patient_id not in subscriber.patient_ids:
+                continue
+            if len(subscriber.pending) >= self.queue_size:
+                # The client has to refetch anyway, so drop its backlog
+                subscriber.pending.clear()
+                subscriber.overflowed = True
+                continue
+            subscriber.pending.append(change)
+        if subscriber.pending or subscriber.overflowed:
+            subscriber.wakeup.set()
+
+    def resync_all(self) -> None:
+        """
+        Tell every subscriber to refetch, e.g. after changes may have been lost.
+        """
+        with self._lock:
+            loops = {loop: list(subscribers) for loop, subscribers in self._subscribers.items()}
+        for loop, subscribers in loops.items():
+            loop.call_soon_threadsafe(self._mark_overflowed, subscribers)
+
+    @staticmethod
+    def _mark_overflowed(subscribers: List[_Subscriber]) -> None:
+        for subscriber in subscribers:
+            subscriber.pending.clear()
+            subscriber.overflowed = True
+            subscriber.wakeup.set()
+
+    def _replay(self, subscriber: _Subscriber, last_event_id: str) -> None:
+        epoch, _, seq = last_event_id.partition("-")
+        with self._lock:
+            oldest = self._buffer[0].seq if self._buffer else self._seq + 1
+            if (
+                epoch != self.epoch
+                or not seq.isdigit()
+                or int(seq) > self._seq
+                or int(seq) < max(oldest - 1, self._skipped_through)
+            ):
+                subscriber.overflowed = True
+                return
+            missed = [change for change in self._buffer if change.seq > int(seq)]
+        self._offer(subscriber, missed)
+
+    async def stream(
+        self,
+        patient_ids: Optional[Set[int]] = None,
+        last_event_id: Optional[str] = None,
+        heartbeat: float = CHANGE_FEED_HEARTBEAT_SECONDS,
+    ) -> AsyncIterator[bytes]:
+        """
+        text/event-stream frames of the changes of patient_ids (all patients when
+        None) published from now on, after those since last_event_id.
+        """
+        loop = asyncio.get_running_loop()
+        subscriber = _Subscriber(patient_ids)
+        with self._lock:
+            self._subscribers.setdefault(loop, set()).add(subscriber)
+        self._ensure_listener()
+        try:
+            # Register first, then replay: changes published in between are
+            # queued twice and skipped by their sequence number
+            if last_event_id:
+                self._replay(subscriber, last_event_id)
+            sent = 0
+            yield b"retry: 3000\n\n"
+            while True:
+                if subscriber.overflowed:
+                    subscriber.overflowed = False
+                    yield RESYNC_FRAME
+                while subscriber.pending:
+                    change = subscriber.pending.popleft()
+                    if change.seq > sent:
+                        sent = change.seq
+                        yield change.frame
+                subscriber.wakeup.clear()
+                if subscriber.pending or subscriber.overflowed:
+                    continue
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT_FRAME
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(loop)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[loop]
+
+    def _ensure_listener(self) -> None:
+        if CHANGE_FEED_BACKEND != "postgres" or (self._listener is not None and not self._listener.done()):
+            return
+        self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """
+        Relay NOTIFY payloads of CHANGE_FEED_CHANNEL to the local subscribers,
+        reconnecting (and telling subscribers to resync) when the connection drops.
+        """
+        import asyncpg  # only needed by the postgres backend
+
+        from database import DATABASE_URL
+
+        # asyncpg takes a plain libpq URL, without the SQLAlchemy driver suffix
+        scheme, rest = DATABASE_URL.split("://", 1)
+        dsn = scheme.split("+", 1)[0] + "://" + rest
+
+        def on_notify(connection, pid, channel, payload):
+            try:
+                self.publish(json.loads(payload))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.error(f"Invalid change feed notification: {str(e)}")
+
+        connected_before = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(CHANGE_FEED_CHANNEL, on_notify)
+                if connected_before:
+                    self.resync_all()
+                connected_before = True
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await lost.wait()
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.error(f"Change feed listener disconnected: {str(e)}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(5)
+
+
+change_feed = ChangeFeed()
+
+
+def patient_change_events(db: Session, patient_ids: Iterable[int]) -> List[dict]:
+    """
+    Change events with the current status of the patients, read in one query;
+    patients that no longer exist come back as deleted.
+    """
+    patient_ids = sorted(set(patient_ids))
+    rows = db.execute(
+        select(Patient.id, PatientSummary.status, PatientSummary.last_exam_date)
+        .outerjoin(PatientSummary, PatientSummary.patient_id == Patient.id)
+        .where(Patient.id.in_(patient_ids))
+    ).all()
+    found = {row.id: row for row in rows}
+    events = []
+    for patient_id in patient_ids:
+        row = found.get(patient_id)
+        if row is None:
+            events.append({"patient_id": patient_id, "deleted": True, "status": None, "last_exam_date": None})
+        else:
+            events.append({"patient_id": patient_id, "deleted": False, "status": row.status, "last_exam_date": row.last_exam_date})
+    return events
+
+
+def publish_patient_changes(db: Session, *patient_ids: Optional[int]) -> None:
+    """
+    Announce that the patients changed, after the write committed. Runs no query
+    when nothing would receive the changes. A failure is only logged: the write
+    already went through, and clients still see it on their next fetch.
+    """
+    patient_ids = {patient_id for patient_id in patient_ids if patient_id is not None}
+    if not patient_ids:
+        return
+    if CHANGE_FEED_BACKEND != "postgres" and not change_feed.subscriber_count:
+        change_feed.skip()
+        return
+    try:
+        events = patient_change_events(db, patient_ids)
+        if CHANGE_FEED_BACKEND != "postgres":
+            change_feed.publish(events)
+            return
+        for start in range(0, len(events), NOTIFY_BATCH):
+            payload = to_json(events[start:start + NOTIFY_BATCH]).decode()
+            db.execute(select(func.pg_notify(CHANGE_FEED_CHANNEL, payload)))
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Database error when publishing patient changes: {str(e)}")
@@ -0,0 +1,148 @@
+import enum
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+from sqlalchemy import Float, case, cast, func, literal, null
+
+
+class TreatmentStatus(enum.Enum):
+    ACTIVE_INFECTION = "Infecção Ativa"
+    UNDER_TREATMENT = "Em Tratamento"
+    MONITORING_CURE = "Curado"
+    CURED = "Curado"
+    REINFECTION = "Reinfecção"
+    UNKNOWN = "Desconhecido"
+
+
+# Qualitative results accepted by the schemas next to the "1:X" dilutions.
+# A reactive result without a dilution is treated as an active infection and a
+# non-reactive one as a titer below 1:1.
+NON_REACTIVE = "Non-reactive"
+REACTIVE = "Reactive"
+
+# The numeric titers titer_value and titer_value_sql parse, once stripped of
+# spaces: a dilution "1:X" and a bare X. Anything else has no value.
+TITER_DILUTION_PATTERN = r"^1:[0-9]+(\.[0-9]+)?$"
+TITER_NUMBER_PATTERN = r"^[0-9]+(\.[0-9]+)?$"
+
+
+def status_from_value(current_val: float) -> TreatmentStatus:
+    """
+    Interpret a numeric titer (the X of "1:X").
+    """
+    if current_val >= 32:
+        return TreatmentStatus.ACTIVE_INFECTION
+    elif 8 <= current_val < 32:
+        return TreatmentStatus.UNDER_TREATMENT
+    elif 1 <= current_val < 8:
+        return TreatmentStatus.MONITORING_CURE
+    elif current_val < 1:
+        return TreatmentStatus.CURED
+    else:
+        return TreatmentStatus.UNKNOWN
+
+
+@lru_cache(maxsize=1024)
+def _parse_titer_string(titer: str) -> Optional[float]:
+    value = titer.strip(" ")
+    if value.lower() == NON_REACTIVE.lower():
+        return 0.0
+    if re.fullmatch(TITER_DILUTION_PATTERN, value):
+        return float(value[2:])
+    if re.fullmatch(TITER_NUMBER_PATTERN, value):
+        return float(value)
+    return None
+
+
+def titer_value(titer) -> Optional[float]:
+    """
+    Numeric titer (the X of "1:X") of a stored result; 0 for "Non-reactive".
+    None for "Reactive" (no dilution) and anything that cannot be parsed.
+    """
+    if titer is None:
+        return None
+    if isinstance(titer, str):
+        return _parse_titer_string(titer)
+    try:
+        return float(titer)
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _status_from_string(titer: str) -> Optional[TreatmentStatus]:
+    if titer.strip(" ").lower() == REACTIVE.lower():
+        return TreatmentStatus.ACTIVE_INFECTION
+    current_val = _parse_titer_string(titer)
+    return status_from_value(current_val) if current_val is not None else None
+
+
+def syphilis_status_from_titer(current_titer):
+    """
+    Returns treatment status based on the current titer.
+    current_titer: "1:X" string, "Reactive"/"Non-reactive", or a number
+    Returns: TreatmentStatus enum member, or None if the titer cannot be interpreted
+    """
+    if current_titer is None:
+        return None
+    if isinstance(current_titer, str):
+        return _status_from_string(current_titer)
+    current_val = titer_value(current_titer)
+    return status_from_value(current_val) if current_val is not None else None
+
+
+def classify_titers(titers) -> List[Optional[TreatmentStatus]]:
+    """
+    Batched syphilis_status_from_titer over a column of titers (list, iterable or
+    NumPy array). Each distinct titer is classified once, so the cost is one dict
+    lookup per row.
+    """
+    if hasattr(titers, "ravel") and hasattr(titers, "tolist"):
+        # NumPy array: tolist() + dict lookups beats np.unique (a sort) for this tiny domain
+        titers = titers.ravel().tolist()
+
+    lookup = {}
+    result = []
+    for titer in titers:
+        try:
+            calculated_status = lookup[titer]
+        except KeyError:
+            calculated_status = lookup[titer] = syphilis_status_from_titer(titer)
+        except TypeError:  # unhashable values are classified individually
+            calculated_status = syphilis_status_from_titer(titer)
+        result.append(calculated_status)
+    return result
+
+
+def titer_value_sql(column):
+    """
+    SQL counterpart of titer_value for a titer_result column: the X of "1:X" (or a
+    bare number) as a float, 0 for "Non-reactive", NULL otherwise. Case and
+    surrounding spaces are ignored like in titer_value, and only strings
+    matching the patterns are cast, so malformed legacy values ("1:", "1:16 (rep)")
+    give NULL instead of failing the query on PostgreSQL.
+    """
+    value = func.lower(func.trim(column))
+    return case(
+        (value == NON_REACTIVE.lower(), literal(0.0)),
+        (value.regexp_match(TITER_DILUTION_PATTERN), cast(func.substr(value, 3), Float)),
+        (value.regexp_match(TITER_NUMBER_PATTERN), cast(value, Float)),
+        else_=null(),
+    )
+
+
+def titer_status_sql(column):
+    """
+    SQL counterpart of syphilis_status_from_titer(...).value for a titer column:
+    the status label, NULL when the titer cannot be interpreted.
+    """
+    value = titer_value_sql(column)
+    return case(
+        (func.lower(func.trim(column)) == REACTIVE.lower(), TreatmentStatus.ACTIVE_INFECTION.value),
+        (value >= 32, TreatmentStatus.ACTIVE_INFECTION.value),
+        (value >= 8, TreatmentStatus.UNDER_TREATMENT.value),
+        (value >= 1, TreatmentStatus.MONITORING_CURE.value),
+        (value < 1, TreatmentStatus.CURED.value),
+        else_=null(),
+    )
@@ -1,25 +1,196 @@
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import create_client, Client
 from dotenv import load_dotenv, find_dotenv
 
 _ = load_dotenv(find_dotenv())  # read local .env file
 
 SUPABASE_URL = os.environ["SUPABASE_URL"]
 SUPABASE_KEY = os.environ["SUPABASE_ANON_KEY"]
+# Legacy HS256 projects sign with this secret; asymmetric projects publish a JWKS instead
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_JWKS_URL = os.getenv(
+    "SUPABASE_JWKS_URL", f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
+)
 
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 security = HTTPBearer()
+_supabase = None
+
+
+def get_supabase():
+    """
+    Supabase client, created on first use: importing and building it is the most
+    expensive part of a cold start and most requests never need it.
+    """
+    global _supabase
+    if _supabase is None:
+        from supabase import create_client
+
+        _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _supabase
+
+
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+
+class TokenCache:
+    """
+    Bounded cache of validated token claims keyed by the SHA-256 of the token.
+    Entries expire with the token's own exp claim; the least recently used entry
+    is evicted when the cache is full.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def set(self, token: str, claims: Dict[str, Any]) -> None:
+        expires_at = claims.get("exp")
+        if expires_at is None:
+            return
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (float(expires_at), claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class JWTVerifier:
+    """
+    Verifies Supabase access tokens in-process.
+
+    HS256 tokens are checked against the project secret and asymmetric ones against
+    the cached JWKS (refetched by PyJWKClient when an unknown kid shows up, i.e. on
+    key rotation). Only when no local key can verify the token does it fall back to
+    the auth server, through remote_verify.
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        jwks_client: Optional[jwt.PyJWKClient] = None,
+        audience: Optional[str] = SUPABASE_JWT_AUDIENCE,
+        remote_verify: Optional[Callable[[str], Any]] = None,
+        cache: Optional[TokenCache] = None,
+        leeway: int = 0,
+    ):
+        self.secret = secret
+        self.jwks_client = jwks_client
+        self.audience = audience
+        self.remote_verify = remote_verify
+        self.cache = cache if cache is not None else TokenCache()
+        self.leeway = leeway
+
+    def _decode(self, token: str, key, algorithms) -> Dict[str, Any]:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=algorithms,
+            audience=self.audience,
+            leeway=self.leeway,
+            options={"require": ["exp", "sub"], "verify_aud": self.audience is not None},
+        )
+
+    def _local_key(self, token: str, header: Dict[str, Any]):
+        """
+        Signing key and allowed algorithms for the token, or None if no local key applies.
+        """
+        algorithm = header.get("alg")
+        if algorithm == "HS256" and self.secret:
+            return self.secret, ["HS256"]
+        if algorithm in ASYMMETRIC_ALGORITHMS and self.jwks_client is not None:
+            try:
+                signing_key = self.jwks_client.get_signing_key_from_jwt(token)
+            except jwt.PyJWKClientError:
+                return None
+            # Only the algorithm of the matched key (its JWK alg, or the one its type implies)
+            return signing_key.key, [signing_key.algorithm_name]
+        return None
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        claims = self.cache.get(token)
+        if claims is not None:
+            return claims
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError as e:
+            raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+
+        local_key = self._local_key(token, header)
+        try:
+            if local_key is not None:
+                claims = self._decode(token, *local_key)
+            elif self.remote_verify is not None:
+                # Reject expired or malformed tokens before paying for the round-trip
+                claims = jwt.decode(
+                    token,
+                    options={"verify_signature": False, "require": ["exp"]},
+                    leeway=self.leeway,
+                )
+                if not self.remote_verify(token):
+                    raise HTTPException(status_code=401, detail="Invalid token")
+            else:
+                raise HTTPException(status_code=401, detail="No key available to verify token")
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token has expired")
+        except jwt.InvalidTokenError as e:
+            raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=401, detail=str(e))
+
+        self.cache.set(token, claims)
+        return claims
+
+
+def _remote_verify(token: str):
+    return get_supabase().auth.get_user(token)
+
+
+jwt_verifier = JWTVerifier(
+    secret=SUPABASE_JWT_SECRET,
+    jwks_client=jwt.PyJWKClient(SUPABASE_JWKS_URL, cache_keys=True, lifespan=600),
+    remote_verify=_remote_verify,
+    cache=TokenCache(maxsize=int(os.getenv("JWT_CACHE_SIZE", "10000"))),
+)
 
 
 def verify_jwt(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    try:
-        user = supabase.auth.get_user(token)
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return user
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=str(e))
+    """
+    Returns the claims of a valid bearer token, raising 401 otherwise.
+    """
+    return jwt_verifier.verify(credentials.credentials)
@@ -1,26 +1,66 @@
-import uvicorn
-from api.routers.route import case_history_router, patient_router
+import os
+
 from dotenv import find_dotenv, load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 _ = load_dotenv(find_dotenv())
 
+from database import DATABASE_READ_URL  # noqa: E402
+from metrics import MetricsMiddleware  # reads its thresholds from the environment
+from replica import READ_YOUR_WRITES_HEADER, ReadYourWritesMiddleware  # noqa: E402
+
+# Comma-separated origins allowed to call the API; credentials (cookies) are
+# only allowed with an explicit list, browsers reject them with a wildcard
+CORS_ALLOW_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ALLOW_ORIGINS", "*").split(",") if origin.strip()]
 
 app = FastAPI()
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
+    allow_origins=CORS_ALLOW_ORIGINS,
+    allow_credentials="*" not in CORS_ALLOW_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
+    # The frontend reads the read-your-writes window from write responses
+    expose_headers=[READ_YOUR_WRITES_HEADER],
 )
+# Latency, SQL time and statement counts per route, served on /metrics
+app.add_middleware(MetricsMiddleware)
+# With a read replica, clients that just wrote read from the primary for a few seconds
+app.add_middleware(ReadYourWritesMiddleware, enabled=DATABASE_READ_URL is not None)
+
 
+# DATABASE_ASYNC=true serves the same endpoints on the async engine (see database.get_async_db)
+if os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes"):
+    from api.routers.async_route import async_case_history_router as case_history_router
+    from api.routers.async_route import async_patient_router as patient_router
+else:
+    from api.routers.route import case_history_router, patient_router
+
+from api.routers.analytics import analytics_router
+from api.routers.changes import changes_router
+from api.routers.export import export_router
+from api.routers.ingest import ingest_router, patient_import_router
+from api.routers.metrics import metrics_router
+from api.routers.purge import purge_router
+from api.routers.sync import sync_router
+from api.routers.treatments import treatments_router
 
 app.include_router(patient_router)
 app.include_router(case_history_router)
+app.include_router(ingest_router)
+app.include_router(patient_import_router)
+app.include_router(purge_router)
+app.include_router(export_router)
+app.include_router(analytics_router)
+app.include_router(treatments_router)
+app.include_router(changes_router)
+app.include_router(sync_router)
+app.include_router(metrics_router)
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,242 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Requests slower than this log every SQL statement they ran; statements slower
+# than SLOW_QUERY_MS are logged on their own
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Statements kept per request for the slow-request log
+MAX_LOGGED_STATEMENTS = 50
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Cumulative Prometheus histogram, one series per label tuple.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in sorted(snapshot):
+            label_pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                bucket_labels = ",".join(label_pairs + ['le="' + le + '"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = "{" + ",".join(label_pairs) + "}" if label_pairs else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for labels, value in snapshot:
+            label_pairs = ",".join(f'{name}="{_escape(label)}"' for name, label in zip(self.label_names, labels))
+            lines.append(f"{self.name}{{{label_pairs}}} {value}" if label_pairs else f"{self.name} {value}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by route and status code.", ["method", "route", "status"]
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ["method", "route"], LATENCY_BUCKETS
+)
+http_request_db_duration = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per HTTP request.", ["method", "route"], LATENCY_BUCKETS
+)
+http_request_db_statements = Histogram(
+    "http_request_db_statements", "SQL statements issued per HTTP request.", ["method", "route"], STATEMENT_COUNT_BUCKETS
+)
+db_statement_duration = Histogram(
+    "db_statement_duration_seconds", "SQL statement execution time by statement type.", ["operation"], LATENCY_BUCKETS
+)
+
+REGISTRY = [http_requests, http_request_duration, http_request_db_duration, http_request_db_statements, db_statement_duration]
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_time", "logged")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.logged: List[Tuple[float, str]] = []
+
+
+# Stats of the request being served; the engine hooks add to it
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _operation(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    db_statement_duration.observe(elapsed, _operation(statement))
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += elapsed
+        if len(stats.logged) < MAX_LOGGED_STATEMENTS:
+            stats.logged.append((elapsed, statement))
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning(f"Slow SQL statement ({elapsed * 1000:.1f} ms): {statement}")
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine) -> None:
+    """
+    Time every statement run on engine (a sync Engine; pass AsyncEngine.sync_engine).
+    """
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, SQL time and statement count per route
+    template, and logging the SQL of requests slower than SLOW_REQUEST_MS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: Dict[int, str] = {}
+
+    def _route(self, scope) -> str:
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            # Unmatched paths share one label so 404 scans cannot blow up cardinality
+            return "unmatched"
+        template = self._templates.get(id(endpoint))
+        if template is None:
+            template = next(
+                (route.path for route in scope["app"].routes if getattr(route, "endpoint", None) is endpoint),
+                "unmatched",
+            )
+            self._templates[id(endpoint)] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        event_stream = False
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code, event_stream
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                event_stream = any(
+                    name.lower() == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", ())
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            method, route = scope["method"], self._route(scope)
+            http_requests.inc(method, route, str(status_code))
+            # Server-sent event streams stay open as long as the client listens,
+            # so their duration says nothing about latency
+            if not event_stream:
+                http_request_duration.observe(elapsed, method, route)
+                http_request_db_duration.observe(stats.db_time, method, route)
+                http_request_db_statements.observe(stats.statements, method, route)
+                if elapsed * 1000 >= SLOW_REQUEST_MS:
+                    _log_slow_request(method, scope["path"], elapsed, stats)
+
+
+def _log_slow_request(method: str, path: str, elapsed: float, stats: RequestStats) -> None:
+    lines = [
+        f"Slow request {method} {path}: {elapsed * 1000:.1f} ms, "
+        f"{stats.statements} SQL statements in {stats.db_time * 1000:.1f} ms"
+    ]
+    lines.extend(f"  {duration * 1000:8.1f} ms  {statement}" for duration, statement in stats.logged)
+    if stats.statements > len(stats.logged):
+        lines.append(f"  ... {stats.statements - len(stats.logged)} more")
+    logger.warning("\n".join(lines))
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
@@ -4,39 +4,68 @@ from typing import List, Optional
 
 from database import Base
 from sqlalchemy import (
+    DDL,
     JSON,
     Boolean,
     Column,
     Date,
     DateTime,
     Enum,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    Uuid,
+    event,
     func,
 )
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
 
 class Patient(Base):
     __tablename__ = "patients"
-    __table_args__ = {"schema": "public"}
+    __table_args__ = (
+        # Trigram index behind prefix/substring MRN search (see search.py)
+        Index(
+            "ix_patients_medical_record_number_trgm",
+            "medical_record_number",
+            postgresql_using="gin",
+            postgresql_ops={"medical_record_number": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # Delta sync pages through changed rows in (updated_at, id) order (see sync.py)
+        Index("ix_patients_updated_at_id", "updated_at", "id"),
+        {"schema": "public"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     medical_record_number = Column(String(20), unique=True, index=True)
     diagnosis_date = Column(Date)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
-    case_histories = relationship("SyphilisCaseHistory", back_populates="patient", cascade="all, delete-orphan")
+    # The database deletes the children (ON DELETE CASCADE); passive_deletes keeps the
+    # ORM from loading them just to delete them one by one
+    case_histories = relationship(
+        "SyphilisCaseHistory", back_populates="patient", cascade="all, delete-orphan", passive_deletes=True
+    )
+    summary = relationship(
+        "PatientSummary", back_populates="patient", uselist=False, cascade="all, delete-orphan", passive_deletes=True
+    )
+
+
+event.listen(
+    Patient.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
 
 
 class Profile(Base):
     __tablename__ = "profiles"
     __table_args__ = {"schema": "public"}
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String, nullable=False, unique=True)
     created_at = Column(DateTime, server_default=func.now())
     full_name = Column(String(100))
@@ -46,11 +75,25 @@ class Profile(Base):
 # New consolidated model that merges SyphilisCase, Treatment, and FollowUpTest
 class SyphilisCaseHistory(Base):
     __tablename__ = "syphilis_case_histories"
-    __table_args__ = {"schema": "public"}
+    __table_args__ = (
+        # Every per-patient read walks this index: newest first (scanned backwards) in
+        # route.py and summaries.py, oldest first in the analytics windows. The
+        # included titer makes the latest-titer and trend lookups index-only on PostgreSQL.
+        Index(
+            "ix_syphilis_case_histories_patient_id_diagnosis_date",
+            "patient_id",
+            "diagnosis_date",
+            "created_at",
+            "id",
+            postgresql_include=["titer_result"],
+        ),
+        Index("ix_syphilis_case_histories_updated_at_id", "updated_at", "id"),
+        {"schema": "public"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("public.patients.id"), nullable=False, index=True)
-    titer_result = Column(String(100), index=True)
+    id = Column(Integer, primary_key=True)
+    patient_id = Column(Integer, ForeignKey("public.patients.id", ondelete="CASCADE"), nullable=False)
+    titer_result = Column(String(100))
     diagnosis_date = Column(Date)
     # Treatment information stored as JSON
     treatments = Column(
@@ -62,3 +105,96 @@ class SyphilisCaseHistory(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     patient = relationship("Patient", back_populates="case_histories")
+    treatment_doses = relationship(
+        "TreatmentDose", back_populates="case_history", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+
+# Per-patient projection of the case histories, maintained on every history write
+# so list reads never have to aggregate syphilis_case_histories.
+class PatientSummary(Base):
+    __tablename__ = "patient_summaries"
+    __table_args__ = (
+        # Matches the /patients/page order (last_exam_date DESC NULLS LAST, id DESC) on
+        # PostgreSQL; elsewhere a backward scan of the plain index gives the same order
+        Index(
+            "ix_patient_summaries_last_exam_date_patient_id",
+            "last_exam_date",
+            "patient_id",
+            postgresql_ops={"last_exam_date": "DESC NULLS LAST", "patient_id": "DESC"},
+        ),
+        # Cohort pages: one status in the same order, and the highest titers first
+        Index(
+            "ix_patient_summaries_status_last_exam_date_patient_id",
+            "status",
+            "last_exam_date",
+            "patient_id",
+            postgresql_ops={"last_exam_date": "DESC NULLS LAST", "patient_id": "DESC"},
+        ),
+        Index(
+            "ix_patient_summaries_latest_titer_value_patient_id",
+            "latest_titer_value",
+            "patient_id",
+            postgresql_ops={"latest_titer_value": "DESC NULLS LAST", "patient_id": "DESC"},
+        ),
+        {"schema": "public"},
+    )
+
+    patient_id = Column(Integer, ForeignKey("public.patients.id", ondelete="CASCADE"), primary_key=True)
+    first_exam_date = Column(Date, nullable=True)
+    last_exam_date = Column(Date, nullable=True)
+    latest_history_id = Column(Integer, nullable=True)
+    latest_titer = Column(String(100), nullable=True)
+    # The X of latest_titer ("1:X"), 0 when non-reactive, so titers compare and sort
+    latest_titer_value = Column(Float, nullable=True)
+    status = Column(String(50), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    patient = relationship("Patient", back_populates="summary")
+
+
+# Doses of SyphilisCaseHistory.treatments, one row per treatment date, so medication
+# and date questions go through indexes instead of scanning the JSON. Derived from
+# the JSON column, which stays the source of truth (see treatments.py).
+class TreatmentDose(Base):
+    __tablename__ = "treatment_doses"
+    __table_args__ = (
+        # varchar_pattern_ops lets medication prefix searches use the index too
+        Index(
+            "ix_treatment_doses_medication_key_dose_date",
+            "medication_key",
+            "dose_date",
+            postgresql_ops={"medication_key": "varchar_pattern_ops"},
+        ),
+        Index("ix_treatment_doses_patient_id_dose_date", "patient_id", "dose_date"),
+        {"schema": "public"},
+    )
+
+    id = Column(Integer, primary_key=True)
+    case_history_id = Column(
+        Integer, ForeignKey("public.syphilis_case_histories.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    patient_id = Column(Integer, ForeignKey("public.patients.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)  # index of the treatment in the JSON list
+    medication = Column(String(255), nullable=True)
+    medication_key = Column(String(255), nullable=True)  # lowercased, whitespace-collapsed medication
+    dose_number = Column(Integer, nullable=True)
+    dose_date = Column(Date, nullable=True)
+
+    case_history = relationship("SyphilisCaseHistory", back_populates="treatment_doses")
+
+
+# Tombstones of deleted rows, so delta sync clients learn about deletions (see sync.py).
+# Kept for SYNC_TOMBSTONE_RETENTION_DAYS; older sync tokens have to start over.
+class DeletedRecord(Base):
+    __tablename__ = "deleted_records"
+    __table_args__ = (
+        Index("ix_deleted_records_table_name_deleted_at_id", "table_name", "deleted_at", "id"),
+        {"schema": "public"},
+    )
+
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String(64), nullable=False)  # "patients" or "syphilis_case_histories"
+    record_id = Column(Integer, nullable=False)
+    patient_id = Column(Integer, nullable=True)  # no foreign key: the patient is gone too
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
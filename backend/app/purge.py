@@ -0,0 +1,131 @@
+import argparse
+import os
+from datetime import date
+from typing import Iterable, List, Optional
+
+from cache import invalidate_patients
+from changes import publish_patient_changes
+from models import Patient, PatientSummary
+from search import unindex_patient
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sync import record_deletions
+
+# Patients deleted per transaction by purge_patients. Each chunk holds its row
+# locks only until it commits, so concurrent writers wait at most one chunk.
+PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", "500"))
+
+
+def delete_patients(db: Session, patient_ids: Iterable[int]) -> List[int]:
+    """
+    Delete the patients, with their tombstones, in one DELETE; the database
+    cascades it to their case histories, doses and summaries. Returns the ids
+    that existed. Does not commit.
+    """
+    patient_ids = list(patient_ids)
+    if not patient_ids:
+        return []
+    record_deletions(db, patient_ids)
+    deleted = db.scalars(delete(Patient).where(Patient.id.in_(patient_ids)).returning(Patient.id)).all()
+    # Core deletes bypass the flush hooks that maintain the fallback index
+    for patient_id in deleted:
+        unindex_patient(db, patient_id)
+    return deleted
+
+
+def purge_filters(
+    ids: Optional[List[int]] = None,
+    diagnosed_before: Optional[date] = None,
+    last_exam_before: Optional[date] = None,
+    status: Optional[str] = None,
+) -> list:
+    """
+    WHERE conditions on patients joined to their summaries selecting the patients
+    to purge; every given criterion has to match. Raises ValueError without any,
+    so a purge never selects the whole registry by accident.
+    """
+    conditions = []
+    if ids:
+        conditions.append(Patient.id.in_(ids))
+    if diagnosed_before is not None:
+        conditions.append(Patient.diagnosis_date < diagnosed_before)
+    if last_exam_before is not None:
+        conditions.append(PatientSummary.last_exam_date < last_exam_before)
+    if status is not None:
+        conditions.append(PatientSummary.status == status)
+    if not conditions:
+        raise ValueError("Give ids or at least one criterion to purge by")
+    return conditions
+
+
+def purge_patients(
+    db: Session,
+    ids: Optional[List[int]] = None,
+    diagnosed_before: Optional[date] = None,
+    last_exam_before: Optional[date] = None,
+    status: Optional[str] = None,
+    dry_run: bool = False,
+    chunk_size: int = PURGE_CHUNK_SIZE,
+) -> dict:
+    """
+    Delete the patients matching the criteria (see purge_filters), chunk_size at a
+    time in id order, committing each chunk. A failing chunk rolls back alone; the
+    chunks before it stay deleted. With dry_run, only counts the matches.
+    """
+    conditions = purge_filters(ids, diagnosed_before, last_exam_before, status)
+    candidates = select(Patient.id).outerjoin(PatientSummary, PatientSummary.patient_id == Patient.id).where(*conditions)
+    if dry_run:
+        matched = db.scalar(select(func.count()).select_from(candidates.subquery()))
+        db.rollback()
+        return {"matched": matched, "deleted": 0, "chunks": 0, "dry_run": True}
+
+    deleted = chunks = 0
+    last_id = 0
+    while True:
+        chunk = db.scalars(candidates.where(Patient.id > last_id).order_by(Patient.id).limit(chunk_size)).all()
+        if not chunk:
+            break
+        try:
+            deleted_ids = delete_patients(db, chunk)
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+        invalidate_patients(*deleted_ids)
+        publish_patient_changes(db, *deleted_ids)
+        deleted += len(deleted_ids)
+        chunks += 1
+        last_id = chunk[-1]
+    return {"matched": deleted, "deleted": deleted, "chunks": chunks, "dry_run": False}
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Delete patients by id or retention criteria, in chunks.")
+    parser.add_argument("--ids", type=int, nargs="*")
+    parser.add_argument("--diagnosed-before", type=date.fromisoformat)
+    parser.add_argument("--last-exam-before", type=date.fromisoformat)
+    parser.add_argument("--status")
+    parser.add_argument("--chunk-size", type=int, default=PURGE_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = purge_patients(
+            db,
+            ids=args.ids,
+            diagnosed_before=args.diagnosed_before,
+            last_exam_before=args.last_exam_before,
+            status=args.status,
+            dry_run=args.dry_run,
+            chunk_size=args.chunk_size,
+        )
+        if args.dry_run:
+            print(f"{result['matched']} patients would be purged")
+        else:
+            print(f"Purged {result['deleted']} patients in {result['chunks']} chunks")
+    finally:
+        db.close()
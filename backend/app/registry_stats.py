@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Dict, Hashable, Optional, Tuple
+
+from cache import CachedResponse, cache_entry
+from classification import classify_titers, titer_value
+from models import Patient, PatientSummary, SyphilisCaseHistory
+from pydantic_core import to_json
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+# Dashboards see statistics at most this old; each snapshot is recomputed once
+# per period however many views it serves
+STATISTICS_MAX_AGE_SECONDS = float(os.getenv("STATISTICS_MAX_AGE_SECONDS", "300"))
+# Distinct (since, until) ranges kept
+MAX_SNAPSHOTS = 32
+
+_snapshots: "OrderedDict[Hashable, Tuple[float, CachedResponse]]" = OrderedDict()
+_key_locks: Dict[Hashable, threading.Lock] = {}
+_lock = threading.Lock()
+
+
+def month_sql(column, dialect_name: str):
+    """
+    "YYYY-MM" of a date column, for GROUP BY month.
+    """
+    if dialect_name == "postgresql":
+        return func.to_char(column, "YYYY-MM")
+    return func.strftime("%Y-%m", column)
+
+
+def _in_range(column, since: Optional[date], until: Optional[date]) -> list:
+    conditions = [column.is_not(None)]
+    if since is not None:
+        conditions.append(column >= since)
+    if until is not None:
+        conditions.append(column <= until)
+    return conditions
+
+
+def compute_registry_statistics(db: Session, since: Optional[date] = None, until: Optional[date] = None) -> dict:
+    """
+    Registry statistics in schemas.RegistryStatistics shape, from GROUP BY queries:
+    patient status distribution (patient_summaries), monthly incidence between
+    since and until, and the titer histogram of all case histories.
+    """
+    dialect_name = db.get_bind().dialect.name
+
+    patients = db.execute(select(func.count()).select_from(Patient)).scalar_one()
+    case_histories = db.execute(select(func.count()).select_from(SyphilisCaseHistory)).scalar_one()
+
+    # Cured means a non-reactive latest titer: the "Curado" status also covers
+    # patients still monitored at 1:1 to 1:4 (TreatmentStatus.CURED aliases MONITORING_CURE)
+    status_counts = db.execute(
+        select(
+            PatientSummary.status,
+            func.count(),
+            func.sum(case((PatientSummary.latest_titer_value < 1, 1), else_=0)),
+        ).group_by(PatientSummary.status)
+    ).all()
+    by_status = {status_value: count for status_value, count, _ in status_counts}
+    # Patients without a summary row have no status either
+    by_status[None] = by_status.get(None, 0) + patients - sum(by_status.values())
+    classified = sum(count for status_value, count in by_status.items() if status_value is not None)
+    cured = sum(cured_count or 0 for _, _, cured_count in status_counts)
+
+    months: Dict[str, dict] = {}
+
+    def month(key: str) -> dict:
+        return months.setdefault(key, {"month": key, "new_patients": 0, "patients_examined": 0, "case_histories": 0})
+
+    first_exam_month = month_sql(PatientSummary.first_exam_date, dialect_name).label("month")
+    for key, count in db.execute(
+        select(first_exam_month, func.count())
+        .where(*_in_range(PatientSummary.first_exam_date, since, until))
+        .group_by(first_exam_month)
+    ):
+        month(key)["new_patients"] = count
+
+    exam_month = month_sql(SyphilisCaseHistory.diagnosis_date, dialect_name).label("month")
+    for key, examined, count in db.execute(
+        select(exam_month, func.count(SyphilisCaseHistory.patient_id.distinct()), func.count())
+        .where(*_in_range(SyphilisCaseHistory.diagnosis_date, since, until))
+        .group_by(exam_month)
+    ):
+        month(key)["patients_examined"] = examined
+        month(key)["case_histories"] = count
+
+    titer_counts = db.execute(
+        select(SyphilisCaseHistory.titer_result, func.count()).group_by(SyphilisCaseHistory.titer_result)
+    ).all()
+    titer_statuses = classify_titers([titer for titer, _ in titer_counts])
+    histogram = [
+        {
+            "titer_result": titer,
+            "case_histories": count,
+            "status": titer_status.value if titer_status else None,
+        }
+        for (titer, count), titer_status in zip(titer_counts, titer_statuses)
+    ]
+    # Non-reactive, then by dilution, then qualitative and missing results
+    histogram.sort(key=lambda bucket: (
+        titer_value(bucket["titer_result"]) is None,
+        titer_value(bucket["titer_result"]) or 0,
+        bucket["titer_result"] or "~",
+    ))
+
+    return {
+        "generated_at": datetime.now(timezone.utc),
+        "since": since,
+        "until": until,
+        "patients": patients,
+        "case_histories": case_histories,
+        "cure_rate": cured / classified if classified else None,
+        "status_distribution": [
+            {"status": status_value, "patients": count}
+            for status_value, count in sorted(by_status.items(), key=lambda item: -item[1])
+            if count
+        ],
+        "monthly_incidence": [months[key] for key in sorted(months)],
+        "titer_histogram": histogram,
+    }
+
+
+def registry_statistics_entry(
+    db: Session, since: Optional[date] = None, until: Optional[date] = None, refresh: bool = False
+) -> CachedResponse:
+    """
+    Encoded statistics for the range and their ETag, recomputed when older than
+    STATISTICS_MAX_AGE_SECONDS or when refresh is set. Concurrent requests for an
+    expired snapshot wait for a single recomputation.
+    """
+    key = (since, until)
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        with _lock:
+            snapshot = _snapshots.get(key)
+        if snapshot is not None and not refresh and time.monotonic() - snapshot[0] < STATISTICS_MAX_AGE_SECONDS:
+            with _lock:
+                if key in _snapshots:
+                    _snapshots.move_to_end(key)
+            return snapshot[1]
+
+        try:
+            entry = cache_entry(to_json(compute_registry_statistics(db, since, until)))
+        except BaseException:
+            # Without a snapshot nothing evicts the lock later, so _key_locks only
+            # holds the keys of stored snapshots (at most MAX_SNAPSHOTS)
+            with _lock:
+                if key not in _snapshots and _key_locks.get(key) is key_lock:
+                    del _key_locks[key]
+            raise
+        with _lock:
+            _snapshots[key] = (time.monotonic(), entry)
+            _snapshots.move_to_end(key)
+            while len(_snapshots) > MAX_SNAPSHOTS:
+                evicted, _ = _snapshots.popitem(last=False)
+                _key_locks.pop(evicted, None)
+        return entry
@@ -0,0 +1,57 @@
+import os
+import time
+
+from fastapi import Request
+
+# After a successful write a client reads from the primary for this long, so it
+# sees its own writes even while the replica lags behind
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# Set on successful write responses; the client sends it back on its reads. A
+# header rather than a cookie, so it works for the cross-origin frontend without
+# credentialed CORS. main.py exposes it to browser scripts.
+READ_YOUR_WRITES_HEADER = "X-Read-Primary-Until"
+
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def reads_from_primary(request: Request) -> bool:
+    """
+    Whether request comes from a client inside its read-your-writes window.
+    Windows longer than READ_YOUR_WRITES_SECONDS are ignored, so a client cannot
+    pin itself to the primary.
+    """
+    until = request.headers.get(READ_YOUR_WRITES_HEADER)
+    if until is None:
+        return False
+    try:
+        remaining = float(until) - time.time()
+    except ValueError:
+        return False
+    return 0 < remaining <= READ_YOUR_WRITES_SECONDS
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware giving clients that wrote successfully an X-Read-Primary-Until
+    header; echoed back on their reads, it sends them to the primary for
+    READ_YOUR_WRITES_SECONDS (see database.get_read_db).
+    Only useful with a read replica; pass enabled=False to make it a no-op.
+    """
+
+    def __init__(self, app, enabled: bool = True):
+        self.app = app
+        self.enabled = enabled and READ_YOUR_WRITES_SECONDS > 0
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["method"] not in _WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}"
+                header = (READ_YOUR_WRITES_HEADER.lower().encode(), until.encode())
+                message = {**message, "headers": list(message.get("headers", [])) + [header]}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -43,6 +43,11 @@ class PatientListResponse(BaseModel):
         from_attributes = True
 
 
+class PatientPage(BaseModel):
+    items: List[PatientListResponse] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
 class SyphilisCaseHistoryBase(TunedModel):
     patient_id: int
     diagnosis_date: date
@@ -68,6 +73,25 @@ class SyphilisCaseHistoryCreate(SyphilisCaseHistoryBase):
             )
 
 
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+
+class BulkIngestResult(BaseModel):
+    received: int = 0
+    inserted: int = 0
+    errors: List[BulkRowError] = Field(default_factory=list)
+
+
+class PatientImportResult(BaseModel):
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[BulkRowError] = Field(default_factory=list)
+
+
 class SyphilisCaseHistoryUpdate(TunedModel):
     patient_id: Optional[int] = None
     diagnosis_date: Optional[date] = None
@@ -100,6 +124,84 @@ class SyphilisCaseHistoryDetail(SyphilisCaseHistory):
     pass
 
 
+class TiterTrendPoint(BaseModel):
+    history_id: int
+    diagnosis_date: Optional[date] = None
+    titer_result: Optional[str] = None
+    titer_value: Optional[float] = None
+    fold_change_previous: Optional[float] = None
+    fold_change_baseline: Optional[float] = None
+    status: Optional[str] = None
+
+
+class PatientTiterTrend(BaseModel):
+    patient_id: int
+    status: Optional[str] = None
+    series: List[TiterTrendPoint] = Field(default_factory=list)
+
+
+class TiterTrendPage(BaseModel):
+    items: List[PatientTiterTrend] = Field(default_factory=list)
+    next_after_patient_id: Optional[int] = None
+
+
+class StatusCount(BaseModel):
+    status: Optional[str] = None
+    patients: int
+
+
+class MonthlyIncidence(BaseModel):
+    month: str  # YYYY-MM
+    new_patients: int = 0  # patients whose first exam falls in the month
+    patients_examined: int = 0
+    case_histories: int = 0
+
+
+class TiterBucket(BaseModel):
+    titer_result: Optional[str] = None
+    case_histories: int
+    status: Optional[str] = None
+
+
+class RegistryStatistics(BaseModel):
+    generated_at: datetime
+    since: Optional[date] = None
+    until: Optional[date] = None
+    patients: int
+    case_histories: int
+    cure_rate: Optional[float] = None  # share of the patients with a status whose latest titer is non-reactive
+    status_distribution: List[StatusCount] = Field(default_factory=list)
+    monthly_incidence: List[MonthlyIncidence] = Field(default_factory=list)
+    titer_histogram: List[TiterBucket] = Field(default_factory=list)
+
+
+class TreatmentDose(BaseModel):
+    id: int
+    case_history_id: int
+    patient_id: int
+    medication: Optional[str] = None
+    dose_number: Optional[int] = None
+    dose_date: Optional[date] = None
+
+
+class TreatmentDosePage(BaseModel):
+    items: List[TreatmentDose] = Field(default_factory=list)
+    next_after_id: Optional[int] = None
+
+
+class TreatedPatient(BaseModel):
+    patient_id: int
+    medical_record_number: str
+    doses: int
+    first_dose_date: Optional[date] = None
+    last_dose_date: Optional[date] = None
+
+
+class PatientBatchRequest(BaseModel):
+    ids: List[int] = Field(default_factory=list, max_length=500)
+    medical_record_numbers: List[str] = Field(default_factory=list, max_length=500)
+
+
 class PatientDetailResponse(Patient):
     syphilis_case_history: List[SyphilisCaseHistory] = Field(
         default_factory=list, serialization_alias='case_histories'
@@ -107,3 +209,48 @@ class PatientDetailResponse(Patient):
     
     class Config:
         from_attributes = True
+
+
+class SyncedPatient(BaseModel):
+    id: int
+    medical_record_number: str
+    diagnosis_date: Optional[date] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class DeletedRecord(BaseModel):
+    id: int  # id of the deleted row
+    patient_id: Optional[int] = None
+    deleted_at: datetime
+
+
+class PatientSyncPage(BaseModel):
+    items: List[SyncedPatient] = Field(default_factory=list)
+    deleted: List[DeletedRecord] = Field(default_factory=list)
+    next_token: str
+    has_more: bool = False
+
+
+class CaseHistorySyncPage(BaseModel):
+    items: List[SyphilisCaseHistory] = Field(default_factory=list)
+    deleted: List[DeletedRecord] = Field(default_factory=list)
+    next_token: str
+    has_more: bool = False
+
+
+class PatientPurgeRequest(BaseModel):
+    # Patients matching all the given criteria are deleted
+    ids: List[int] = Field(default_factory=list, max_length=10000)
+    diagnosed_before: Optional[date] = None
+    last_exam_before: Optional[date] = None
+    status: Optional[str] = None
+    dry_run: bool = False
+    chunk_size: int = Field(500, ge=1, le=5000)
+
+
+class PatientPurgeResult(BaseModel):
+    matched: int = 0
+    deleted: int = 0
+    chunks: int = 0
+    dry_run: bool = False
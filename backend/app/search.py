@@ -0,0 +1,195 @@
+import heapq
+import threading
+from typing import Dict, Iterable, List, Literal, Optional, Set
+
+from models import Patient
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import Session
+
+SearchMode = Literal["prefix", "substring"]
+
+NGRAM_SIZE = 3
+
+# Most NgramIndex ids bound in one IN list; SQLite caps the bound parameters of a
+# statement (999 before 3.32)
+MRN_SEARCH_MAX_CANDIDATES = 500
+
+
+def _ngrams(value: str) -> Set[str]:
+    return {value[i:i + NGRAM_SIZE] for i in range(len(value) - NGRAM_SIZE + 1)}
+
+
+def _matches(mrn: str, term: str, mode: SearchMode) -> bool:
+    return mrn.startswith(term) if mode == "prefix" else term in mrn
+
+
+def _rank_key(mrn: str, term: str):
+    # Exact match first, then prefix matches, then the shortest (closest) MRNs
+    return (mrn != term, not mrn.startswith(term), len(mrn), mrn)
+
+
+class NgramIndex:
+    """
+    In-process trigram index over medical record numbers, used where pg_trgm is not
+    available (SQLite in development and tests). Built from the database on first use
+    and kept current by the session hooks below, which apply committed writes only;
+    it only sees writes made by this process, so it is not meant for multi-worker
+    deployments.
+    """
+
+    def __init__(self):
+        self._mrns: Dict[int, str] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def add(self, patient_id: int, mrn: Optional[str]) -> None:
+        with self._lock:
+            self.discard(patient_id)
+            if mrn is None:
+                return
+            value = mrn.lower()
+            self._mrns[patient_id] = value
+            for gram in _ngrams(value):
+                self._postings.setdefault(gram, set()).add(patient_id)
+
+    def discard(self, patient_id: int) -> None:
+        with self._lock:
+            value = self._mrns.pop(patient_id, None)
+            if value is None:
+                return
+            for gram in _ngrams(value):
+                posting = self._postings.get(gram)
+                if posting is not None:
+                    posting.discard(patient_id)
+                    if not posting:
+                        del self._postings[gram]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._mrns.clear()
+            self._postings.clear()
+            self._loaded = False
+
+    def load(self, db: Session) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            for patient_id, mrn in db.execute(
+                select(Patient.id, Patient.medical_record_number).execution_options(yield_per=10000)
+            ):
+                self.add(patient_id, mrn)
+            self._loaded = True
+
+    def search(self, term: str, mode: SearchMode = "substring", limit: Optional[int] = None) -> List[int]:
+        """
+        Patient ids whose MRN matches term (case-insensitive), best matches first.
+        """
+        term = term.lower()
+        with self._lock:
+            grams = _ngrams(term)
+            if grams:
+                postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+                candidates: Iterable[int] = set.intersection(*postings) if postings[0] else set()
+            else:
+                # Terms shorter than a trigram cannot use the postings
+                candidates = self._mrns.keys()
+            matches = [
+                (self._mrns[patient_id], patient_id)
+                for patient_id in candidates
+                if _matches(self._mrns[patient_id], term, mode)
+            ]
+        def rank(match):
+            return _rank_key(match[0], term)
+
+        if limit is not None:
+            matches = heapq.nsmallest(limit, matches, key=rank)
+        else:
+            matches.sort(key=rank)
+        return [patient_id for _, patient_id in matches]
+
+
+mrn_index = NgramIndex()
+
+
+# session.info key of the index changes waiting for the session to commit
+_PENDING_INDEX_CHANGES = "mrn_index_pending"
+
+
+def index_patient(db: Session, patient_id: int, mrn: Optional[str]) -> None:
+    """
+    Queue a change of the fallback index (mrn None removes the patient); it is
+    applied when db commits and dropped if it rolls back. Flushed Patient objects
+    are queued by the hooks below; Core INSERT/UPDATE/DELETE statements bypass
+    them and have to call this themselves.
+    """
+    db.info.setdefault(_PENDING_INDEX_CHANGES, {})[patient_id] = mrn
+
+
+def unindex_patient(db: Session, patient_id: int) -> None:
+    index_patient(db, patient_id, None)
+
+
+@event.listens_for(Session, "after_flush")
+def _queue_flushed_patients(session, flush_context):
+    for target in (*session.new, *session.dirty):
+        if isinstance(target, Patient):
+            index_patient(session, target.id, target.medical_record_number)
+    for target in session.deleted:
+        if isinstance(target, Patient):
+            unindex_patient(session, target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_index_changes(session):
+    changes = session.info.pop(_PENDING_INDEX_CHANGES, None)
+    if changes and mrn_index._loaded:
+        for patient_id, mrn in changes.items():
+            mrn_index.add(patient_id, mrn)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_index_changes(session):
+    session.info.pop(_PENDING_INDEX_CHANGES, None)
+
+
+def uses_trigram_index(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def mrn_search_filter(db: Session, term: str, mode: SearchMode = "substring", limit: Optional[int] = None):
+    """
+    WHERE clause matching patients by MRN (case-insensitive) through an index:
+    the pg_trgm GIN index on PostgreSQL, the in-process NgramIndex elsewhere.
+    Elsewhere the index ids are bound as an IN list: give limit when the query
+    orders by mrn_search_rank and keeps that many rows, so only the best-ranked
+    ids are bound; without it, terms matching more than MRN_SEARCH_MAX_CANDIDATES
+    patients fall back to a LIKE scan.
+    """
+    if mode == "prefix":
+        like = Patient.medical_record_number.istartswith(term, autoescape=True)
+    else:
+        like = Patient.medical_record_number.icontains(term, autoescape=True)
+    if uses_trigram_index(db):
+        return like
+    mrn_index.load(db)
+    if limit is not None:
+        return Patient.id.in_(mrn_index.search(term, mode, limit=min(limit, MRN_SEARCH_MAX_CANDIDATES)))
+    candidates = mrn_index.search(term, mode, limit=MRN_SEARCH_MAX_CANDIDATES + 1)
+    if len(candidates) > MRN_SEARCH_MAX_CANDIDATES:
+        return like
+    return Patient.id.in_(candidates)
+
+
+def mrn_search_rank(term: str):
+    """
+    ORDER BY expressions ranking exact, then prefix, then shorter MRN matches first.
+    """
+    mrn = func.lower(Patient.medical_record_number)
+    lowered = term.lower()
+    return [
+        case((mrn == lowered, 0), else_=1),
+        case((Patient.medical_record_number.istartswith(term, autoescape=True), 0), else_=1),
+        func.length(Patient.medical_record_number),
+        Patient.medical_record_number,
+    ]
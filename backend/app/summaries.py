@@ -0,0 +1,336 @@
+import argparse
+from datetime import date
+from typing import Iterable, Iterator, List, Optional
+
+from classification import syphilis_status_from_titer, titer_value
+from database import dialect_insert
+from models import Patient, PatientSummary, SyphilisCaseHistory
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.orm import Session
+
+
+def status_value(titer: Optional[str]) -> Optional[str]:
+    """
+    Status label stored in patient_summaries for a titer, or None when it cannot be classified.
+    """
+    calculated_status = syphilis_status_from_titer(titer)
+    return calculated_status.value if calculated_status else None
+
+
+def _set_latest(summary: PatientSummary, history: SyphilisCaseHistory) -> None:
+    summary.last_exam_date = history.diagnosis_date
+    summary.latest_history_id = history.id
+    summary.latest_titer = history.titer_result
+    summary.latest_titer_value = titer_value(history.titer_result)
+    summary.status = status_value(history.titer_result)
+
+
+def _locked_summary(db: Session, patient_id: int) -> PatientSummary:
+    """
+    The patient's summary row, locked until the transaction ends. A missing row is
+    created first; ON CONFLICT lets concurrent first writes both go through.
+    """
+    summary = db.get(PatientSummary, patient_id, with_for_update=True)
+    if summary is None:
+        db.execute(
+            dialect_insert(db, PatientSummary.__table__)
+            .values(patient_id=patient_id)
+            .on_conflict_do_nothing(index_elements=[PatientSummary.patient_id])
+        )
+        summary = db.get(PatientSummary, patient_id, with_for_update=True)
+    return summary
+
+
+def lock_patient_summaries(db: Session, *patient_ids: int) -> None:
+    """
+    Lock the summary rows of several patients in id order, so writers touching the
+    same patients (e.g. moving histories between them) cannot deadlock.
+    """
+    db.execute(
+        select(PatientSummary.patient_id)
+        .where(PatientSummary.patient_id.in_(patient_ids))
+        .order_by(PatientSummary.patient_id)
+        .with_for_update()
+    )
+
+
+def refresh_patient_summary(db: Session, patient_id: int) -> PatientSummary:
+    """
+    Recompute the summary row of a single patient from their case histories.
+    Only that patient's histories are read (through the patient_id index).
+    """
+    # The session does not autoflush, so make pending history writes visible first
+    db.flush()
+    # Lock before reading the histories so a concurrent write cannot interleave
+    summary = _locked_summary(db, patient_id)
+
+    first_exam_date, last_exam_date = (
+        db.query(
+            func.min(SyphilisCaseHistory.diagnosis_date),
+            func.max(SyphilisCaseHistory.diagnosis_date),
+        )
+        .filter(SyphilisCaseHistory.patient_id == patient_id)
+        .one()
+    )
+    latest_history = (
+        db.query(SyphilisCaseHistory.id, SyphilisCaseHistory.titer_result)
+        .filter(SyphilisCaseHistory.patient_id == patient_id)
+        .order_by(
+            SyphilisCaseHistory.diagnosis_date.desc(),
+            SyphilisCaseHistory.created_at.desc(),
+            SyphilisCaseHistory.id.desc(),
+        )
+        .first()
+    )
+
+    summary.first_exam_date = first_exam_date
+    summary.last_exam_date = last_exam_date
+    summary.latest_history_id = latest_history.id if latest_history else None
+    summary.latest_titer = latest_history.titer_result if latest_history else None
+    summary.latest_titer_value = titer_value(summary.latest_titer)
+    summary.status = status_value(summary.latest_titer)
+    return summary
+
+
+def summary_history_added(
+    db: Session, history: SyphilisCaseHistory, is_new: bool = True
+) -> PatientSummary:
+    """
+    Fold a history that was inserted into (or moved to) a patient into their summary.
+    The history must already be flushed so it has an id. Ties on diagnosis_date are won
+    by a new history (latest created_at); for a moved one they fall back to a refresh.
+    """
+    summary = db.get(PatientSummary, history.patient_id, with_for_update=True)
+    new_date = history.diagnosis_date
+    if summary is None or new_date is None:
+        return refresh_patient_summary(db, history.patient_id)
+
+    if summary.latest_history_id is None:
+        summary.first_exam_date = new_date
+        _set_latest(summary, history)
+        return summary
+
+    if summary.first_exam_date is None or new_date < summary.first_exam_date:
+        summary.first_exam_date = new_date
+
+    if summary.last_exam_date is None or new_date > summary.last_exam_date:
+        _set_latest(summary, history)
+    elif new_date == summary.last_exam_date:
+        if not is_new:
+            return refresh_patient_summary(db, history.patient_id)
+        _set_latest(summary, history)
+    return summary
+
+
+def summary_history_removed(
+    db: Session, patient_id: int, history_id: int, diagnosis_date: Optional[date]
+) -> PatientSummary:
+    """
+    Account for a history leaving a patient (moved to another patient or deleted).
+    Histories strictly inside the patient's exam date range do not change the summary.
+    """
+    summary = db.get(PatientSummary, patient_id, with_for_update=True)
+    if (
+        summary is None
+        or diagnosis_date is None
+        or history_id == summary.latest_history_id
+        or diagnosis_date in (summary.first_exam_date, summary.last_exam_date)
+    ):
+        return refresh_patient_summary(db, patient_id)
+    return summary
+
+
+def summary_history_changed(
+    db: Session, history: SyphilisCaseHistory, previous_diagnosis_date: Optional[date]
+) -> PatientSummary:
+    """
+    Account for an in-place update of a history's date or titer (same patient).
+    """
+    summary = db.get(PatientSummary, history.patient_id, with_for_update=True)
+    new_date = history.diagnosis_date
+    if summary is None or new_date is None or previous_diagnosis_date is None:
+        return refresh_patient_summary(db, history.patient_id)
+
+    # Leaving the first exam date could expose another history as the first one
+    if previous_diagnosis_date == summary.first_exam_date and new_date > previous_diagnosis_date:
+        return refresh_patient_summary(db, history.patient_id)
+
+    if history.id == summary.latest_history_id:
+        # Moving the latest history back in time could promote another one
+        if new_date < previous_diagnosis_date:
+            return refresh_patient_summary(db, history.patient_id)
+        summary.first_exam_date = min(summary.first_exam_date, new_date)
+        _set_latest(summary, history)
+        return summary
+
+    # Leaving the last exam date (shared with the latest history) is ambiguous as well
+    if previous_diagnosis_date == summary.last_exam_date:
+        return refresh_patient_summary(db, history.patient_id)
+    return summary_history_added(db, history, is_new=False)
+
+
+def _summary_rows(
+    db: Session,
+    chunk_size: int,
+    with_stored: bool = True,
+    patient_ids: Optional[Iterable[int]] = None,
+) -> Iterator:
+    """
+    Stream every patient (or only patient_ids) with the summary derived from their
+    histories in one pass, optionally alongside the stored summary columns (prefixed with stored_).
+    """
+    ranked = (
+        select(
+            SyphilisCaseHistory.patient_id,
+            SyphilisCaseHistory.id,
+            SyphilisCaseHistory.titer_result,
+            func.row_number().over(
+                partition_by=SyphilisCaseHistory.patient_id,
+                order_by=[
+                    SyphilisCaseHistory.diagnosis_date.desc(),
+                    SyphilisCaseHistory.created_at.desc(),
+                    SyphilisCaseHistory.id.desc(),
+                ],
+            ).label("rn"),
+            func.min(SyphilisCaseHistory.diagnosis_date).over(
+                partition_by=SyphilisCaseHistory.patient_id
+            ).label("first_exam_date"),
+            func.max(SyphilisCaseHistory.diagnosis_date).over(
+                partition_by=SyphilisCaseHistory.patient_id
+            ).label("last_exam_date"),
+        )
+    )
+    if patient_ids is not None:
+        ranked = ranked.where(SyphilisCaseHistory.patient_id.in_(patient_ids))
+    ranked = ranked.subquery()
+    stmt = (
+        select(
+            Patient.id,
+            ranked.c.first_exam_date,
+            ranked.c.last_exam_date,
+            ranked.c.id.label("latest_history_id"),
+            ranked.c.titer_result,
+        )
+        .outerjoin(ranked, and_(Patient.id == ranked.c.patient_id, ranked.c.rn == 1))
+        .order_by(Patient.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    if patient_ids is not None:
+        stmt = stmt.where(Patient.id.in_(patient_ids))
+    if with_stored:
+        stmt = stmt.add_columns(
+            PatientSummary.first_exam_date.label("stored_first_exam_date"),
+            PatientSummary.last_exam_date.label("stored_last_exam_date"),
+            PatientSummary.latest_history_id.label("stored_latest_history_id"),
+            PatientSummary.latest_titer.label("stored_latest_titer"),
+            PatientSummary.latest_titer_value.label("stored_latest_titer_value"),
+            PatientSummary.status.label("stored_status"),
+            PatientSummary.patient_id.label("stored_patient_id"),
+        ).outerjoin(PatientSummary, Patient.id == PatientSummary.patient_id)
+    return db.execute(stmt)
+
+
+def _expected_summary(row) -> dict:
+    return {
+        "patient_id": row.id,
+        "first_exam_date": row.first_exam_date,
+        "last_exam_date": row.last_exam_date,
+        "latest_history_id": row.latest_history_id,
+        "latest_titer": row.titer_result,
+        "latest_titer_value": titer_value(row.titer_result),
+        "status": status_value(row.titer_result),
+    }
+
+
+def rebuild_patient_summaries(db: Session, chunk_size: int = 1000) -> int:
+    """
+    Recreate every summary row from syphilis_case_histories in a single pass.
+    Returns the number of summaries written. The caller commits.
+    """
+    db.query(PatientSummary).delete(synchronize_session=False)
+
+    written = 0
+    batch = []
+    for row in _summary_rows(db, chunk_size, with_stored=False):
+        batch.append(_expected_summary(row))
+        if len(batch) >= chunk_size:
+            db.execute(insert(PatientSummary), batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(PatientSummary), batch)
+        written += len(batch)
+    return written
+
+
+def refresh_patient_summaries(db: Session, patient_ids: Iterable[int], chunk_size: int = 1000) -> int:
+    """
+    Set-based refresh of the summaries of many patients, for bulk writes.
+    Returns the number of summaries written. The caller commits.
+    """
+    patient_ids = list(set(patient_ids))
+    if not patient_ids:
+        return 0
+    db.flush()
+
+    written = 0
+    for start in range(0, len(patient_ids), chunk_size):
+        chunk = patient_ids[start:start + chunk_size]
+        rows = [
+            _expected_summary(row)
+            for row in _summary_rows(db, chunk_size, with_stored=False, patient_ids=chunk)
+        ]
+        db.query(PatientSummary).filter(PatientSummary.patient_id.in_(chunk)).delete(
+            synchronize_session=False
+        )
+        if rows:
+            db.execute(insert(PatientSummary), rows)
+        written += len(rows)
+    return written
+
+
+def verify_patient_summaries(db: Session, chunk_size: int = 1000) -> List[int]:
+    """
+    Compare the stored summaries against the histories and return the ids of the
+    patients whose summary is missing or has drifted.
+    """
+    drifted = []
+    for row in _summary_rows(db, chunk_size):
+        expected = _expected_summary(row)
+        if row.stored_patient_id is None or any(
+            getattr(row, f"stored_{key}") != value
+            for key, value in expected.items()
+            if key != "patient_id"
+        ):
+            drifted.append(row.id)
+    return drifted
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the patient_summaries projection.")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    parser.add_argument("--fix", action="store_true", help="refresh drifted summaries after verify")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            written = rebuild_patient_summaries(db, chunk_size=args.chunk_size)
+            db.commit()
+            print(f"Rebuilt {written} patient summaries")
+        else:
+            drifted = verify_patient_summaries(db, chunk_size=args.chunk_size)
+            print(f"{len(drifted)} patient summaries drifted")
+            if drifted and args.fix:
+                for patient_id in drifted:
+                    refresh_patient_summary(db, patient_id)
+                db.commit()
+                print(f"Refreshed {len(drifted)} patient summaries")
+            elif drifted:
+                print(", ".join(str(patient_id) for patient_id in drifted))
+                raise SystemExit(1)
+    finally:
+        db.close()
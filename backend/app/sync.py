@@ -0,0 +1,203 @@
+import argparse
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from models import DeletedRecord, Patient, SyphilisCaseHistory
+from pagination import decode_cursor, encode_cursor
+from sqlalchemy import and_, delete, func, insert, literal, or_, select
+from sqlalchemy.orm import Session
+
+# Rows are synced once they are this old. PostgreSQL stamps updated_at with the
+# start of the writing transaction, so a write that commits late can carry a
+# timestamp older than rows a sync already returned; the lag has to exceed the
+# longest write transaction for no row to be skipped.
+SYNC_SAFETY_SECONDS = int(os.getenv("SYNC_SAFETY_SECONDS", "30"))
+# Tombstones are purged after this long (python sync.py purge); sync tokens
+# older than that can no longer see every deletion and have to start over
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+
+
+class SyncTokenExpired(Exception):
+    pass
+
+
+def record_deletions(db: Session, patient_ids: Iterable[int]) -> None:
+    """
+    Write the tombstones of patients about to be deleted and of their case
+    histories, in the deleting transaction. Ids without a patient are ignored.
+    """
+    patient_ids = list(patient_ids)
+    db.execute(
+        insert(DeletedRecord).from_select(
+            ["table_name", "record_id", "patient_id"],
+            select(
+                literal(SyphilisCaseHistory.__tablename__), SyphilisCaseHistory.id, SyphilisCaseHistory.patient_id
+            ).where(SyphilisCaseHistory.patient_id.in_(patient_ids)),
+        )
+    )
+    db.execute(
+        insert(DeletedRecord).from_select(
+            ["table_name", "record_id", "patient_id"],
+            select(literal(Patient.__tablename__), Patient.id, Patient.id).where(Patient.id.in_(patient_ids)),
+        )
+    )
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive timestamps, which CURRENT_TIMESTAMP writes in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def database_now(db: Session) -> datetime:
+    """
+    Current time on the database clock, which stamps updated_at.
+    """
+    return _utc(db.scalar(select(func.now())))
+
+
+def timestamp_sql(value: datetime, dialect_name: str):
+    """
+    value for comparison with an updated_at column. SQLite stores CURRENT_TIMESTAMP
+    text without fractional seconds, so the bound value has to be written the same
+    way to compare equal.
+    """
+    if dialect_name != "sqlite":
+        return value
+    value = _utc(value)
+    text = value.strftime("%Y-%m-%d %H:%M:%S")
+    if value.microsecond:
+        text += f".{value.microsecond:06d}"
+    return literal(text)
+
+
+def _position(value) -> Optional[tuple]:
+    return (datetime.fromisoformat(value[0]), int(value[1])) if value else None
+
+
+def _window_page(db: Session, statement, timestamp_column, id_column, since, until, position, limit: int):
+    """
+    Rows of statement stamped in (since, until] after the (timestamp, id) keyset
+    position, in that order, and whether more follow.
+    """
+    dialect_name = db.get_bind().dialect.name
+    conditions = [timestamp_column <= timestamp_sql(until, dialect_name)]
+    if since is not None:
+        conditions.append(timestamp_column > timestamp_sql(since, dialect_name))
+    if position is not None:
+        last_timestamp = timestamp_sql(position[0], dialect_name)
+        conditions.append(and_(
+            timestamp_column >= last_timestamp,
+            or_(timestamp_column > last_timestamp, id_column > position[1]),
+        ))
+    rows = db.execute(statement.where(*conditions).order_by(timestamp_column, id_column).limit(limit + 1)).all()
+    return rows[:limit], len(rows) > limit
+
+
+def sync_page(
+    db: Session,
+    model,
+    statement,
+    token: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+    limit: int = 500,
+) -> dict:
+    """
+    One page of the rows of model (selected by statement) changed since the sync
+    token or updated_since, and the tombstones of those deleted since then.
+    Without either it is a full sync, without tombstones.
+
+    A sync covers a fixed window (since, until], until being SYNC_SAFETY_SECONDS
+    ago when it starts, paged by the (updated_at, id) keyset. Rows written while a
+    sync is paging get a newer updated_at, past its window, so pages never skip
+    or repeat rows; the next sync picks them up. next_token continues the window
+    while has_more is set, and afterwards is the token of the next sync.
+
+    Raises ValueError for an invalid token and SyncTokenExpired when the token is
+    older than the tombstones kept.
+    """
+    table_name = model.__tablename__
+    state = decode_cursor(token) if token else {"t": table_name, "s": None}
+    if state.get("t") != table_name:
+        raise ValueError("Sync token was issued for another table")
+    if updated_since is not None:
+        state["s"] = _utc(updated_since).isoformat()
+    since = _utc(datetime.fromisoformat(state["s"])) if state.get("s") else None
+
+    if state.get("u") is None:
+        # A new sync: fix its window
+        now = database_now(db)
+        if since is not None and since < now - timedelta(days=SYNC_TOMBSTONE_RETENTION_DAYS):
+            raise SyncTokenExpired()
+        # Even without concurrent writers, rows stamped in the current second
+        # (all SQLite stores) could still get company
+        until = now - timedelta(seconds=max(SYNC_SAFETY_SECONDS, 1))
+        if since is not None and since >= until:
+            return {"items": [], "deleted": [], "next_token": encode_cursor({"t": table_name, "s": since}), "has_more": False}
+        # A full sync starts from nothing, so there is nothing to delete
+        state = {"t": table_name, "s": since, "u": until, "r": None, "d": None, "rd": False, "dd": since is None}
+    else:
+        until = _utc(datetime.fromisoformat(state["u"]))
+
+    rows, deleted = [], []
+    if not state["rd"]:
+        rows, more = _window_page(
+            db, statement, model.updated_at, model.id, since, until, _position(state["r"]), limit
+        )
+        if rows:
+            state["r"] = [rows[-1].updated_at.isoformat(), rows[-1].id]
+        state["rd"] = not more
+    if not state["dd"]:
+        deleted, more = _window_page(
+            db,
+            select(DeletedRecord.id, DeletedRecord.record_id, DeletedRecord.patient_id, DeletedRecord.deleted_at)
+            .where(DeletedRecord.table_name == table_name),
+            DeletedRecord.deleted_at,
+            DeletedRecord.id,
+            since,
+            until,
+            _position(state["d"]),
+            limit,
+        )
+        if deleted:
+            state["d"] = [deleted[-1].deleted_at.isoformat(), deleted[-1].id]
+        state["dd"] = not more
+
+    has_more = not (state["rd"] and state["dd"])
+    next_state = state if has_more else {"t": table_name, "s": until}
+    return {
+        "items": rows,
+        "deleted": [
+            {"id": row.record_id, "patient_id": row.patient_id, "deleted_at": _utc(row.deleted_at)} for row in deleted
+        ],
+        "next_token": encode_cursor(next_state),
+        "has_more": has_more,
+    }
+
+
+def purge_tombstones(db: Session, retention_days: int = SYNC_TOMBSTONE_RETENTION_DAYS) -> int:
+    """
+    Delete the tombstones older than retention_days. Returns how many went.
+    """
+    cutoff = database_now(db) - timedelta(days=retention_days)
+    result = db.execute(
+        delete(DeletedRecord).where(DeletedRecord.deleted_at < timestamp_sql(cutoff, db.get_bind().dialect.name))
+    )
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the delta sync tombstones.")
+    parser.add_argument("command", choices=["purge"])
+    parser.add_argument("--retention-days", type=int, default=SYNC_TOMBSTONE_RETENTION_DAYS)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        purged = purge_tombstones(db, args.retention_days)
+        db.commit()
+        print(f"Purged {purged} tombstones")
+    finally:
+        db.close()
@@ -0,0 +1,166 @@
+import argparse
+from datetime import date, datetime
+from typing import Any, Callable, Iterable, List, Literal, Optional, Tuple
+
+from models import SyphilisCaseHistory, TreatmentDose
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+MedicationMatch = Literal["exact", "prefix"]
+
+# Keys of a treatment entry holding the medication and its dose dates. The
+# frontend sends {"name", "date1", "date2", "date3"}; the others are accepted
+# for entries created through the API.
+MEDICATION_KEYS = ("name", "medication", "drug")
+DOSE_DATE_KEYS = ("date", "date1", "date2", "date3")
+
+
+def medication_key(medication: Any) -> Optional[str]:
+    """
+    Normalized medication used for lookups: lowercased with collapsed whitespace.
+    """
+    if medication is None:
+        return None
+    key = " ".join(str(medication).split()).lower()
+    return key[:TreatmentDose.medication_key.type.length] or None
+
+
+def _dose_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10])
+    except ValueError:
+        return None
+
+
+def treatment_dose_values(treatments: Any) -> List[dict]:
+    """
+    Dose rows (without ids) for a treatments JSON value: one per valid dose date
+    of each treatment, or one undated row for a treatment without any. Entries
+    that are not objects are skipped.
+    """
+    if not isinstance(treatments, list):
+        return []
+    values = []
+    for position, treatment in enumerate(treatments):
+        if not isinstance(treatment, dict):
+            continue
+        medication = next((treatment[key] for key in MEDICATION_KEYS if treatment.get(key)), None)
+        row = {
+            "position": position,
+            "medication": str(medication)[:TreatmentDose.medication.type.length] if medication is not None else None,
+            "medication_key": medication_key(medication),
+        }
+        dose_dates = [_dose_date(treatment.get(key)) for key in DOSE_DATE_KEYS]
+        dose_dates = [dose_date for dose_date in dose_dates if dose_date is not None]
+        if not dose_dates:
+            values.append({**row, "dose_number": None, "dose_date": None})
+        for dose_number, dose_date in enumerate(dose_dates, start=1):
+            values.append({**row, "dose_number": dose_number, "dose_date": dose_date})
+    return values
+
+
+def insert_treatment_doses(db: Session, histories: Iterable[Tuple[int, int, Any]]) -> int:
+    """
+    Insert the doses of (history id, patient id, treatments) triples with one
+    multi-row INSERT, for histories written through Core. Returns the number of rows.
+    """
+    values = [
+        {"case_history_id": history_id, "patient_id": patient_id, **dose}
+        for history_id, patient_id, treatments in histories
+        for dose in treatment_dose_values(treatments)
+    ]
+    if values:
+        db.execute(insert(TreatmentDose), values)
+    return len(values)
+
+
+def backfill_treatment_doses(
+    db: Session,
+    chunk_size: int = 1000,
+    after_id: int = 0,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    (Re)build treatment_doses from syphilis_case_histories, chunk_size histories at
+    a time in id order, committing after each chunk. Every transaction only locks
+    the chunk it rewrites, so the application keeps writing while it runs; it is
+    idempotent and can resume from the last reported id with after_id.
+    progress(last_id, doses) is called after each chunk. Returns the doses written.
+    """
+    written = 0
+    while True:
+        chunk = db.execute(
+            select(SyphilisCaseHistory.id, SyphilisCaseHistory.patient_id, SyphilisCaseHistory.treatments)
+            .where(SyphilisCaseHistory.id > after_id)
+            .order_by(SyphilisCaseHistory.id)
+            .limit(chunk_size)
+            # Keeps a concurrent edit from interleaving with the rewrite of its doses
+            .with_for_update()
+        ).all()
+        if not chunk:
+            return written
+
+        history_ids = [row.id for row in chunk]
+        db.execute(delete(TreatmentDose).where(TreatmentDose.case_history_id.in_(history_ids)))
+        doses = insert_treatment_doses(db, chunk)
+        db.commit()
+
+        written += doses
+        after_id = history_ids[-1]
+        if progress is not None:
+            progress(after_id, doses)
+
+
+def dose_filters(
+    medication: Optional[str] = None,
+    match: MedicationMatch = "exact",
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    patient_id: Optional[int] = None,
+) -> list:
+    """
+    WHERE conditions on treatment_doses, served by its (medication_key, dose_date)
+    and (patient_id, dose_date) indexes.
+    """
+    conditions = []
+    if medication is not None:
+        key = medication_key(medication) or ""
+        if match == "prefix":
+            conditions.append(TreatmentDose.medication_key.startswith(key, autoescape=True))
+        else:
+            conditions.append(TreatmentDose.medication_key == key)
+    if since is not None:
+        conditions.append(TreatmentDose.dose_date >= since)
+    if until is not None:
+        conditions.append(TreatmentDose.dose_date <= until)
+    if patient_id is not None:
+        conditions.append(TreatmentDose.patient_id == patient_id)
+    return conditions
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the treatment_doses table.")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--after-id", type=int, default=0, help="resume after this case history id")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        written = backfill_treatment_doses(
+            db,
+            chunk_size=args.chunk_size,
+            after_id=args.after_id,
+            progress=lambda last_id, doses: print(f"up to case history {last_id}: {doses} doses"),
+        )
+        print(f"Backfilled {written} treatment doses")
+    finally:
+        db.close()
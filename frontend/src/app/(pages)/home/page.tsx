@@ -6,7 +6,7 @@ import { useAuth } from "@/context/AuthContext";
 import PageLayout from "@/components/PageLayout";
 import { Card, Spinner, Table } from "@/components";
 
-import { patientService } from "@/services/api";
+import { changeService, patientService } from "@/services/api";
 
 import { Patient } from "@/services/api";
 import { Button } from "@/components/ui/button";
@@ -44,6 +44,17 @@ const HomePage = () => {
     getPatients();
   }, []);
 
+  // Refetch the list without the spinner whenever a patient is written
+  useEffect(() => {
+    const refresh = () => {
+      patientService
+        .getPatients()
+        .then((data) => setPatients(data))
+        .catch((err) => console.error(err));
+    };
+    return changeService.subscribe(refresh, refresh);
+  }, []);
+
   if (isLoading) {
     return <Spinner />;
   }
@@ -1,7 +1,11 @@
 "use client";
 import { useEffect, useState } from "react";
 import { useParams, useRouter } from "next/navigation";
-import { PatientDataProps, patientService } from "@/services/api";
+import {
+  changeService,
+  PatientDataProps,
+  patientService,
+} from "@/services/api";
 
 import { Card, Modal, Spinner } from "@/components";
 
@@ -36,6 +40,22 @@ const PatientPage = () => {
     }
   }, [id]);
 
+  // Follow writes to this patient without the spinner; leave when it is deleted
+  useEffect(() => {
+    if (!id) return;
+    const refresh = () => {
+      patientService
+        .getPatient(Number(id))
+        .then((res) => setPatientData(res))
+        .catch((err) => console.error(err));
+    };
+    return changeService.subscribe(
+      (change) => (change.deleted ? route.push("/home") : refresh()),
+      refresh,
+      [Number(id)]
+    );
+  }, [id, route]);
+
   const handleBackHome = () => {
     route.push("/home");
   };
@@ -1,6 +1,28 @@
 // Base API URL from environment variable
 const API_BASE_URL = process.env.NEXT_PUBLIC_BACKEND_API || "";
 
+// Read-your-writes: a successful write answers with this header and the backend
+// serves our reads from the primary database while we send it back
+const READ_PRIMARY_HEADER = "X-Read-Primary-Until";
+let readPrimaryUntil: string | null = null;
+
+// fetch that keeps the read-your-writes header current across requests
+const apiFetch = async (
+  url: string,
+  init: RequestInit = {}
+): Promise<Response> => {
+  const headers = new Headers(init.headers);
+  if (readPrimaryUntil && Number(readPrimaryUntil) * 1000 > Date.now()) {
+    headers.set(READ_PRIMARY_HEADER, readPrimaryUntil);
+  }
+  const response = await fetch(url, { ...init, headers });
+  const until = response.headers.get(READ_PRIMARY_HEADER);
+  if (until) {
+    readPrimaryUntil = until;
+  }
+  return response;
+};
+
 // Types based on backend schemas
 export type CaseHistoriesProps = {
   patient_id: string;
@@ -89,7 +111,7 @@ export const patientService = {
   // Get all patients
   getPatients: async (): Promise<Patient[]> => {
     try {
-      const response = await fetch(`${API_BASE_URL}/patients/`);
+      const response = await apiFetch(`${API_BASE_URL}/patients/`);
 
       // If 404, return empty array (no patients found)
       if (response.status === 404) {
@@ -110,7 +132,7 @@ export const patientService = {
   // Get patient by ID
   getPatient: async (id: number): Promise<PatientDataProps> => {
     try {
-      const response = await fetch(`${API_BASE_URL}/patients/${id}`);
+      const response = await apiFetch(`${API_BASE_URL}/patients/${id}`);
       if (!response.ok) {
         throw new Error(`Error: ${response.status}`);
       }
@@ -124,7 +146,7 @@ export const patientService = {
   // Create a new patient
   createPatient: async (patientData: NewPatient): Promise<PatientDataProps> => {
     try {
-      const response = await fetch(`${API_BASE_URL}/patients/`, {
+      const response = await apiFetch(`${API_BASE_URL}/patients/`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -147,7 +169,7 @@ export const patientService = {
     patientData: Omit<Patient, "id">
   ): Promise<Patient> => {
     try {
-      const response = await fetch(`${API_BASE_URL}/patients/${id}`, {
+      const response = await apiFetch(`${API_BASE_URL}/patients/${id}`, {
         method: "PUT",
         headers: {
           "Content-Type": "application/json",
@@ -166,7 +188,7 @@ export const patientService = {
 
   deletePatient: async (id: number): Promise<any> => {
     try {
-      const response = await fetch(`${API_BASE_URL}/patients/${id}`, {
+      const response = await apiFetch(`${API_BASE_URL}/patients/${id}`, {
         method: "DELETE",
         headers: {
           "Content-Type": "application/json",
@@ -197,7 +219,7 @@ export const caseService = {
       const url = patientId
         ? `${API_BASE_URL}/cases?patient_id=${patientId}`
         : `${API_BASE_URL}/cases`;
-      const response = await fetch(url);
+      const response = await apiFetch(url);
       if (!response.ok) {
         throw new Error(`Error: ${response.status}`);
       }
@@ -211,7 +233,7 @@ export const caseService = {
   // Get case by ID
   getCase: async (id: number): Promise<SyphilisCase> => {
     try {
-      const response = await fetch(`${API_BASE_URL}/cases/${id}`);
+      const response = await apiFetch(`${API_BASE_URL}/cases/${id}`);
       if (!response.ok) {
         throw new Error(`Error: ${response.status}`);
       }
@@ -225,7 +247,7 @@ export const caseService = {
   // Create a new case
   createCase: async (caseData: SyphilisCaseProps): Promise<SyphilisCase> => {
     try {
-      const response = await fetch(`${API_BASE_URL}/syphilis-case-history/`, {
+      const response = await apiFetch(`${API_BASE_URL}/syphilis-case-history/`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -248,7 +270,7 @@ export const caseService = {
     caseData: { notes: string; titer_result: string }
   ): Promise<SyphilisCase> => {
     try {
-      const response = await fetch(
+      const response = await apiFetch(
         `${API_BASE_URL}/syphilis-case-history/${id}`,
         {
           method: "PUT",
@@ -268,3 +290,34 @@ export const caseService = {
     }
   },
 };
+
+export type PatientChange = {
+  patient_id: number;
+  deleted: boolean;
+  status: string | null;
+  last_exam_date: string | null;
+};
+
+// Push-based updates instead of polling
+export const changeService = {
+  // Call onChange for every patient written (only patientIds, when given) and
+  // onResync when changes were missed and everything should be refetched.
+  // Returns a function that closes the stream.
+  subscribe: (
+    onChange: (change: PatientChange) => void,
+    onResync: () => void,
+    patientIds?: number[]
+  ): (() => void) => {
+    const params = new URLSearchParams();
+    patientIds?.forEach((id) => params.append("patient_id", String(id)));
+    const query = params.toString();
+    const source = new EventSource(
+      `${API_BASE_URL}/changes/stream${query ? `?${query}` : ""}`
+    );
+    source.addEventListener("change", (event) =>
+      onChange(JSON.parse((event as MessageEvent).data))
+    );
+    source.addEventListener("resync", () => onResync());
+    return () => source.close();
+  },
+};